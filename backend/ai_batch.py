@@ -0,0 +1,134 @@
+import os
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from backend.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# AI 배치 호출 설정
+MAX_CONCURRENCY = int(os.environ.get('AI_MAX_CONCURRENCY', 4))      # 동시에 진행하는 배치 수
+RATE_PER_SEC = float(os.environ.get('AI_RATE_PER_SEC', 1.0))        # 초당 허용 호출 수 (토큰 버킷 충전 속도)
+RATE_BURST = int(os.environ.get('AI_RATE_BURST', 2))                 # 한꺼번에 나갈 수 있는 호출 수
+MAX_RETRIES = int(os.environ.get('AI_MAX_RETRIES', 3))               # 실패 시 재시도 횟수
+BATCH_TIMEOUT = float(os.environ.get('AI_BATCH_TIMEOUT', 120))       # 호출 1회 제한 시간(초)
+BACKOFF_SECONDS = float(os.environ.get('AI_BACKOFF_SECONDS', 1.0))   # 재시도 대기: backoff * 2^n (+지터)
+# 제한 시간을 넘긴 호출은 스레드를 멈출 수 없어 끝날 때까지 돌아간다. 그렇게 남아 있는 호출이 프로세스 전체에서
+# 이 수에 이르면 새 호출을 보내지 않고 실패(재시도 대상)로 처리한다
+MAX_ABANDONED_CALLS = int(os.environ.get('AI_MAX_ABANDONED_CALLS', 8))
+
+_abandoned_lock = threading.Lock()
+_abandoned = 0     # 제한 시간을 넘겨 버려 둔 채 아직 실행 중인 호출 수
+
+
+def abandoned_calls():
+    """제한 시간을 넘겨 결과를 기다리지 않고 있지만 아직 끝나지 않은 호출 수 (/metrics 게이지)."""
+    return _abandoned
+
+
+def _abandon(future):
+    """시간 초과된 호출: 아직 시작 전이면 취소하고, 실행 중이면 끝날 때까지 수를 센다."""
+    global _abandoned
+    if future.cancel():
+        return
+    with _abandoned_lock:
+        _abandoned += 1
+    registry.inc('entrychecker_ai_abandoned_calls_total')
+
+    def release(_):
+        global _abandoned
+        with _abandoned_lock:
+            _abandoned -= 1
+
+    future.add_done_callback(release)
+
+
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 capacity개까지 쌓이는 토큰 버킷. acquire()는 토큰이 생길 때까지 기다린다."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class BatchFailed(Exception):
+    """재시도를 모두 소진한 배치. 마지막 오류를 담는다."""
+
+
+def run_batches(
+    batches,
+    call,
+    max_concurrency=MAX_CONCURRENCY,
+    rate_per_sec=RATE_PER_SEC,
+    burst=RATE_BURST,
+    retries=MAX_RETRIES,
+    timeout=BATCH_TIMEOUT,
+    backoff=BACKOFF_SECONDS,
+    on_done=None,
+    should_stop=None,
+):
+    """
+    batches의 각 항목에 call(batch)를 동시에 최대 max_concurrency개까지 실행한다.
+    호출 시작은 토큰 버킷으로 초당 rate_per_sec개로 제한하고, 실패·시간 초과는 지수 백오프로 재시도한다.
+    on_done(i, result | BatchFailed)은 배치가 끝나는 대로 (완료 순서대로) 호출된다.
+    should_stop()이 True를 돌려주면 아직 호출하지 않은 배치는 BatchFailed("작업이 취소되었습니다.")로 끝낸다.
+    제한 시간을 넘긴 호출은 취소할 수 없으면 버려 두되 수를 세고, MAX_ABANDONED_CALLS개가 남아 있는 동안은
+    새로 호출하지 않는다.
+    반환: 입력 순서대로 결과 또는 BatchFailed 목록.
+    """
+    bucket = TokenBucket(rate_per_sec, burst)
+    # 제한 시간을 넘긴 호출은 기다리지 않고 버려 두므로, 실제 호출은 별도 풀에서 돌린다
+    call_pool = ThreadPoolExecutor(max_workers=max(1, max_concurrency) * 2, thread_name_prefix='ai-call')
+
+    def run_one(i, batch):
+        last_error = None
+        for attempt in range(retries + 1):
+            if attempt:
+                time.sleep(backoff * (2 ** (attempt - 1)) * (1 + random.random() * 0.25))
+            bucket.acquire()
+            if should_stop is not None and should_stop():
+                result = BatchFailed("작업이 취소되었습니다.")
+                break
+            if abandoned_calls() >= MAX_ABANDONED_CALLS:
+                last_error = RuntimeError(f"응답 없는 AI 호출 {abandoned_calls()}개가 아직 끝나지 않았습니다.")
+            else:
+                future = call_pool.submit(call, batch)
+                try:
+                    result = future.result(timeout=timeout)
+                    break
+                except FutureTimeout:
+                    _abandon(future)
+                    last_error = TimeoutError(f"{timeout:.0f}초 안에 응답이 없습니다.")
+                except Exception as e:
+                    last_error = e
+            logger.warning("배치 %d 분석 실패 (시도 %d/%d): %s", i + 1, attempt + 1, retries + 1, last_error)
+        else:
+            result = BatchFailed(str(last_error))
+        if on_done is not None:
+            on_done(i, result)
+        return result
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix='ai-batch') as pool:
+            futures = [pool.submit(run_one, i, b) for i, b in enumerate(batches)]
+            return [f.result() for f in futures]
+    finally:
+        call_pool.shutdown(wait=False, cancel_futures=True)
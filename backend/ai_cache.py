@@ -0,0 +1,107 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# 같은 전표세트·같은 분개에 대한 AI 응답을 디스크(SQLite)에 보관해 재실행 시 API를 다시 부르지 않는다.
+# key = sha256(종류 + 프롬프트 버전 + 모델 이름 + 입력을 정규화한 JSON).
+# 프롬프트를 바꾸면 버전을 올려 이전 응답을 무효화하고, 다른 모델(스텁 포함)의 응답은 서로 섞이지 않는다.
+CACHE_PATH = os.environ.get('AI_CACHE_PATH', os.path.join(os.path.dirname(__file__), 'ai_cache.sqlite3'))
+TTL_SECONDS = int(os.environ.get('AI_CACHE_TTL', 7 * 24 * 60 * 60))     # 저장 후 7일
+MAX_ENTRIES = int(os.environ.get('AI_CACHE_MAX_ENTRIES', 50_000))
+ENABLED = os.environ.get('AI_CACHE_DISABLED', '') not in ('1', 'true', 'yes')
+
+
+def model_name(model):
+    """캐시 키에 넣을 모델 이름. Gemini 모델은 model_name 속성, 없으면 클래스 이름."""
+    return getattr(model, 'model_name', None) or type(model).__name__
+
+
+def canonical_key(kind, version, payload, model=''):
+    """dict 키 순서·공백과 무관한 입력 해시. numpy·날짜 등 JSON에 없는 값은 문자열로 바꾼다."""
+    text = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(f'{kind}\n{version}\n{model}\n{text}'.encode('utf-8')).hexdigest()
+
+
+class AICache:
+    """
+    key → AI 응답(JSON) SQLite 캐시.
+    TTL이 지난 항목은 조회되지 않고, 항목 수가 max_entries를 넘으면 가장 오래 사용하지 않은 것부터 지운다.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=TTL_SECONDS, max_entries=MAX_ENTRIES, enabled=ENABLED):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = {}     # 종류별 적중 수
+        self.misses = {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS ai_cache ('
+                ' key TEXT PRIMARY KEY, kind TEXT NOT NULL, value TEXT NOT NULL,'
+                ' created REAL NOT NULL, last_access REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS ai_cache_last_access ON ai_cache(last_access)')
+            self._conn.commit()
+        return self._conn
+
+    def get(self, kind, version, payload, model=''):
+        """저장된 응답 또는 None. model은 응답을 만든 모델 이름(model_name)."""
+        if not self.enabled:
+            return None
+        key = canonical_key(kind, version, payload, model)
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute('SELECT value, created FROM ai_cache WHERE key = ?', (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                db.execute('DELETE FROM ai_cache WHERE key = ?', (key,))
+                db.commit()
+                row = None
+            counter = self.misses if row is None else self.hits
+            counter[kind] = counter.get(kind, 0) + 1
+            if row is None:
+                return None
+            db.execute('UPDATE ai_cache SET last_access = ? WHERE key = ?', (now, key))
+            db.commit()
+        return json.loads(row[0])
+
+    def put(self, kind, version, payload, value, model=''):
+        if not self.enabled:
+            return
+        key = canonical_key(kind, version, payload, model)
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute('INSERT OR REPLACE INTO ai_cache VALUES (?, ?, ?, ?, ?)',
+                       (key, kind, json.dumps(value, ensure_ascii=False, default=str), now, now))
+            self._evict(db, now)
+            db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db().execute('DELETE FROM ai_cache')
+            self._db().commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._db().execute('SELECT COUNT(*) FROM ai_cache').fetchone()[0] if self.enabled else 0
+            return {'entries': entries, 'hits': dict(self.hits), 'misses': dict(self.misses)}
+
+    def _evict(self, db, now):
+        db.execute('DELETE FROM ai_cache WHERE created < ?', (now - self.ttl,))
+        excess = db.execute('SELECT COUNT(*) FROM ai_cache').fetchone()[0] - self.max_entries
+        if excess > 0:
+            db.execute('DELETE FROM ai_cache WHERE key IN '
+                       '(SELECT key FROM ai_cache ORDER BY last_access LIMIT ?)', (excess,))
+
+
+ai_cache = AICache()
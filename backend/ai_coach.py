@@ -4,6 +4,9 @@ import re  # 정규표현식 모듈 import
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from backend.ai_cache import ai_cache, model_name
+from backend.metrics import observe_ai_call
+
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
 
 try:
@@ -16,8 +19,18 @@ except Exception as e:
     print(f"Gemini API 설정 오류 (ai_coach): {e}")
     gemini_model = None
 
-def get_single_entry_suggestion(entry_data, rule_name):
-    if not gemini_model:
+PROMPT_VERSION = 1   # 프롬프트·응답 형식을 바꾸면 올린다 (AI 응답 캐시 무효화)
+
+def get_single_entry_suggestion(entry_data, rule_name, model=None, cache=None):
+    """같은 분개·같은 규칙의 코칭은 ai_cache에 저장된 응답을 돌려준다. model로 스텁 주입 가능."""
+    model = model or gemini_model
+    cache = cache or ai_cache
+    cache_payload = {"entry": entry_data, "rule": rule_name}
+    model_key = model_name(model) if model else ''
+    cached = cache.get('coach', PROMPT_VERSION, cache_payload, model_key)
+    if cached is not None:
+        return cached
+    if not model:
         raise ConnectionError("Gemini API가 정상적으로 설정되지 않았습니다.")
 
     prompt = f"""
@@ -47,7 +60,7 @@ def get_single_entry_suggestion(entry_data, rule_name):
     }}
     """
     try:
-        response = gemini_model.generate_content(prompt)
+        response = observe_ai_call('coach', lambda: model.generate_content(prompt))
         response_text = response.text
 
         # 정규표현식을 사용하여 응답에서 JSON 객체 부분만 추출
@@ -60,7 +73,9 @@ def get_single_entry_suggestion(entry_data, rule_name):
         # NaN 값을 null로 치환 (이전 오류 방지)
         json_compatible_text = json_text.replace('NaN', 'null')
         
-        return json.loads(json_compatible_text)
+        suggestion = json.loads(json_compatible_text)
+        cache.put('coach', PROMPT_VERSION, cache_payload, suggestion, model_key)
+        return suggestion
     except Exception as e:
         print(f"Gemini API 호출 중 오류 발생 (ai_coach): {e}")
         raise RuntimeError(f"AI 분석 중 오류가 발생했습니다: {e}")
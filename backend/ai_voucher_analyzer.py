@@ -1,11 +1,17 @@
 import os
 import json
-import time
 import re  # 정규표현식 모듈 import
+import threading
 import pandas as pd
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from backend.analyzer import flag_unbalanced_set
+from backend.ai_batch import run_batches, BatchFailed
+from backend.ai_cache import ai_cache, model_name
+from backend.metrics import observe_ai_call
+from backend.prompt_packing import TOKEN_BUDGET, voucher_payload, payload_tokens, pack_batches, batch_json
+
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
 
 try:
@@ -18,72 +24,122 @@ except Exception as e:
     print(f"Gemini API 설정 오류 (ai_voucher_analyzer): {e}")
     gemini_model = None
 
-def analyze_voucher_sets_with_ai(df):
-    if not gemini_model:
-        raise ConnectionError("Gemini API가 정상적으로 설정되지 않았습니다.")
+BATCH_SIZE = int(os.environ.get('AI_BATCH_SIZE', 20))   # 요청당 최대 전표 수 (토큰 예산이 먼저 차면 더 적게 담는다)
+PROMPT_VERSION = 2   # 프롬프트·응답 형식을 바꾸면 올린다 (AI 응답 캐시 무효화)
+
+
+def parse_batch_response(response_text):
+    """AI 응답 텍스트 → 분석 결과 리스트. 형식이 어긋나면 ValueError (재시도 대상)."""
+    # 정규표현식을 사용하여 응답에서 JSON 배열 부분만 추출
+    match = re.search(r'\[[\s\S]*\]', response_text)
+    if not match:
+        print(f"AI raw response for debugging (ai_voucher_analyzer): {response_text}")
+        raise ValueError(f"AI 응답에서 유효한 JSON 배열을 찾을 수 없습니다.")
+
+    # NaN 값을 null로 치환 (이전 오류 방지)
+    json_compatible_text = match.group(0).replace('NaN', 'null')
+    return json.loads(json_compatible_text)
+
 
-    grouped = df.groupby(['전표일자', '전표번호'])
-    suspicious_vouchers = []
-    for (date, voucher_no), voucher_set in grouped:
-        debit_sum = voucher_set['차변금액'].sum()
-        credit_sum = voucher_set['대변금액'].sum()
-        if debit_sum != credit_sum:
-            suspicious_vouchers.append({
-                "date": str(date), "voucherNo": str(voucher_no),
-                "entries": voucher_set.to_dict('records'), "is_balanced": False
-            })
+def _voucher_cache_payload(voucher):
+    return {"date": voucher["date"], "voucherNo": voucher["voucherNo"], "entries": voucher["entries"]}
+
+
+def analyze_voucher_sets_with_ai(df, model=None, on_batch=None, cache=None, **batch_options):
+    """
+    대차 불일치 전표세트를 토큰 예산(prompt_packing.TOKEN_BUDGET) 안에서 최대 BATCH_SIZE개씩 묶어 AI로 분석한다.
+    배치는 ai_batch.run_batches로 동시에(호출 속도 제한·재시도 포함) 보내고, 결과는 배치 순서대로 모은다.
+    model: generate_content(prompt)를 가진 객체 (기본 gemini_model, 테스트용 스텁 주입 가능)
+    on_batch(done, total, results): 배치가 끝날 때마다 완료 배치 수, 전체 배치 수, 그 배치의 결과로 호출
+                                    (진행 상황 표시용. 캐시 적중분은 처음에 done=0으로 한 번 전달)
+    cache: 전표세트 단위 응답 캐시 (기본 ai_cache). 캐시에 있는 전표세트는 AI에 보내지 않는다.
+           키에 PROMPT_VERSION과 모델 이름이 들어가므로 프롬프트·모델이 바뀌면 다시 분석한다.
+    재시도 후에도 실패한 배치의 전표는 버리지 않고 'AI 분석 실패' 항목으로 결과에 남긴다.
+    """
+    model = model or gemini_model
+    cache = cache or ai_cache
+
+    # 대차 불일치 판정은 전표세트 ID 기준으로 한 번에 하고, 해당 전표세트만 묶어서 순회한다
+    unbalanced = flag_unbalanced_set(df)
+    suspicious_vouchers = [
+        {
+            "date": str(date), "voucherNo": str(voucher_no),
+            "entries": voucher_set.to_dict('records'), "is_balanced": False
+        }
+        for (date, voucher_no), voucher_set in df[unbalanced].groupby(['전표일자', '전표번호'], observed=True)
+    ]
 
     if not suspicious_vouchers:
         return []
 
-    BATCH_SIZE = 10
-    all_analysis_results = []
-    for i in range(0, len(suspicious_vouchers), BATCH_SIZE):
-        batch = suspicious_vouchers[i:i + BATCH_SIZE]
-        prompt = create_prompt_for_batch(batch)
-        try:
-            response = gemini_model.generate_content(prompt)
-            response_text = response.text
-
-            # 정규표현식을 사용하여 응답에서 JSON 배열 부분만 추출
-            match = re.search(r'\[[\s\S]*\]', response_text)
-            if not match:
-                print(f"AI raw response for debugging (ai_voucher_analyzer): {response_text}")
-                raise ValueError(f"AI 응답에서 유효한 JSON 배열을 찾을 수 없습니다.")
-
-            json_text = match.group(0)
-            
-            # NaN 값을 null로 치환 (이전 오류 방지)
-            json_compatible_text = json_text.replace('NaN', 'null')
-
-            batch_results = json.loads(json_compatible_text)
+    # 전표세트별 분석 결과 (캐시 적중분은 바로 채운다)
+    model_key = model_name(model) if model else ''
+    analyses = [cache.get('voucher', PROMPT_VERSION, _voucher_cache_payload(v), model_key) for v in suspicious_vouchers]
+    pending = [i for i, a in enumerate(analyses) if a is None]
+    if pending and not model:
+        raise ConnectionError("Gemini API가 정상적으로 설정되지 않았습니다.")
+
+    # 전표별 추정 토큰 수로 요청을 채운다. 모든 전표세트는 정확히 한 배치에 들어간다
+    costs = [payload_tokens(voucher_payload(suspicious_vouchers[j])) for j in pending]
+    batches = [[pending[k] for k in batch] for batch in pack_batches(costs, TOKEN_BUDGET, BATCH_SIZE)]
+
+    def call(batch):
+        prompt = create_prompt_for_batch([suspicious_vouchers[j] for j in batch])
+        response = observe_ai_call('voucher', lambda: model.generate_content(prompt))
+        return parse_batch_response(response.text)
+
+    def collect(batch, batch_results):
+        if isinstance(batch_results, BatchFailed):
+            for j in batch:
+                analyses[j] = {"isError": True, "errorType": "AI 분석 실패",
+                               "cause": f"AI 응답을 받지 못했습니다: {batch_results}",
+                               "solution": "잠시 후 다시 분석해주세요."}
+        else:
             for idx, analysis in enumerate(batch_results):
-                if analysis.get("isError"):
-                    # batch_results의 id는 1부터 시작하고, batch 리스트의 인덱스는 0부터 시작하므로 맞춰줍니다.
-                    original_voucher_index = analysis.get("id", idx + 1) - 1
-                    if 0 <= original_voucher_index < len(batch):
-                        original_voucher = batch[original_voucher_index]
-                        all_analysis_results.append({
-                            "date": original_voucher["date"], "voucherNo": original_voucher["voucherNo"],
-                            "analysis": analysis, "entries": original_voucher["entries"]
-                        })
-            time.sleep(1)
-        except Exception as e:
-            print(f"배치 {i//BATCH_SIZE + 1} 분석 중 오류: {e}")
-            continue
-    return all_analysis_results
+                # batch_results의 id는 1부터 시작하고, batch 리스트의 인덱스는 0부터 시작하므로 맞춰줍니다.
+                original_voucher_index = analysis.get("id", idx + 1) - 1
+                if 0 <= original_voucher_index < len(batch):
+                    j = batch[original_voucher_index]
+                    analyses[j] = analysis
+                    cache.put('voucher', PROMPT_VERSION, _voucher_cache_payload(suspicious_vouchers[j]), analysis,
+                              model_key)
+        return _error_results(suspicious_vouchers, analyses, batch)
+
+    on_done = None
+    if on_batch is not None:
+        finished = []
+        lock = threading.Lock()
+
+        def on_done(i, r):
+            results = collect(batches[i], r)
+            with lock:
+                finished.append(i)
+                on_batch(len(finished), len(batches), results)
+
+        on_batch(0, len(batches), _error_results(suspicious_vouchers, analyses,
+                                                 [i for i, a in enumerate(analyses) if a is not None]))
+
+    for batch, batch_results in zip(batches, run_batches(batches, call, on_done=on_done, **batch_options)):
+        if on_done is None:
+            collect(batch, batch_results)
+    return _error_results(suspicious_vouchers, analyses, range(len(suspicious_vouchers)))
+
+
+def _error_results(vouchers, analyses, positions):
+    """오류로 판정된 전표세트만 응답 형식으로."""
+    return [
+        {"date": vouchers[j]["date"], "voucherNo": vouchers[j]["voucherNo"],
+         "analysis": analyses[j], "entries": vouchers[j]["entries"]}
+        for j in positions if analyses[j] is not None and analyses[j].get("isError")
+    ]
 
 def create_prompt_for_batch(voucher_batch):
-    vouchers_to_analyze_json = json.dumps(
-        [{
-            "id": idx + 1, "date": v["date"], "voucherNo": v["voucherNo"],
-            "entries": v["entries"], "is_balanced": v["is_balanced"]
-        } for idx, v in enumerate(voucher_batch)],
-        ensure_ascii=False, indent=2
-    )
+    # 전표마다 빈 항목을 뺀 compact JSON (너무 큰 전표는 계정과목별 요약, backend/prompt_packing.py)
+    vouchers_to_analyze_json = batch_json([voucher_payload(v) for v in voucher_batch])
     return f"""
     당신은 회계감사 시스템에 내장된 최고 수준의 'AI 감사 로봇'입니다. 당신의 임무는 주어진 전표 목록에서 회계 원칙에 위배되거나, 내부통제상 허점이 될 수 있는 문제들을 시스템적으로 분석하고 명확한 보고서를 생성하는 것입니다.
     주어진 전표 목록의 각 전표를 개별적으로 심층 분석하고, 모든 전표에 대한 분석 결과를 하나의 JSON 배열(리스트)로 반환해주세요.
+    분개의 빈 항목은 생략되어 있습니다. entries 대신 summary가 있는 전표는 분개가 많아 계정과목별 합계(건수 포함)로 요약한 것이며, omittedAccounts는 요약에서 빠진 계정 수입니다.
 
     [분석 대상 전표 목록]
     {vouchers_to_analyze_json}
@@ -1,9 +1,36 @@
 import pandas as pd
 import numpy as np
-import re
-import holidays
+import sys
+import base64
+import os
+import threading
+from collections import OrderedDict
 
-KR_HOLIDAYS = holidays.KR()  # 대한민국 공휴일
+from backend.calendar_index import holiday_mask, calendar_version
+from backend.keyword_index import get_matcher, factorize_text, keyword_hits
+from backend.rule_plan import compile_plan, execute_plan, iter_leaves, leaf_key
+from backend.metrics import span, rule_span
+from backend.serialize import frame_records, AMOUNT_COLUMNS
+
+VOUCHER_KEY = ['전표일자', '전표번호']  # 전표세트 식별 키
+
+def voucher_ids(df):
+    """
+    행마다 (전표일자, 전표번호)를 0..n_sets-1 정수 전표세트 ID로 (등장 순서대로 factorize).
+    키에 결측이 있는 행은 -1. 요청 사이의 재사용은 데이터셋 메모(RuleContext.vid)가 맡는다.
+    """
+    d_codes, _ = pd.factorize(df[VOUCHER_KEY[0]])
+    n_codes, n_uniques = pd.factorize(df[VOUCHER_KEY[1]])
+    combined = d_codes.astype(np.int64) * (len(n_uniques) + 1) + n_codes
+    missing = (d_codes < 0) | (n_codes < 0)
+    vid = np.full(len(df), -1, dtype=np.int64)
+    vid[~missing] = pd.factorize(combined[~missing])[0]
+    return vid
+
+def _gather_sets(vid, set_mask, index):
+    """전표세트별 bool 배열 → 행별 bool Series (ID -1 행은 False)."""
+    valid = vid >= 0
+    return pd.Series(valid & set_mask[np.where(valid, vid, 0)], index=index)
 
 def _parse_dates(series):
     """YYYYMMDD ‧ 엑셀 직렬값 ‧ 문자열 등 어떤 형태든 datetime64로."""
@@ -33,65 +60,73 @@ def _parse_dates(series):
             )
         return dt
 
-    # 문자열
-    raw = s.astype(str).str.strip().str.replace(r'[./]', '-', regex=True)
+    # 문자열(category 포함): 고유값만 등장 순서대로 파싱해 행으로 펼친다
+    # (형식 추론이 첫 값 기준이므로 등장 순서를 지켜야 행 단위 파싱과 결과가 같다)
+    codes, uniques = pd.factorize(s)
+    raw = pd.Series(np.asarray(uniques, dtype=object)).astype(str).str.strip().str.replace(r'[./]', '-', regex=True)
     dt = pd.to_datetime(raw, errors='coerce')
     ymd_mask = dt.isna() & raw.str.fullmatch(r'\d{8}')
     if ymd_mask.any():
         dt.loc[ymd_mask] = pd.to_datetime(raw[ymd_mask], format='%Y%m%d', errors='coerce')
-    return dt
+    values = dt.to_numpy(dtype='datetime64[ns]')
+    return pd.Series(np.where(codes >= 0, values[np.maximum(codes, 0)], np.datetime64('NaT')),
+                     index=s.index, dtype='datetime64[ns]')
 
-def flag_weekend_txn(df, date_col='전표일자'):
+def flag_weekend_txn(df, date_col='전표일자', dates=None, calendars=()):
     """
     토·일 또는 한국 공휴일이면 True. 그 외는 False.
+    dates: 이미 파싱해 둔 날짜 (RuleContext.dates)
+    calendars: 함께 적용할 추가 휴무일 달력 이름 (calendar_index.register_calendar)
     """
-    dt = _parse_dates(df[date_col])
+    dt = _parse_dates(df[date_col]) if dates is None else dates
 
     is_weekend = dt.dt.weekday.isin([5, 6])          # 토(5), 일(6)
-    is_holiday = dt.apply(lambda d: d.date() in KR_HOLIDAYS if pd.notna(d) else False)
+    is_holiday = holiday_mask(dt, calendars)         # 연도 범위별로 캐시된 공휴일 배열 조회
     return is_weekend | is_holiday         # 둘 중 하나면 강조
 
 
 
+def compare(values, op, thr):
+    """values <op> thr. 알 수 없는 연산자는 전부 False."""
+    if   op == '>':  return values >  thr
+    elif op == '>=': return values >= thr
+    elif op == '==': return values == thr
+    elif op == '<=': return values <= thr
+    elif op == '<':  return values <  thr
+    else:            return pd.Series(False, index=values.index)
+
 def flag_amount_over(df, op, thr, is_debit=True):
     col = '차변금액' if is_debit else '대변금액'
+    return compare(df[col], op, thr)
 
-    if   op == '>':  return df[col] >  thr
-    elif op == '>=': return df[col] >= thr
-    elif op == '==': return df[col] == thr
-    elif op == '<=': return df[col] <= thr
-    elif op == '<':  return df[col] <  thr
-    else:            return pd.Series(False, index=df.index)
+KEYWORD_COLUMNS = ('계정과목', '적요')   # 앞 열의 일치를 먼저 보고한다
 
-def flag_keyword(df, keywords):
-    kw_list = [k.strip() for k in keywords.split(',') if k.strip()]
-    if not kw_list:
-        return pd.Series(False, index=df.index)
-
-    pattern = '|'.join(map(re.escape, kw_list))
-    # 계정과목 + 적요 열 모두 검색, 대소문자 무시
-    subject = df['계정과목'].astype(str)
-    desc    = df.get('적요', pd.Series('', index=df.index)).astype(str)
-
-    return subject.str.contains(pattern, case=False, na=False) | \
-           desc.str.contains(pattern, case=False, na=False)
+def keyword_matches(df, keywords, columns=None):
+    """
+    행마다 계정과목·적요에서 처음 일치한 키워드 번호 (get_matcher(keywords).keywords 기준, 없으면 -1).
+    대소문자 무시 부분 일치. columns: 미리 factorize_text한 열 [(codes, uniques), ...]
+    """
+    matcher = get_matcher(keywords)
+    columns = [factorize_text(df, c) for c in KEYWORD_COLUMNS] if columns is None else columns
+    return keyword_hits([(codes, matcher.match_values(uniques)) for codes, uniques in columns])
 
-def flag_party_freq(df, op, thr):
-    """전표세트 기준 거래 횟수 조건."""
-    if '거래처코드' not in df.columns:
-        return pd.Series(False, index=df.index)
+def flag_keyword(df, keywords):
+    """쉼표로 구분한 키워드 중 하나라도 계정과목 또는 적요에 들어 있으면 True."""
+    return pd.Series(keyword_matches(df, keywords) >= 0, index=df.index)
 
+def party_frequency(df):
+    """행마다 해당 거래처코드가 등장하는 전표세트 수."""
     tmp = df[['거래처코드', '전표일자', '전표번호']].dropna(subset=['거래처코드'])
     sets = tmp.drop_duplicates()
-    counts = sets.groupby('거래처코드').size()
-    freq = df['거래처코드'].map(counts).fillna(0)
+    counts = sets.groupby('거래처코드', observed=True).size()
+    return df['거래처코드'].map(counts).astype('float64').fillna(0)
 
-    if   op == '>':  return freq >  thr
-    elif op == '>=': return freq >= thr
-    elif op == '==': return freq == thr
-    elif op == '<=': return freq <= thr
-    elif op == '<':  return freq <  thr
-    else:            return pd.Series(False, index=df.index)
+def flag_party_freq(df, op, thr, freq=None):
+    """전표세트 기준 거래 횟수 조건. freq: 미리 계산한 party_frequency(df)."""
+    if '거래처코드' not in df.columns:
+        return pd.Series(False, index=df.index)
+    freq = party_frequency(df) if freq is None else freq
+    return compare(freq, op, thr)
 
 def flag_round_million(df):
     """차/대변 금액이 1,000,000원 단위일 때."""
@@ -101,193 +136,694 @@ def flag_round_million(df):
     m_credit = (credit != 0) & (credit % 1_000_000 == 0)
     return m_debit | m_credit
 
-def flag_uniform_account(df):
+def uniform_account_sets(df, vid):
+    """전표세트 ID별: 계정과목이 한 종류뿐이면 True."""
+    valid = vid >= 0
+    nunique = df['계정과목'][valid].groupby(vid[valid]).nunique()
+    return (nunique == 1).to_numpy()
+
+def voucher_sums(df, vid):
+    """전표세트 ID별 차/대변 합계 (index = 전표세트 ID)."""
+    valid = vid >= 0
+    return df[['차변금액', '대변금액']][valid].groupby(vid[valid]).sum()
+
+def flag_uniform_account(df, vid=None):
     """전표세트 내 계정과목이 모두 동일한 경우."""
     if not {'전표일자', '전표번호', '계정과목'}.issubset(df.columns):
         return pd.Series(False, index=df.index)
-    grouped = df.groupby(['전표일자', '전표번호'])['계정과목'].nunique()
-    target_sets = set(grouped[grouped == 1].index)
-    idx = list(zip(df['전표일자'], df['전표번호']))
-    return pd.Series([(k in target_sets) for k in idx], index=df.index)
+    vid = voucher_ids(df) if vid is None else vid
+    if not (vid >= 0).any():
+        return pd.Series(False, index=df.index)
+    return _gather_sets(vid, uniform_account_sets(df, vid), df.index)
 
-def flag_unbalanced_set(df):
-    """전표세트 차변 합과 대변 합이 일치하지 않음."""
+def flag_unbalanced_set(df, vid=None, sums=None):
+    """전표세트 차변 합과 대변 합이 일치하지 않음. sums: 미리 계산한 voucher_sums(df, vid)."""
     if not {'전표일자', '전표번호', '차변금액', '대변금액'}.issubset(df.columns):
         return pd.Series(False, index=df.index)
-    sums = df.groupby(['전표일자', '전표번호'])[['차변금액', '대변금액']].sum()
-    bad_sets = set(sums.index[sums['차변금액'] != sums['대변금액']])
-    idx = list(zip(df['전표일자'], df['전표번호']))
-    return pd.Series([(k in bad_sets) for k in idx], index=df.index)
+    vid = voucher_ids(df) if vid is None else vid
+    if not (vid >= 0).any():
+        return pd.Series(False, index=df.index)
+    sums = voucher_sums(df, vid) if sums is None else sums
+    return _gather_sets(vid, (sums['차변금액'] != sums['대변금액']).to_numpy(), df.index)
+
+# ───────────────── 통계 기반 이상 분개 ──────────────────
+# 아래 규칙은 계정·거래처 단위로 데이터셋 전체를 보고 판정한다 (일부 행만 보면 결과가 달라진다).
+# 행마다 도는 대신 고유값 번호(factorize)와 bincount·정렬·이진 탐색으로 한 번에 계산한다.
+
+BENFORD_P = np.log10(1 + 1 / np.arange(1, 10))   # 첫자리 1~9의 기대 비율
+
+def account_column(df):
+    """계정 단위 통계에 쓸 열: 계정과목, 없으면 계정코드."""
+    return '계정과목' if '계정과목' in df.columns or '계정코드' not in df.columns else '계정코드'
+
+def row_amounts(df):
+    """행별 금액: 차변금액이 0이 아니면 차변, 아니면 대변 (절댓값). 결측은 NaN."""
+    debit = np.abs(df['차변금액'].to_numpy(dtype=np.float64))
+    credit = np.abs(df['대변금액'].to_numpy(dtype=np.float64))
+    return np.where(debit != 0, debit, credit)
+
+def first_digits(amounts):
+    """금액의 첫자리 숫자(1~9). 10 미만·결측은 0 (벤포드 검정에서 뺀다)."""
+    a = np.asarray(amounts, dtype=np.float64)
+    valid = np.isfinite(a) & (a >= 10)
+    a = np.where(valid, a, 10.0)
+    scale = 10.0 ** np.floor(np.log10(a))
+    d = np.floor(a / scale).astype(np.int64)
+    # log10의 반올림 오차로 자릿수를 하나 잘못 잡은 경우 (예: 1000 → 10, 999.99… → 0)
+    d = np.where(d >= 10, d // 10, d)
+    d = np.where(d < 1, np.floor(a * 10 / scale).astype(np.int64), d)
+    return np.where(valid, d, 0)
+
+def flag_benford(df, z=1.96, min_count=100, mad=0.015, account_codes=None):
+    """
+    계정별 금액 첫자리 분포가 벤포드 법칙에서 벗어났을 때, 그 계정에서 기대보다 유의하게 많이 나온 첫자리의 행.
+      - 10원 이상 금액이 min_count건 이상이고 첫자리 비율의 평균절대편차(MAD)가 mad를 넘는 계정만 본다
+        (0.015: Nigrini의 첫자리 검정 '부적합' 기준)
+      - 그 계정에서 관측 비율이 기대보다 크고 z 통계량(연속성 보정)이 z를 넘는 첫자리의 행을 표시한다
+    account_codes: 미리 factorize_text한 계정 열 (RuleContext.text_codes)
+    """
+    if not {'차변금액', '대변금액'} <= set(df.columns):
+        return pd.Series(False, index=df.index)
+    codes, uniques = factorize_text(df, account_column(df)) if account_codes is None else account_codes
+    d = first_digits(row_amounts(df))
+    valid = d > 0
+    cell = codes.astype(np.int64) * 9 + np.maximum(d - 1, 0)
+    counts = np.bincount(cell[valid], minlength=len(uniques) * 9).reshape(len(uniques), 9)
+    n = counts.sum(axis=1)[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = counts / n
+        dev = np.abs(p - BENFORD_P)
+        stat = (dev - 1 / (2 * n)) / np.sqrt(BENFORD_P * (1 - BENFORD_P) / n)
+        nonconforming = (n[:, 0] >= max(min_count, 1)) & (dev.mean(axis=1) > mad)
+        hot = nonconforming[:, None] & (p > BENFORD_P) & (stat > z)
+    return pd.Series(valid & hot.ravel()[cell], index=df.index)
+
+def _combine_codes(a, b, n_b):
+    """두 번호 배열의 쌍 → 0부터 다시 매긴 번호 (int64 곱이 넘치지 않도록 두 열씩 묶는다)."""
+    return pd.factorize(a.astype(np.int64) * n_b + b)[0]
+
+def flag_duplicate_entry(df, days=0, vid=None, dates=None, party_codes=None):
+    """
+    같은 거래처코드·같은 차/대변 금액의 분개가 다른 전표세트에 days일 이내로 또 있으면 True
+    (days=0: 같은 날의 완전 중복, days>0: 날짜만 가까운 중복 입력 의심).
+    거래처코드가 비었거나 금액이 0, 날짜가 없는 행은 보지 않는다.
+    (키, 일자)를 정렬한 배열에서 각 행의 ±days 구간에 든 행 수를 이진 탐색으로 세고,
+    같은 전표세트의 같은 키 행 수(전표세트는 날짜가 하나라 모두 구간 안)를 빼서 다른 전표세트의 짝을 찾는다.
+    vid: 전표세트 ID (voucher_ids), dates: 파싱된 날짜, party_codes: 미리 factorize_text한 거래처코드
+    """
+    if not {'거래처코드', '전표일자', '차변금액', '대변금액'} <= set(df.columns):
+        return pd.Series(False, index=df.index)
+    n = len(df)
+    days = max(int(days), 0)
+    codes, uniques = factorize_text(df, '거래처코드') if party_codes is None else party_codes
+    dates = _parse_dates(df['전표일자']) if dates is None else dates
+    vid = (voucher_ids(df) if set(VOUCHER_KEY) <= set(df.columns) else np.full(n, -1)) if vid is None else vid
+    debit = df['차변금액'].to_numpy(dtype=np.float64)
+    credit = df['대변금액'].to_numpy(dtype=np.float64)
+    day = dates.to_numpy(dtype='datetime64[ns]')
+    blank = np.array([u.strip() in ('', 'nan') for u in uniques], dtype=bool)
+
+    pos = np.flatnonzero(~blank[codes] & ~np.isnat(day) & np.isfinite(debit) & np.isfinite(credit)
+                         & ((debit != 0) | (credit != 0)))
+    mask = np.zeros(n, dtype=bool)
+    if len(pos) < 2:
+        return pd.Series(mask, index=df.index)
+
+    d_codes, d_uniques = pd.factorize(debit[pos])
+    c_codes, c_uniques = pd.factorize(credit[pos])
+    key = _combine_codes(_combine_codes(codes[pos], d_codes, len(d_uniques)), c_codes, len(c_uniques))
+    day = day[pos].astype('datetime64[D]').astype(np.int64)
+    day -= day.min()
+    day_span = int(day.max()) + 2 * days + 1          # 키마다 겹치지 않는 일자 구간
+    comp = key.astype(np.int64) * day_span + day
+    ordered = np.sort(comp)
+    in_window = np.searchsorted(ordered, comp + days, 'right') - np.searchsorted(ordered, comp - days, 'left')
+
+    # 키가 없는 행(vid -1)은 각자 다른 전표세트로 본다
+    sets = np.where(vid[pos] >= 0, vid[pos], -1 - np.arange(len(pos)))
+    s_codes, s_uniques = pd.factorize(sets)
+    same_set = _combine_codes(key, s_codes, len(s_uniques))
+    mask[pos] = in_window > np.bincount(same_set)[same_set]
+    return pd.Series(mask, index=df.index)
+
+def _group_quantile(sorted_values, starts, counts, q):
+    """그룹별로 정렬해 이어 붙인 값의 q 분위수 (선형 보간, np.quantile 기본값과 같다). 빈 그룹은 NaN."""
+    h = np.maximum(counts - 1, 0) * q
+    lo = np.floor(h).astype(np.int64)
+    hi = np.minimum(lo + 1, np.maximum(counts - 1, 0))
+    last = max(len(sorted_values) - 1, 0)
+    v_lo = sorted_values[np.minimum(starts + lo, last)] if len(sorted_values) else np.zeros(len(counts))
+    v_hi = sorted_values[np.minimum(starts + hi, last)] if len(sorted_values) else np.zeros(len(counts))
+    return np.where(counts > 0, v_lo + (h - lo) * (v_hi - v_lo), np.nan)
+
+def flag_amount_outlier(df, method='iqr', k=3.0, min_count=20, account_codes=None):
+    """
+    계정별 금액 분포에서 벗어난 분개 (금액 = 차변, 0이면 대변의 절댓값. 0원은 보지 않는다).
+      - iqr   : Q1 - k·IQR 미만 또는 Q3 + k·IQR 초과 (k=1.5 이상치, 3 극단값)
+      - zscore: |금액 - 계정 평균| / 계정 표준편차(표본) > k
+    금액이 min_count건 미만인 계정은 보지 않는다. 알 수 없는 method는 전부 False.
+    account_codes: 미리 factorize_text한 계정 열 (RuleContext.text_codes)
+    """
+    if method not in ('iqr', 'zscore') or not {'차변금액', '대변금액'} <= set(df.columns):
+        return pd.Series(False, index=df.index)
+    codes, uniques = factorize_text(df, account_column(df)) if account_codes is None else account_codes
+    amounts = row_amounts(df)
+    pos = np.flatnonzero(np.isfinite(amounts) & (amounts != 0))
+    g, x = codes[pos], amounts[pos]
+    counts = np.bincount(g, minlength=len(uniques))
+
+    if method == 'zscore':
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.bincount(g, weights=x, minlength=len(uniques)) / counts
+            var = np.bincount(g, weights=(x - mean[g]) ** 2, minlength=len(uniques)) / (counts - 1)
+            out = np.abs(x - mean[g]) > k * np.sqrt(var[g])
+    else:
+        order = np.lexsort((x, g))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        q1 = _group_quantile(x[order], starts, counts, 0.25)
+        q3 = _group_quantile(x[order], starts, counts, 0.75)
+        iqr = q3 - q1
+        out = (x < q1[g] - k * iqr[g]) | (x > q3[g] + k * iqr[g])
+
+    mask = np.zeros(len(df), dtype=bool)
+    mask[pos] = out & (counts[g] >= max(min_count, 2))
+    return pd.Series(mask, index=df.index)
+
+# 데이터셋 전체를 봐야 판정할 수 있는 규칙 (분할·chunk 평가에서는 전체 기준 결과를 잘라 쓴다)
+DATASET_RULES = {'benford', 'duplicate_entry', 'amount_outlier'}
+
+# 평면(체크박스) 모드에서의 규칙 번호 = 이 목록의 순서 + 1 (새 규칙은 뒤에 붙여 기존 번호를 유지한다)
+RULE_ORDER = [
+    'weekend_txn', 'amount_over', 'keyword_search', 'party_freq',
+    'round_million', 'uniform_account', 'unbalanced_set',
+    'benford', 'duplicate_entry', 'amount_outlier',
+]
+
+
+# 데이터셋별 분석 메모(dict)는 dataset_cache가 dataset_id마다 들고 있다 (dataset_cache.memo).
+# 요청이 바뀌어도 남아서, 임계값 하나만 바꾼 재분석은 바뀐 조건만 다시 계산하고,
+# 데이터셋이 캐시에서 제거되면 함께 사라진다. 캐시된 DataFrame은 읽기 전용으로 다룬다.
+_MEMO_LOCK = threading.Lock()
+LEAF_MEMO_MAX = int(os.environ.get('LEAF_MEMO_MAX', 32))     # 데이터셋별로 보관하는 조건 mask 수
+KEYWORD_MEMO_MAX = 16                                        # 데이터셋별로 보관하는 키워드 목록별 고유값 매칭 결과 수
+
+def prepare_memo(memo=None):
+    """
+    분석에 쓸 메모. None이면 이번 호출에서만 쓰는 빈 메모를 만든다.
+    추가 휴무일 달력이 바뀌었으면 보관된 조건 mask는 비운다.
+    """
+    memo = {} if memo is None else memo
+    with _MEMO_LOCK:
+        if memo.get('calendar_version') != calendar_version():
+            memo['leaf'] = OrderedDict()
+            memo['calendar_version'] = calendar_version()
+    return memo
+
+def _nbytes(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (pd.Series, pd.DataFrame, pd.Index)):
+        return int(np.sum(obj.memory_usage(index=True) if not isinstance(obj, pd.Index) else obj.memory_usage()))
+    if isinstance(obj, str):
+        return sys.getsizeof(obj)
+    if isinstance(obj, (list, tuple)):
+        return sum(_nbytes(v) for v in obj)
+    if isinstance(obj, SortedIndex):
+        return obj.order.nbytes + obj.sorted.nbytes
+    return 0
+
+def memo_nbytes(memo):
+    """데이터셋 메모가 차지하는 대략적인 메모리 (dataset_cache 예산에 넣는다)."""
+    with _MEMO_LOCK:
+        values = [list(v.values()) if isinstance(v, dict) else v for v in list(memo.values())]
+    return _nbytes(values)
+
+
+class SortedIndex:
+    """
+    숫자 열의 정렬 순서. 임계값 조건에 일치하는 행 수를 이진 탐색으로 바로 구하고,
+    일치 행이 적으면(MAX_FRACTION 이하) 전체 비교 없이 그 위치만으로 mask를 만든다.
+    """
+    MAX_FRACTION = 1 / 8
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        order = np.argsort(values, kind='stable')
+        n_valid = int((~np.isnan(values)).sum())      # NaN은 정렬 끝에 모이고 어떤 비교에도 일치하지 않는다
+        self.order = order[:n_valid]
+        self.sorted = values[self.order]
+        self.n_rows = len(values)
+
+    def bounds(self, op, thr):
+        """정렬된 값에서 일치 구간 [lo, hi). 알 수 없는 연산자는 None."""
+        left = lambda: int(np.searchsorted(self.sorted, thr, 'left'))
+        right = lambda: int(np.searchsorted(self.sorted, thr, 'right'))
+        n = len(self.sorted)
+        if   op == '>':  return right(), n
+        elif op == '>=': return left(), n
+        elif op == '==': return left(), right()
+        elif op == '<=': return 0, right()
+        elif op == '<':  return 0, left()
+        return None
+
+    def mask(self, op, thr):
+        """일치 행이 적으면 bool 배열, 아니면 None (호출한 쪽에서 직접 비교하는 편이 빠르다)."""
+        b = self.bounds(op, thr)
+        if b is None or b[1] - b[0] > self.n_rows * self.MAX_FRACTION:
+            return None
+        m = np.zeros(self.n_rows, dtype=bool)
+        m[self.order[b[0]:b[1]]] = True
+        return m
+
+
+class RuleContext:
+    """
+    한 번의 분석 요청에서 여러 조건이 함께 쓰는 중간 결과(파싱된 날짜, 전표세트 ID,
+    전표세트별 합계, 거래처 빈도 등). 처음 필요할 때 한 번만 계산한다.
+    subset(pos)로 만든 하위 컨텍스트는 일부 행만 보되, 전표세트 단위 결과는 전체 기준 값을 잘라 쓴다.
+    """
 
-def analyze_journal(
+    def __init__(self, df, vid=None, party_freq=None, memo=None, leaf_masks=None):
+        self.df = df
+        self._memo = {} if memo is None else memo     # 데이터셋 메모(dataset_cache.memo)를 넘기면 요청 사이에 재사용
+        if vid is not None:
+            self._memo['vid'] = vid
+        if party_freq is not None:     # 거래처 빈도는 전표세트를 넘나드는 집계라 분할 평가 시 밖에서 넣어 준다
+            self._memo['party_freq'] = party_freq
+        if leaf_masks:                 # DATASET_RULES 조건도 마찬가지로 전체 기준 mask를 잘라 넣어 준다 (leaf_key → mask)
+            self._memo['leaf'] = OrderedDict(leaf_masks)
+        self._parent = None
+        self._pos = None
+
+    def _get(self, key, compute):
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def subset(self, pos):
+        sub = RuleContext(self.df.iloc[pos])
+        sub._parent, sub._pos = self, pos
+        return sub
+
+    @property
+    def vid(self):
+        if self._parent is not None:
+            return self._get('vid', lambda: self._parent.vid[self._pos])
+        return self._get('vid', lambda: voucher_ids(self.df))
+
+    @property
+    def dates(self):
+        parent = self._parent
+        if parent is not None and 'dates' in parent._memo:
+            return self._get('dates', lambda: parent.dates.iloc[self._pos])
+        return self._get('dates', lambda: _parse_dates(self.df['전표일자']))
+
+    @property
+    def stored_dates(self):
+        """데이터셋 메모에 이미 파싱해 둔 전표일자 (없으면 None, 파싱하지 않는다)."""
+        return self._memo.get('dates')
+
+    @property
+    def party_freq(self):
+        if self._parent is not None:
+            return self._get('party_freq', lambda: self._parent.party_freq.iloc[self._pos])
+        return self._get('party_freq', lambda: party_frequency(self.df))
+
+    @property
+    def voucher_sums(self):
+        if self._parent is not None:
+            return self._parent.voucher_sums
+        return self._get('voucher_sums', lambda: voucher_sums(self.df, self.vid))
+
+    @property
+    def uniform_account_sets(self):
+        if self._parent is not None:
+            return self._parent.uniform_account_sets
+        return self._get('uniform_account_sets', lambda: uniform_account_sets(self.df, self.vid))
+
+    def _lru(self, name, key, compute, limit):
+        """메모 안의 LRU 저장소 name에서 key를 찾고, 없으면 계산해 최근 limit개까지 보관한다."""
+        with _MEMO_LOCK:
+            store = self._memo.setdefault(name, OrderedDict())
+            value = store.get(key)
+            if value is not None:
+                store.move_to_end(key)
+                return value
+        value = compute()
+        with _MEMO_LOCK:
+            store[key] = value
+            while len(store) > limit:
+                store.popitem(last=False)
+        return value
+
+    def leaf_mask(self, key, compute):
+        """조건 key의 전체 행 mask. 데이터셋 메모에 최근 LEAF_MEMO_MAX개를 보관해 다음 요청에서도 재사용한다."""
+        def frozen():
+            m = np.asarray(compute(), dtype=bool)
+            m.flags.writeable = False
+            return m
+        return self._lru('leaf', key, frozen, LEAF_MEMO_MAX)
+
+    def stored_leaf(self, key):
+        """데이터셋 메모에 이미 있는 조건 key의 mask (없으면 None, 계산하지 않는다)."""
+        with _MEMO_LOCK:
+            return self._memo.get('leaf', {}).get(key)
+
+    def dataset_rule(self, node, compute):
+        """
+        DATASET_RULES 조건의 mask. compute(전체 행 컨텍스트)로 전체 기준으로 계산해 leaf 메모에 두고,
+        하위 컨텍스트는 그 결과를 잘라 쓴다.
+        """
+        if self._parent is not None:
+            return self._parent.dataset_rule(node, compute)[self._pos]
+        return self.leaf_mask(leaf_key(node), lambda: compute(self))
+
+    def text_codes(self, col):
+        """factorize_text(df, col). 하위 컨텍스트는 전체 기준 결과를 잘라 쓴다."""
+        if self._parent is not None:
+            codes, uniques = self._parent.text_codes(col)
+            return self._get(('codes', col), lambda: (codes[self._pos], uniques))
+        return self._get(('codes', col), lambda: factorize_text(self.df, col))
+
+    def keyword_hits(self, keywords):
+        """keyword_matches(df, keywords). 고유값별 매칭 결과는 전체 컨텍스트의 메모에 보관한다."""
+        root = self._parent if self._parent is not None else self
+        matcher = get_matcher(keywords)
+        columns = []
+        for col in KEYWORD_COLUMNS:
+            codes, uniques = self.text_codes(col)
+            per_unique = root._lru('keywords', (keywords, col), lambda: matcher.match_values(uniques),
+                                   KEYWORD_MEMO_MAX)
+            columns.append((codes, per_unique))
+        return keyword_hits(columns)
+
+    def threshold(self, name, values, op, thr):
+        """
+        values <op> thr (bool Series). 전체 행 컨텍스트에서 같은 열을 두 번째로 조회할 때부터
+        SortedIndex를 만들어 두고, 일치 행이 적은 임계값은 이진 탐색으로 답한다.
+        """
+        if self._parent is None:
+            uses = self._memo.setdefault('threshold_uses', {})
+            uses[name] = uses.get(name, 0) + 1
+            if uses[name] > 1:
+                m = self._get(('sorted', name), lambda: SortedIndex(values)).mask(op, thr)
+                if m is not None:
+                    return pd.Series(m, index=values.index)
+        return compare(values, op, thr)
+
+
+def eval_rule(df, node, ctx=None) -> pd.Series:
+    """
+    조건 노드 하나({'rule': ..., 파라미터}) → bool mask.
+    ctx: 공유 중간 결과(RuleContext). 없으면 이 조건만을 위해 새로 계산한다.
+    """
+    ctx = RuleContext(df) if ctx is None else ctx
+    cols = set(df.columns)
+    rule = node.get('rule')
+    if rule == 'weekend_txn':
+        return flag_weekend_txn(df, dates=ctx.dates, calendars=tuple(node.get('calendars', ())))
+    if rule == 'amount_over':
+        op = node.get('op', '>')
+        thr = float(node.get('value', 0))
+        col = '대변금액' if node.get('target', 'debit') == 'credit' else '차변금액'
+        return ctx.threshold(col, df[col], op, thr)
+    if rule == 'keyword_search':
+        m = pd.Series(ctx.keyword_hits(str(node.get('value', ''))) >= 0, index=df.index)
+        return ~m if node.get('mode', 'include') == 'exclude' else m
+    if rule == 'party_freq':
+        if '거래처코드' not in cols:
+            return pd.Series(False, index=df.index)
+        op = node.get('op', '>=')
+        thr = float(node.get('value', 0))
+        return ctx.threshold('party_freq', ctx.party_freq, op, thr)
+    if rule == 'round_million':
+        return flag_round_million(df)
+    if rule == 'uniform_account':
+        if not {'전표일자', '전표번호', '계정과목'} <= cols or not (ctx.vid >= 0).any():
+            return pd.Series(False, index=df.index)
+        return _gather_sets(ctx.vid, ctx.uniform_account_sets, df.index)
+    if rule == 'unbalanced_set':
+        if not {'전표일자', '전표번호', '차변금액', '대변금액'} <= cols or not (ctx.vid >= 0).any():
+            return pd.Series(False, index=df.index)
+        return flag_unbalanced_set(df, ctx.vid, sums=ctx.voucher_sums)
+    if rule in DATASET_RULES:
+        return pd.Series(ctx.dataset_rule(node, lambda root: _eval_dataset_rule(node, root)), index=df.index)
+    return pd.Series(False, index=df.index)
+
+
+def _eval_dataset_rule(node, ctx):
+    """DATASET_RULES 조건 → 전체 행(ctx.df) 기준 bool Series."""
+    df = ctx.df
+    rule = node.get('rule')
+    if rule == 'benford':
+        return flag_benford(df, z=float(node.get('value', 1.96)), min_count=int(node.get('min_count', 100)),
+                            mad=float(node.get('mad', 0.015)), account_codes=ctx.text_codes(account_column(df)))
+    if rule == 'amount_outlier':
+        return flag_amount_outlier(df, method=node.get('method', 'iqr'), k=float(node.get('value', 3)),
+                                   min_count=int(node.get('min_count', 20)),
+                                   account_codes=ctx.text_codes(account_column(df)))
+    if not {'거래처코드', '전표일자', '차변금액', '대변금액'} <= set(df.columns):
+        return pd.Series(False, index=df.index)
+    return flag_duplicate_entry(df, days=int(node.get('value', 0)),
+                                vid=ctx.vid if set(VOUCHER_KEY) <= set(df.columns) else None,
+                                dates=ctx.dates, party_codes=ctx.text_codes('거래처코드'))
+
+
+def build_rule_tree(active_rules, rule_values, logic_op='AND', logic_tree=None):
+    """
+    평면 모드/트리 모드 입력을 하나의 트리로 정규화한다.
+    각 조건 노드에는 rule_map에 기록할 규칙 번호 '_no'가 붙는다.
+      - 평면 모드: RULE_ORDER 상의 고정 번호 (비활성 규칙도 번호를 차지)
+      - 트리 모드: 깊이 우선 순서대로 1부터
+    """
+    if logic_tree and logic_tree.get('items'):
+        counter = iter(range(1, 1 << 30))
+
+        def number(node):
+            if not node:
+                return node
+            node = dict(node)
+            if node.get('type') == 'cond':
+                node['_no'] = next(counter)
+            else:
+                node['items'] = [number(it) for it in node.get('items', [])]
+            return node
+        return number(logic_tree)
+
+    items = []
+    for no, rule in enumerate(RULE_ORDER, 1):
+        if rule not in active_rules:
+            continue
+        cond = rule_values.get(rule, {})
+        params = dict(cond) if isinstance(cond, dict) else {'value': cond}
+        items.append({**params, 'type': 'cond', 'rule': rule, '_no': no})
+    return {'type': 'group', 'op': logic_op, 'items': items}
+
+
+def evaluate_plan(plan, ctx, short_circuit=False, on_rule=None):
+    """
+    ctx.df 전체에 대해 계획을 실행한다.
+    반환: (최종 bool 배열, {규칙 번호: 그 조건에 일치한 행의 bool 배열})
+    on_rule(done, total): 조건 하나를 평가할 때마다 호출 (진행 상황 표시용)
+    """
+    hits = {}
+    total = sum(1 for _ in iter_leaves(plan))
+
+    def leaf_mask(node, pos):
+        with rule_span(node.get('rule')):     # 메모에 있던 조건은 조회 시간만 남는다
+            if pos is None:
+                return ctx.leaf_mask(leaf_key(node), lambda: eval_rule(ctx.df, node, ctx).to_numpy(dtype=bool))
+            sub = ctx.subset(pos)
+            return eval_rule(sub.df, node, sub).to_numpy(dtype=bool)
+
+    def record(node, m):
+        hits[node['_no']] = m
+        if on_rule is not None:
+            on_rule(len(hits), total)
+
+    final_mask = execute_plan(plan, len(ctx.df), leaf_mask, record, short_circuit)
+    return final_mask, hits
+
+
+def rule_bits(hits, n_rows, max_rule_no=0):
+    """
+    {규칙 번호: bool 배열} → (n_rows, n_words) uint64 비트셋. 규칙 번호 k는 word k//64의 bit k%64.
+    """
+    n_words = max(max(hits, default=0), max_rule_no) // 64 + 1
+    bits = np.zeros((n_rows, n_words), dtype=np.uint64)
+    for no, m in hits.items():
+        bits[m, no // 64] |= np.uint64(1) << np.uint64(no % 64)
+    return bits
+
+
+def encode_rule_map(bits):
+    """
+    규칙 비트셋 → JSON용 압축 표현 (base64, little-endian).
+      width : 행당 비트셋 한 칸의 크기(8/16/32). 가장 큰 규칙 번호가 들어가는 최소 크기를 고른다
+      words : 행당 칸 수 (width=32일 때만 1보다 클 수 있다)
+      rows  : 일치한 행의 위치(int32). 일치한 행이 전체의 1/4을 넘으면 null이고 bits에 모든 행이 들어간다
+      bits  : rows 순서대로 각 행의 비트셋
+    프런트엔드(main.js decodeRuleMap)와 decode_rule_map이 이 형식을 읽는다.
+    """
+    words32 = bits.astype('<u8').view('<u4')          # uint64 한 칸 = uint32 (하위, 상위)
+    used = np.flatnonzero(words32.any(axis=0))
+    n_bits = int(used.max()) * 32 + int(words32[:, used.max()].max()).bit_length() if len(used) else 1
+    width = 8 if n_bits <= 8 else 16 if n_bits <= 16 else 32
+    n_words = (n_bits + 31) // 32 if width == 32 else 1
+    packed = words32[:, :n_words].astype(f'<u{width // 8}')
+
+    rows = np.flatnonzero(words32.any(axis=1))
+    dense = len(rows) * 4 > len(bits)
+    return {
+        "encoding": "bitset",
+        "width": width,
+        "words": n_words,
+        "rows": None if dense else base64.b64encode(rows.astype('<i4').tobytes()).decode('ascii'),
+        "bits": base64.b64encode(np.ascontiguousarray(packed if dense else packed[rows]).tobytes()).decode('ascii'),
+    }
+
+
+def decode_rule_map(payload):
+    """encode_rule_map의 역변환 → {행 위치: [규칙 번호, ...]} (일치한 행만)."""
+    width, n_words = payload['width'], payload['words']
+    bits = np.frombuffer(base64.b64decode(payload['bits']), dtype=f'<u{width // 8}').reshape(-1, n_words)
+    if payload['rows'] is None:
+        rows = np.arange(len(bits))
+    else:
+        rows = np.frombuffer(base64.b64decode(payload['rows']), dtype='<i4')
+    result = {}
+    for r, words in zip(rows.tolist(), bits.tolist()):
+        nos = [w * width + b for w, word in enumerate(words) for b in range(width) if word >> b & 1]
+        if nos:
+            result[r] = nos
+    return result
+
+
+def to_numeric_amounts(df):
+    """차/대변 금액 열을 숫자로 (빈 값은 0). 원본은 건드리지 않고 얕은 복사본을 돌려준다."""
+    df = df.copy(deep=False)
+    df['차변금액'] = pd.to_numeric(df.get('차변금액', 0), errors='coerce').fillna(0)
+    df['대변금액'] = pd.to_numeric(df.get('대변금액', 0), errors='coerce').fillna(0)
+    return df
+
+
+def format_rows(df):
+    """화면 표시용 레코드. 금액 열만 천 단위 구분 문자열로 바꾸고, 다른 열의 결측은 None으로 둔다."""
+    return frame_records(df, AMOUNT_COLUMNS)
+
+
+def run_rules(
     df,
     active_rules,
     rule_values,
     logic_op: str = 'AND',
     logic_tree: dict | None = None,
+    short_circuit: bool = False,
+    workers: int | None = None,
+    on_rule=None,
+    memo: dict | None = None,
 ):
+    """
+    analyze_journal의 계산 부분. 화면용 레코드를 만들지 않는다.
+    반환: (금액 열을 숫자로 바꾼 df, 최종 bool 배열, 규칙 비트셋 rule_bits)
+
+    규칙 트리를 실행 계획으로 컴파일해 평가한다 (backend/rule_plan.py).
+    같은 조건은 한 번만 계산하고, 날짜 파싱·전표세트 ID·집계는 RuleContext로 공유한다.
+    memo(데이터셋별 메모, dataset_cache.memo)를 주면 조건 mask와 중간 결과가 거기에 남아, 파라미터 하나만
+    바꾼 재분석은 바뀐 조건만 다시 계산하고 나머지는 결합만 다시 한다. 없으면 이번 호출에서만 쓴다.
+    short_circuit=True면 AND/OR에서 이미 결론 난 행은 다음 조건을 평가하지 않는다
+    (이 경우 rule_map에는 평가된 행의 일치만 남는다).
+    workers가 2 이상이고 행 수가 충분하면 전표세트 단위로 나눠 여러 프로세스에서 평가한다
+    (기본값: 환경 변수 ANALYZE_WORKERS, backend/parallel.py).
+    on_rule(done, total)은 조건을 하나 평가할 때마다 호출된다 (병렬 평가에서는 끝날 때 한 번).
+    """
 
     # ───────────────── 1. 숫자 열 변환 ──────────────────
-    df['차변금액'] = pd.to_numeric(df.get('차변금액', 0), errors='coerce').fillna(0)
-    df['대변금액'] = pd.to_numeric(df.get('대변금액', 0), errors='coerce').fillna(0)
-
-    # ───────────────── 2. 규칙별 mask 계산 ──────────────────
-    masks = []  # 모든 mask 리스트 (순서 유지)
-    rule_map = {i: [] for i in df.index}  # index → [규칙 번호]
-    rule_no = 1  # 1부터 부여
-    rule_masks: dict[str, pd.Series] = {}
-
-    if not (logic_tree and logic_tree.get('items')):
-        # 주말·공휴일
-        if 'weekend_txn' in active_rules:
-            m = flag_weekend_txn(df)
-            rule_masks['weekend_txn'] = m
-            masks.append(m)
-            for idx in m[m].index:
-                rule_map[idx].append(rule_no)
-        rule_no += 1
-
-        # 금액 조건
-        if 'amount_over' in active_rules:
-            cond = rule_values.get('amount_over', {})
-            op = cond.get('op', '>')
-            thr = float(cond.get('value', 0))
-            target = cond.get('target', 'debit')
-            m = flag_amount_over(df, op, thr, is_debit=(target != 'credit'))
-            rule_masks['amount_over'] = m
-            masks.append(m)
-            for idx in m[m].index:
-                rule_map[idx].append(rule_no)
-        rule_no += 1
-
-        # 키워드 조건
-        if 'keyword_search' in active_rules:
-            cond = rule_values.get('keyword_search', {})
-            kw = cond.get('value', '') if isinstance(cond, dict) else cond
-            mode = cond.get('mode', 'include') if isinstance(cond, dict) else 'include'
-            m = flag_keyword(df, kw)
-            if mode == 'exclude':
-                m = ~m
-            rule_masks['keyword_search'] = m
-            masks.append(m)
-            for idx in m[m].index:
-                rule_map[idx].append(rule_no)
-        rule_no += 1
-
-        # 거래처 빈도 조건
-        if 'party_freq' in active_rules:
-            cond = rule_values.get('party_freq', {})
-            op = cond.get('op', '>=')
-            thr = float(cond.get('value', 0))
-            m = flag_party_freq(df, op, thr)
-            rule_masks['party_freq'] = m
-            masks.append(m)
-            for idx in m[m].index:
-                rule_map[idx].append(rule_no)
-        rule_no += 1
-
-        # 백만단위 이하 모두 0
-        if 'round_million' in active_rules:
-            m = flag_round_million(df)
-            rule_masks['round_million'] = m
-            masks.append(m)
-            for idx in m[m].index:
-                rule_map[idx].append(rule_no)
-        rule_no += 1
-
-        # 동일 계정과목 세트
-        if 'uniform_account' in active_rules:
-            m = flag_uniform_account(df)
-            rule_masks['uniform_account'] = m
-            masks.append(m)
-            for idx in m[m].index:
-                rule_map[idx].append(rule_no)
-        rule_no += 1
-
-        # 차변대변 불일치 세트
-        if 'unbalanced_set' in active_rules:
-            m = flag_unbalanced_set(df)
-            rule_masks['unbalanced_set'] = m
-            masks.append(m)
-            for idx in m[m].index:
-                rule_map[idx].append(rule_no)
-        rule_no += 1
-
-    # ───────────────── 3. 모든 mask 결합 ────────────────────
-    def eval_node(node) -> pd.Series:
-        nonlocal rule_no
-        if not node:
-            return pd.Series(False, index=df.index)
-        if node.get('type') == 'cond':
-            rule = node.get('rule')
-            if rule == 'weekend_txn':
-                m = flag_weekend_txn(df)
-            elif rule == 'amount_over':
-                op = node.get('op', '>')
-                thr = float(node.get('value', 0))
-                target = node.get('target', 'debit')
-                m = flag_amount_over(df, op, thr, is_debit=(target != 'credit'))
-            elif rule == 'keyword_search':
-                kw = node.get('value', '')
-                mode = node.get('mode', 'include')
-                m = flag_keyword(df, kw)
-                if mode == 'exclude':
-                    m = ~m
-            elif rule == 'party_freq':
-                op = node.get('op', '>=')
-                thr = float(node.get('value', 0))
-                m = flag_party_freq(df, op, thr)
-            elif rule == 'round_million':
-                m = flag_round_million(df)
-            elif rule == 'uniform_account':
-                m = flag_uniform_account(df)
-            elif rule == 'unbalanced_set':
-                m = flag_unbalanced_set(df)
-            else:
-                m = pd.Series(False, index=df.index)
-            for idx in m[m].index:
-                rule_map[idx].append(rule_no)
-            rule_no += 1
-            return m
+    # 조건 mask·날짜·집계·정렬 인덱스는 데이터셋 메모에 보관해 다음 요청에서 재사용한다
+    memo = prepare_memo(memo)
+    # 전표세트 ID도 메모에 두고 모든 세트 규칙이 공유한다 (메모가 데이터셋과 함께 사라지므로 재사용도 그 안에서만)
+    vid = None
+    if set(VOUCHER_KEY) <= set(df.columns):
+        vid = RuleContext(df, memo=memo).vid
+    # 캐시에 보관된 원본 DataFrame을 건드리지 않도록 얕은 복사본에 열을 덮어쓴다
+    with span('to_numeric'):
+        df = to_numeric_amounts(df)
+
+    # ───────────────── 2. 규칙별 mask 계산 및 결합 ──────────────
+    tree = build_rule_tree(active_rules, rule_values, logic_op, logic_tree)
+    plan = compile_plan(tree)
+
+    from backend import parallel  # parallel이 이 모듈을 import하므로 여기서 가져온다
+    workers = parallel.WORKERS if workers is None else workers
+    if workers > 1 and len(df) >= parallel.MIN_ROWS:
+        # 작업 프로세스에서 잰 조건별 시간은 이 프로세스에 모이지 않으므로 병렬 평가 전체만 기록한다
+        with span('evaluate_parallel'):
+            final_mask, hits = parallel.evaluate_parallel(df, plan, vid, workers, short_circuit, memo)
+        if on_rule is not None:
+            on_rule(len(hits), len(hits))
+    else:
+        final_mask, hits = evaluate_plan(plan, RuleContext(df, vid, memo=memo), short_circuit, on_rule)
+    with span('rule_bits'):
+        return df, final_mask, rule_bits(hits, len(df))
+
+
+def keyword_details(df, bits, active_rules, rule_values, logic_op='AND', logic_tree=None, memo=None):
+    """
+    포함 모드 키워드 조건마다, 일치한 행에서 처음 찾은 키워드 (rule_map의 상세 정보).
+    bits: 같은 인자로 run_rules가 돌려준 비트셋. memo: run_rules에 넘긴 것과 같은 데이터셋 메모.
+    반환: {규칙 번호: (키워드 목록, 일치한 행 위치 int64, 그 행의 키워드 번호 int32)}
+    """
+    ctx = RuleContext(df, memo=prepare_memo(memo))
+    details = {}
+    for leaf in iter_leaves(compile_plan(build_rule_tree(active_rules, rule_values, logic_op, logic_tree))):
+        node, no = leaf['node'], leaf['node']['_no']
+        if node.get('rule') != 'keyword_search' or node.get('mode', 'include') == 'exclude':
+            continue
+        if no // 64 >= bits.shape[1]:
+            continue
+        rows = np.flatnonzero((bits[:, no // 64] >> np.uint64(no % 64)) & np.uint64(1))
+        value = str(node.get('value', ''))
+        details[no] = (get_matcher(value).keywords, rows, ctx.keyword_hits(value)[rows].astype(np.int32))
+    return details
+
+
+def encode_keyword_details(details):
+    """keyword_details → JSON: {"규칙 번호": {"keywords": [...], "rows": [행 위치], "index": [키워드 번호]}}"""
+    return {
+        str(no): {'keywords': keywords, 'rows': rows.tolist(), 'index': index.tolist()}
+        for no, (keywords, rows, index) in details.items()
+    }
 
-        items = [eval_node(it) for it in node.get('items', [])]
-        if not items:
-            return pd.Series(False, index=df.index)
-        op = node.get('op', 'AND').upper()
-        result = items[0].copy()
-        for m in items[1:]:
-            if op == 'OR':
-                result = result | m
-            else:
-                result = result & m
-        return result
 
-    if logic_tree and logic_tree.get('items'):
-        final_mask = eval_node(logic_tree)
-    elif not masks:
-        final_mask = pd.Series(False, index=df.index)
-    elif logic_op.upper() == 'OR':
-        final_mask = masks[0]
-        for m in masks[1:]:
-            final_mask = final_mask | m
-    else:  # 기본 AND
-        final_mask = masks[0]
-        for m in masks[1:]:
-            final_mask = final_mask & m
-
-    flagged = list(final_mask[final_mask].index)
-
-    df_disp = df.copy()
-    for col in ('차변금액', '대변금액'):
-        if col in df_disp.columns:
-            df_disp[col] = df_disp[col].apply(lambda v: f"{int(round(v)):,}")
-
-    # ───────────────── 4. 결과 패키징 ──────────────────────
+def analyze_journal(
+    df,
+    active_rules,
+    rule_values,
+    logic_op: str = 'AND',
+    logic_tree: dict | None = None,
+    short_circuit: bool = False,
+    workers: int | None = None,
+):
+    """전체 행을 화면용 레코드로 포함한 분석 결과 (옵션은 run_rules 참고)."""
+    original = df
+    memo = prepare_memo()
+    df, final_mask, bits = run_rules(df, active_rules, rule_values, logic_op, logic_tree,
+                                     short_circuit, workers, memo=memo)
+
+    # ───────────────── 3. 결과 패키징 ──────────────────────
+    with span('format_rows'):
+        rows = format_rows(df)
+    with span('rule_map'):
+        # 행별 일치 규칙 번호를 비트셋으로 (행 위치 기준, 일치한 행만 직렬화)
+        rule_map = encode_rule_map(bits)
+    with span('keywords'):
+        # 키워드 조건이 어떤 키워드로 일치했는지
+        keyword_matches = encode_keyword_details(
+            keyword_details(original, bits, active_rules, rule_values, logic_op, logic_tree, memo))
     return {
         "headers": list(df.columns),
-        "rows": df_disp.to_dict('records'),
-        "flagged_indices": flagged,
-        "rule_map": {str(k): v for k, v in rule_map.items()}
+        "rows": rows,
+        "flagged_indices": list(df.index[final_mask]),
+        "rule_map": rule_map,
+        "keyword_matches": keyword_matches,
     }
-
-
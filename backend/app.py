@@ -1,17 +1,23 @@
 import sys
 import os
-from flask import Flask, request, render_template, jsonify, Response
-import pandas as pd
-import math
+from flask import Flask, request, render_template, jsonify, Response, g
 import json
 
 if __name__ == "__main__":
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 # --- AI 모듈 import 추가 ---
-from backend.analyzer import analyze_journal
+from backend.analyzer import run_rules, encode_rule_map, keyword_details, to_numeric_amounts, memo_nbytes
 from backend.ai_coach import get_single_entry_suggestion
 from backend.ai_voucher_analyzer import analyze_voucher_sets_with_ai
+from backend.dataset_cache import dataset_cache
+from backend.dataset_store import dataset_store
+from backend.results import make_result, get_page
+from backend.jobs import job_manager
+from backend.ai_cache import ai_cache
+from backend import ai_batch, metrics
+from backend.metrics import span
+from backend.serialize import dumps, iter_json
 
 app = Flask(__name__,
             static_folder=os.path.join(os.path.dirname(__file__), '..', 'frontend', 'static'),
@@ -21,30 +27,78 @@ app = Flask(__name__,
 def index():
     return render_template('index.html')
 
-def clean_nan(obj):
-    if isinstance(obj, dict): return {k: clean_nan(v) for k, v in obj.items()}
-    if isinstance(obj, list): return [clean_nan(v) for v in obj]
-    if isinstance(obj, float) and (math.isnan(obj) or math.isinf(obj)): return None
-    return obj
+# --- 요청 계측: 단계별 시간은 /metrics로 누적하고, 설정하면 Server-Timing 헤더로도 보낸다 ---
+@app.before_request
+def start_request_metrics():
+    g.metrics = metrics.begin_request()
+
+@app.after_request
+def finish_request_metrics(response):
+    state = g.pop('metrics', None)
+    if state is not None:
+        entries = metrics.end_request(state, request.endpoint or 'unknown', response.status_code)
+        if metrics.SERVER_TIMING:
+            response.headers['Server-Timing'] = metrics.server_timing(entries)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    stats, store = ai_cache.stats(), dataset_store.stats()
+    extra = metrics.process_gauges() + [
+        ('entrychecker_ai_cache_lookups_total', {'kind': kind, 'result': result}, count)
+        for result, counts in (('hit', stats['hits']), ('miss', stats['misses']))
+        for kind, count in counts.items()
+    ] + [
+        ('entrychecker_dataset_store_lookups_total', {'result': 'hit'}, store['hits']),
+        ('entrychecker_dataset_store_lookups_total', {'result': 'miss'}, store['misses']),
+        ('entrychecker_dataset_store_bytes', {}, store['nbytes']),
+        ('entrychecker_ai_abandoned_calls_running', {}, ai_batch.abandoned_calls()),
+    ]
+    return Response(metrics.registry.render(extra), mimetype='text/plain; version=0.0.4')
+
+def json_response(obj):
+    """
+    JSON 응답 (NaN·무한대는 null). 레코드는 frame_records에서 이미 결측을 None으로 바꿔 두므로
+    응답 전체를 clean_nan으로 다시 훑지 않고, 긴 목록은 조각으로 인코딩하며 바로 보낸다 (backend/serialize.py).
+    행 목록 밖의 값과 긴 목록의 첫 조각은 여기서 먼저 인코딩하므로, 실패하면 200을 보내기 전에 예외가 난다
+    (호출한 라우트가 오류 응답으로 바꾼다). 나머지 조각의 인코딩 시간(json)은 Server-Timing이 아닌 /metrics에만 남는다.
+    """
+    with span('json'):
+        pieces = iter_json(obj)
+        first = next(pieces)
+
+    def body():
+        yield first
+        with span('json'):
+            yield from pieces
+    return Response(body(), mimetype='application/json')
 
 def read_file_to_df(file):
-    filename = file.filename
-    if filename.endswith('.csv'):
-        enc_try = ['cp949', 'utf-8-sig', 'utf-8']
-        for enc in enc_try:
-            try:
-                file.seek(0)
-                # dtype=str 옵션을 추가하여 모든 데이터를 문자열로 읽어옵니다.
-                df = pd.read_csv(file, encoding=enc, sep=None, engine='python', dtype=str).fillna('')
-                if not df.empty and len(df.columns) > 0: return df
-            except Exception: continue
-        raise ValueError("CSV 파일을 읽는 데 실패했습니다. 인코딩 또는 구분자를 확인해주세요.")
-    elif filename.endswith(('.xls', '.xlsx')):
-        file.seek(0)
-        # dtype=str 옵션을 추가하여 모든 데이터를 문자열로 읽어옵니다.
-        return pd.read_excel(file, engine='openpyxl', dtype=str).fillna('')
-    else:
-        raise ValueError("지원하지 않는 파일 형식입니다. CSV 또는 Excel 파일을 업로드해주세요.")
+    # 인코딩·구분자는 앞부분 샘플로 한 번만 추정하고, 금액 열은 읽으면서 숫자로 변환한다 (backend/ingest.py)
+    # 전에 올린 적 있는 내용이면 파싱하지 않고 저장소에서 읽는다 (backend/dataset_store.py)
+    with span('parse'):
+        return dataset_store.read(file, file.filename)
+
+class DatasetExpired(LookupError):
+    pass
+
+def load_request_df():
+    """
+    요청에 dataset_id가 있으면 캐시된 DataFrame을, 없으면 업로드 파일을 파싱해 캐시에 넣고 반환한다.
+    반환값: (dataset_id, df). 파일도 dataset_id도 없으면 (None, None).
+    """
+    dataset_id = request.form.get('dataset_id')
+    if dataset_id:
+        df = dataset_cache.get(dataset_id)
+        if df is None:
+            raise DatasetExpired("데이터셋이 만료되었습니다. 파일을 다시 업로드해주세요.")
+        return dataset_id, df
+    if 'file' not in request.files:
+        return None, None
+    file = request.files['file']
+    df = read_file_to_df(file)
+    return dataset_cache.put(df, file.filename), df
+
 @app.route('/preview', methods=['POST'])
 def preview():
     if 'file' not in request.files:
@@ -52,46 +106,182 @@ def preview():
     file = request.files['file']
     try:
         df = read_file_to_df(file)
-        headers = df.columns.tolist()
-        rows = df.to_dict(orient='records')
-        result = {'headers': headers, 'rows': rows}
-        cleaned = clean_nan(result)
-        return Response(json.dumps(cleaned, ensure_ascii=False), mimetype='application/json')
+        dataset_id = dataset_cache.put(df, file.filename)
+        # 전체 행 대신 첫 구간만 보낸다. 나머지는 /rows로 스크롤에 맞춰 가져간다
+        with span('page'):
+            result = {'dataset_id': dataset_id, 'headers': df.columns.tolist(), **get_page(df)}
+        return json_response(result)
     except Exception as e:
         return jsonify({'error': f'파일 파싱 오류: {str(e)}'}), 400
 
+def parse_rule_form(form):
+    """규칙 분석 요청 폼 → run_rules 인자 (요청 밖 작업에서도 쓰도록 미리 꺼내 둔다)."""
+    return {
+        'active_rules': json.loads(form['active_rules']),
+        'rule_values': json.loads(form['values']),
+        'logic_op': form.get('logic_op', 'AND'),
+        'logic_tree': json.loads(form.get('logic_tree', '{}')),
+    }
+
+def run_rule_analysis(dataset_id, df, params, on_rule=None):
+    # 조건 mask·중간 결과는 데이터셋 캐시가 들고 있는 메모에 남겨 다음 분석에서 재사용한다
+    memo = dataset_cache.memo(dataset_id)
+    _, final_mask, bits = run_rules(df, params['active_rules'], params['rule_values'],
+                                    params['logic_op'], params['logic_tree'], on_rule=on_rule, memo=memo)
+    # 키워드 조건은 어떤 키워드로 일치했는지도 함께 보관해 /rows에서 행마다 '__kw'로 내려 준다
+    with span('keywords'):
+        keywords = keyword_details(df, bits, params['active_rules'], params['rule_values'],
+                                   params['logic_op'], params['logic_tree'], memo)
+    if memo is not None:
+        dataset_cache.update_memo_nbytes(dataset_id, memo_nbytes(memo))
+    # 행 데이터는 보관해 두고 /rows에서 구간 단위로 내려 준다
+    with span('store_result'):
+        vid = None if memo is None else memo.get('vid')
+        analysis_id = dataset_cache.put_result(dataset_id, make_result(df, final_mask, bits, keywords, vid))
+    with span('rule_map'):
+        rule_map = encode_rule_map(bits)
+    return {
+        'dataset_id': dataset_id,
+        'analysis_id': analysis_id,
+        'headers': df.columns.tolist(),
+        'total': len(df),
+        'flagged_count': int(final_mask.sum()),
+        'rule_map': rule_map,
+    }
+
 @app.route('/analyze', methods=['POST'])
 def analyze():
-    if 'file' not in request.files: return "파일이 없습니다.", 400
-    file = request.files['file']
     try:
-        active_rules = json.loads(request.form['active_rules'])
-        rule_values = json.loads(request.form['values'])
-        logic_op = request.form.get('logic_op', 'AND')
-        logic_tree = json.loads(request.form.get('logic_tree', '{}'))
-        df = read_file_to_df(file)
-        result = analyze_journal(df, active_rules, rule_values, logic_op, logic_tree)
-        cleaned = clean_nan(result)
-        return Response(json.dumps(cleaned, ensure_ascii=False), mimetype='application/json')
+        params = parse_rule_form(request.form)
+        dataset_id, df = load_request_df()
+        if df is None: return "파일이 없습니다.", 400
+        result = run_rule_analysis(dataset_id, df, params)
+        return json_response(result)
+    except DatasetExpired as e:
+        return str(e), 410
     except Exception as e:
         return f"분석 중 오류 발생: {str(e)}", 500
 
+# --- 분석 결과/미리보기 행 구간 조회 ---
+@app.route('/rows', methods=['GET'])
+def rows():
+    args = request.args
+    dataset_id, analysis_id = args.get('dataset_id'), args.get('analysis_id')
+    try:
+        if analysis_id:
+            df, result = dataset_cache.get_result(dataset_id, analysis_id)
+        else:
+            df, result = dataset_cache.get(dataset_id), None
+        if df is None:
+            return "데이터셋이 만료되었습니다. 파일을 다시 업로드해주세요.", 410
+        with span('page'):
+            page = get_page(
+                df, result,
+                offset=args.get('offset', 0, type=int),
+                limit=args.get('limit', 200, type=int),
+                flagged_only=args.get('flagged_only') == '1',
+                expand_sets=args.get('expand_sets') == '1',
+            )
+        return json_response(page)
+    except Exception as e:
+        return f"행 조회 중 오류 발생: {str(e)}", 500
+
 # --- AI 전표세트 분석 API 엔드포인트 추가 ---
 @app.route('/ai_analyze_vouchers', methods=['POST'])
 def ai_analyze_vouchers():
-    if 'file' not in request.files: return jsonify({"error": "파일이 없습니다."}), 400
-    file = request.files['file']
     try:
-        df = read_file_to_df(file)
-        df['차변금액'] = pd.to_numeric(df.get('차변금액', 0), errors='coerce').fillna(0)
-        df['대변금액'] = pd.to_numeric(df.get('대변금액', 0), errors='coerce').fillna(0)
-        results = analyze_voucher_sets_with_ai(df)
-        return jsonify(results)
+        _, df = load_request_df()
+        if df is None: return jsonify({"error": "파일이 없습니다."}), 400
+        results = analyze_voucher_sets_with_ai(to_numeric_amounts(df))
+        return json_response(results)
+    except DatasetExpired as e:
+        return jsonify({"error": str(e)}), 410
     except Exception as e:
         print(f"AI 전표 분석 중 오류: {e}")
         return jsonify({"error": f"AI 분석 중 오류가 발생했습니다: {str(e)}"}), 500
 
-# --- 개별 분개 AI 코칭 API 엔드포인트 추가 ---
+# --- 백그라운드 작업: 제출 → /jobs/<id> 조회(폴링) 또는 /jobs/<id>/events(SSE) → 취소 ---
+def _rule_analysis_job(job, dataset_id, df, params):
+    job.progress('규칙 평가')
+    return run_rule_analysis(dataset_id, df, params,
+                             on_rule=lambda done, total: job.progress(done=done, total=total))
+
+def _ai_voucher_job(job, df):
+    job.progress('AI 전표세트 분석')
+
+    def on_batch(done, total, results):
+        if job.cancelled:
+            return
+        job.emit(results)
+        job.progress(done=done, total=total)
+
+    return analyze_voucher_sets_with_ai(to_numeric_amounts(df), on_batch=on_batch,
+                                        should_stop=lambda: job.cancelled)
+
+@app.route('/jobs/analyze', methods=['POST'])
+def submit_analyze_job():
+    try:
+        params = parse_rule_form(request.form)
+        dataset_id, df = load_request_df()
+        if df is None: return jsonify({"error": "파일이 없습니다."}), 400
+        job = job_manager.submit('analyze', _rule_analysis_job, dataset_id, df, params)
+        return jsonify({'job_id': job.id, 'dataset_id': dataset_id}), 202
+    except DatasetExpired as e:
+        return jsonify({"error": str(e)}), 410
+    except Exception as e:
+        return jsonify({"error": f"분석 중 오류 발생: {str(e)}"}), 500
+
+@app.route('/jobs/ai_analyze_vouchers', methods=['POST'])
+def submit_ai_voucher_job():
+    try:
+        dataset_id, df = load_request_df()
+        if df is None: return jsonify({"error": "파일이 없습니다."}), 400
+        job = job_manager.submit('ai_analyze_vouchers', _ai_voucher_job, df)
+        return jsonify({'job_id': job.id, 'dataset_id': dataset_id}), 202
+    except DatasetExpired as e:
+        return jsonify({"error": str(e)}), 410
+    except Exception as e:
+        return jsonify({"error": f"AI 분석 중 오류가 발생했습니다: {str(e)}"}), 500
+
+def job_json(snapshot):
+    return dumps(snapshot)
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """cursor 이후의 부분 결과와 진행 상황 (폴링용)."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+    snapshot = job.snapshot(request.args.get('cursor', 0, type=int))
+    return Response(job_json(snapshot), mimetype='application/json')
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """진행 상황이 바뀔 때마다 snapshot을 Server-Sent Events로 보낸다. 작업이 끝나면 스트림을 닫는다."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+
+    def stream(cursor):
+        while True:
+            snapshot = job.snapshot(cursor)
+            cursor = snapshot['cursor']
+            yield f"data: {job_json(snapshot)}\n\n"
+            if job.finished:
+                return
+            while job.wait(snapshot['version'], timeout=15) == snapshot['version']:
+                yield ": keep-alive\n\n"
+
+    return Response(stream(request.args.get('cursor', 0, type=int)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+    return Response(job_json(job.snapshot(len(job.items))), mimetype='application/json')
+
 @app.route('/ai_coach', methods=['POST'])
 def ai_coach():
     data = request.json
@@ -0,0 +1,66 @@
+import os
+import json
+import functools
+import numpy as np
+import pandas as pd
+import holidays
+
+# 이름 → 추가 휴무일 배열(datetime64[D]). 회사 휴무일, 임시공휴일 등 공휴일 외 달력.
+# 대체공휴일은 holidays.KR()에 이미 포함되어 있다.
+EXTRA_CALENDARS = {}
+_calendar_version = 0
+
+
+def register_calendar(name, dates):
+    """추가 휴무일 달력을 등록(덮어쓰기)한다. dates: 'YYYY-MM-DD' 문자열·date 등의 목록."""
+    global _calendar_version
+    days = pd.to_datetime(pd.Series(list(dates), dtype=object), errors='coerce').dropna()
+    EXTRA_CALENDARS[name] = np.unique(days.to_numpy('datetime64[D]'))
+    _calendar_version += 1
+
+
+def calendar_version():
+    """달력을 등록할 때마다 바뀌는 값 (공휴일 판정을 캐시한 쪽에서 무효화에 사용)."""
+    return _calendar_version
+
+
+def load_calendars(path):
+    """{"달력 이름": ["2024-12-31", ...], ...} 형식의 JSON 파일에서 달력을 등록한다."""
+    with open(path, encoding='utf-8') as f:
+        for name, dates in json.load(f).items():
+            register_calendar(name, dates)
+
+
+if os.environ.get('HOLIDAY_CALENDARS_FILE'):
+    load_calendars(os.environ['HOLIDAY_CALENDARS_FILE'])
+
+
+@functools.lru_cache(maxsize=32)
+def _holiday_table(first_year, last_year, calendars, _version):
+    """first_year-01-01부터 하루 단위 bool 배열 (True = 공휴일 또는 추가 휴무일)."""
+    start = np.datetime64(f'{first_year}-01-01', 'D')
+    end = np.datetime64(f'{last_year + 1}-01-01', 'D')
+    table = np.zeros(int((end - start).astype(np.int64)), dtype=bool)
+    days = [np.array(sorted(holidays.KR(years=range(first_year, last_year + 1))), dtype='datetime64[D]')]
+    days += [EXTRA_CALENDARS[name] for name in calendars if name in EXTRA_CALENDARS]
+    for d in days:
+        d = d[(d >= start) & (d < end)]
+        table[(d - start).astype(np.int64)] = True
+    return start, table
+
+
+def holiday_mask(dates, calendars=()):
+    """
+    datetime64 Series → 공휴일(및 지정한 추가 달력의 휴무일)이면 True인 bool 배열.
+    데이터의 연도 범위로 달력 배열을 한 번 만들어(캐시) 날짜 오프셋으로 바로 조회한다.
+    """
+    days = pd.Series(dates).to_numpy('datetime64[D]')
+    valid = ~np.isnat(days)
+    out = np.zeros(len(days), dtype=bool)
+    if not valid.any():
+        return out
+    years = days[valid].astype('datetime64[Y]').astype(np.int64) + 1970
+    start, table = _holiday_table(int(years.min()), int(years.max()),
+                                  tuple(sorted(calendars)), _calendar_version)
+    out[valid] = table[(days[valid] - start).astype(np.int64)]
+    return out
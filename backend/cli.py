@@ -0,0 +1,339 @@
+"""
+분개장 여러 개를 서버 없이 분석하는 명령줄 도구 (야간 일괄 분석용).
+
+    python -m backend.cli --rules rules.json --out results/ [--format csv|parquet] [--workers 4]
+                          [--recursive] [--no-store] [--chunked [--chunksize N]] [--summary summary.json] 입력경로 ...
+
+rules.json: 화면에서 만든 규칙 트리와 같은 logic_tree JSON ({"type": "group", "op": "AND", "items": [...]}),
+            또는 /analyze 요청과 같은 {"active_rules": [...], "values": {...}, "logic_op": "OR", "logic_tree": {...}}
+입력경로: 분개장 파일 또는 디렉터리 (디렉터리 안의 .csv/.xls/.xlsx, --recursive면 하위 디렉터리까지)
+출력 (입력 파일마다):
+  <이름>.flagged.<형식>   최종 조건에 일치한 행 + __row(행 위치), __rules(일치한 규칙), __kw(일치한 키워드)
+  <이름>.rule_map.<형식>  규칙별 일치 행 (row, rule_no, rule) — 최종 결과와 관계없이 조건마다 일치한 행 전부
+파일 단위로 프로세스 풀에 나눠 처리하고, 파일마다 처리량을, 끝나면 합계를 출력한다.
+--chunked: 메모리에 다 올리기 어려운 큰 CSV를 chunksize 행씩 두 번 읽어 분석하고 결과를 chunk마다 이어 쓴다
+           (backend.streaming.iter_analyze_chunks). 엑셀 파일은 평소처럼 한 번에 읽는다.
+하나라도 실패하면 종료 코드 1.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+if __name__ == "__main__":
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:   # parquet 출력에만 쓴다
+    pa = pq = None
+
+from backend.analyzer import RULE_ORDER, build_rule_tree, run_rules, keyword_details
+from backend.dataset_store import dataset_store
+from backend.ingest import read_journal, iter_csv_chunks
+from backend.rule_plan import compile_plan, iter_leaves
+from backend.streaming import iter_analyze_chunks
+
+INPUT_EXTENSIONS = ('.csv', '.xls', '.xlsx')
+
+
+def _tree_rules(node):
+    """logic_tree의 조건 규칙 이름 (깊이 우선). 노드 모양이 잘못되었으면 ValueError."""
+    if not isinstance(node, dict):
+        raise ValueError(f"logic_tree의 항목은 JSON 객체여야 합니다: {json.dumps(node, ensure_ascii=False)}")
+    if node.get('type') == 'cond':
+        if not isinstance(node.get('rule'), str):
+            raise ValueError(f"logic_tree 조건에 규칙 이름(rule)이 없습니다: {json.dumps(node, ensure_ascii=False)}")
+        yield node['rule']
+        return
+    items = node.get('items', [])
+    if not isinstance(items, list):
+        raise ValueError("logic_tree 그룹의 items는 목록이어야 합니다.")
+    for it in items:
+        yield from _tree_rules(it)
+
+
+def load_rules(path):
+    """
+    규칙 JSON 파일 → run_rules 인자 dict (active_rules, rule_values, logic_op, logic_tree).
+    파일 형식이 잘못되었거나 알 수 없는 규칙(트리 안의 조건 포함)이 있으면 ValueError.
+    """
+    with open(path, encoding='utf-8') as f:
+        spec = json.load(f)
+    if not isinstance(spec, dict):
+        raise ValueError("규칙 파일의 최상위는 JSON 객체여야 합니다.")
+    if spec.get('type') == 'group':
+        spec = {'logic_tree': spec}
+    params = {
+        'active_rules': spec.get('active_rules', []),
+        'rule_values': spec.get('values', spec.get('rule_values', {})),
+        'logic_op': spec.get('logic_op', 'AND'),
+        'logic_tree': spec.get('logic_tree') or {},
+    }
+    if not isinstance(params['active_rules'], list):
+        raise ValueError("active_rules는 규칙 이름 목록이어야 합니다.")
+    if not isinstance(params['rule_values'], dict):
+        raise ValueError("values는 규칙 이름별 값을 담은 JSON 객체여야 합니다.")
+    unknown = [r for r in params['active_rules'] + list(_tree_rules(params['logic_tree'])) if r not in RULE_ORDER]
+    if unknown:
+        raise ValueError(f"알 수 없는 규칙입니다: {', '.join(map(str, dict.fromkeys(unknown)))}")
+    if not params['active_rules'] and not params['logic_tree'].get('items'):
+        raise ValueError("규칙 파일에 조건이 없습니다.")
+    return params
+
+
+def rule_names(params):
+    """규칙 번호 → 규칙 이름 (rule_map과 같은 번호)."""
+    tree = build_rule_tree(params['active_rules'], params['rule_values'], params['logic_op'], params['logic_tree'])
+    return {leaf['node']['_no']: leaf['node'].get('rule') for leaf in iter_leaves(compile_plan(tree))}
+
+
+def find_inputs(paths, recursive=False):
+    """입력 경로 → [(파일 경로, 출력 이름)]. 출력 이름은 디렉터리 기준 상대 경로(확장자 제외)."""
+    found = []
+    for root in paths:
+        if os.path.isfile(root):
+            found.append((root, os.path.splitext(os.path.basename(root))[0]))
+            continue
+        if not os.path.isdir(root):
+            raise FileNotFoundError(f"입력 경로를 찾을 수 없습니다: {root}")
+        for dirpath, dirnames, filenames in os.walk(root):
+            if not recursive:
+                dirnames.clear()
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.lower().endswith(INPUT_EXTENSIONS) and not name.startswith('~$'):   # ~$: 열려 있는 엑셀 임시 파일
+                    path = os.path.join(dirpath, name)
+                    found.append((path, os.path.splitext(os.path.relpath(path, root))[0]))
+    # 서로 다른 입력에서 같은 출력 이름이 나오면 뒤에 번호를 붙인다
+    seen, result = {}, []
+    for path, name in found:
+        n = seen.get(name, 0) + 1
+        seen[name] = n
+        result.append((path, name if n == 1 else f'{name}-{n}'))
+    return result
+
+
+def rule_map_frame(bits, names):
+    """규칙 비트셋 → 규칙별 일치 행 (row, rule_no, rule). 행 위치 순, 같은 행은 규칙 번호 순."""
+    parts = []
+    for no, rule in sorted(names.items()):
+        if no // 64 >= bits.shape[1]:
+            continue
+        rows = np.flatnonzero((bits[:, no // 64] >> np.uint64(no % 64)) & np.uint64(1))
+        parts.append(pd.DataFrame({'row': rows, 'rule_no': no, 'rule': rule}))
+    if not parts:
+        return pd.DataFrame({'row': pd.Series(dtype='int64'), 'rule_no': pd.Series(dtype='int64'),
+                             'rule': pd.Series(dtype='object')})
+    return pd.concat(parts, ignore_index=True).sort_values(['row', 'rule_no'], kind='stable', ignore_index=True)
+
+
+def flagged_frame(df, final_mask, rule_map, keywords):
+    """최종 일치 행 + __row, __rules('번호:규칙|...'), __kw(일치한 키워드, '|' 구분)."""
+    pos = np.flatnonzero(final_mask)
+    out = df.iloc[pos].reset_index(drop=True)
+    out.insert(0, '__row', pos)
+    labels = rule_map['rule_no'].astype(str) + ':' + rule_map['rule'].astype(str)
+    per_row = labels.groupby(rule_map['row'].to_numpy()).agg('|'.join)
+    out['__rules'] = per_row.reindex(pos).fillna('').to_numpy()
+
+    matched = {}
+    for kws, rows, index in keywords.values():
+        for r, k in zip(rows.tolist(), index.tolist()):
+            if kws[k] not in matched.setdefault(r, []):
+                matched[r].append(kws[k])
+    out['__kw'] = ['|'.join(matched.get(p, ())) for p in pos.tolist()]
+    return out
+
+
+def write_frame(df, path, fmt):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False, encoding='utf-8-sig')   # 엑셀에서 바로 열리도록 BOM 포함
+
+
+class FrameWriter:
+    """
+    chunk별 DataFrame을 한 파일에 이어 쓴다 (write_frame과 같은 형식).
+    csv는 첫 chunk에만 머리글을 쓰고, parquet은 chunk마다 행 그룹 하나로 쓴다.
+    parquet 스키마는 처음으로 행이 있는 chunk에서 정하고, category는 chunk마다 범주가 달라 문자열로 쓴다.
+    """
+
+    def __init__(self, path, fmt):
+        self.path, self.fmt = path, fmt
+        self._file = self._writer = self._empty = None
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    def write(self, df):
+        if self.fmt != 'parquet':
+            if self._file is None:
+                self._file = open(self.path, 'w', encoding='utf-8-sig', newline='')
+                df.to_csv(self._file, index=False)
+            else:
+                df.to_csv(self._file, index=False, header=False)
+            return
+        if df.empty:
+            self._empty = df if self._empty is None else self._empty
+            return
+        if pa is None:
+            raise ImportError("parquet 형식으로 쓰려면 pyarrow가 필요합니다.")
+        if self._writer is None:
+            fields = pa.Table.from_pandas(df, preserve_index=False).schema.remove_metadata()
+            fields = [f.with_type(f.type.value_type) if pa.types.is_dictionary(f.type)
+                      else f.with_type(pa.string()) if pa.types.is_null(f.type) else f for f in fields]
+            self._writer = pq.ParquetWriter(self.path, pa.schema(fields))
+        self._writer.write_table(pa.Table.from_pandas(df, schema=self._writer.schema, preserve_index=False))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self._writer is not None:
+            self._writer.close()
+        elif self.fmt == 'parquet' and self._empty is not None:
+            write_frame(self._empty, self.path, self.fmt)     # 일치한 행이 하나도 없는 경우
+
+
+def analyze_file_chunked(path, name, params, out_dir, fmt='csv', chunksize=200_000):
+    """
+    큰 CSV 하나를 chunk 단위로 분석해 결과를 chunk마다 이어 쓴다 → (전체 행 수, 일치 행 수, 출력 경로).
+    결과 행·rule_map을 파일 전체만큼 모으지 않는다 (통계 규칙의 1차 패스만 행 수에 비례, streaming 참고).
+    """
+    names = rule_names(params)
+    outputs = [os.path.join(out_dir, f'{name}.flagged.{fmt}'), os.path.join(out_dir, f'{name}.rule_map.{fmt}')]
+    writers = [FrameWriter(p, fmt) for p in outputs]
+    n_rows = n_flagged = 0
+    try:
+        for chunk, final_mask, bits, keywords in iter_analyze_chunks(
+                lambda: iter_csv_chunks(path, chunksize), params['active_rules'], params['rule_values'],
+                params['logic_op'], params['logic_tree']):
+            offset = chunk.index[0] if len(chunk) else n_rows
+            rule_map = rule_map_frame(bits, names)
+            flagged = flagged_frame(chunk, final_mask, rule_map, keywords)
+            flagged['__row'] += offset
+            rule_map['row'] += offset
+            writers[0].write(flagged)
+            writers[1].write(rule_map)
+            n_rows += len(chunk)
+            n_flagged += int(final_mask.sum())
+    finally:
+        for w in writers:
+            w.close()
+    return n_rows, n_flagged, outputs
+
+
+def analyze_file(path, name, params, out_dir, fmt='csv', use_store=True, workers=1, chunksize=None):
+    """
+    파일 하나 분석 → 처리 요약 dict. 실패해도 예외 대신 'error'를 채워 돌려준다 (나머지 파일은 계속).
+    chunksize: CSV를 이 행 수씩 나눠 분석하고 결과를 이어 쓴다 (analyze_file_chunked, 데이터셋 저장소는 쓰지 않는다)
+    """
+    summary = {'file': path, 'name': name, 'rows': 0, 'flagged': 0}
+    t0 = time.perf_counter()
+    try:
+        if chunksize and path.lower().endswith('.csv'):
+            rows, flagged, outputs = analyze_file_chunked(path, name, params, out_dir, fmt, chunksize)
+            # 읽기·분석·쓰기가 chunk마다 번갈아 일어나므로 합계만 남긴다
+            summary.update(rows=rows, flagged=flagged, outputs=outputs, chunked=True)
+            summary['seconds'] = time.perf_counter() - t0
+            return summary
+        df = dataset_store.read(path) if use_store else read_journal(path)
+        t1 = time.perf_counter()
+        _, final_mask, bits = run_rules(df, params['active_rules'], params['rule_values'],
+                                        params['logic_op'], params['logic_tree'], workers=workers)
+        keywords = keyword_details(df, bits, params['active_rules'], params['rule_values'],
+                                   params['logic_op'], params['logic_tree'])
+        rule_map = rule_map_frame(bits, rule_names(params))
+        t2 = time.perf_counter()
+        outputs = [os.path.join(out_dir, f'{name}.flagged.{fmt}'), os.path.join(out_dir, f'{name}.rule_map.{fmt}')]
+        write_frame(flagged_frame(df, final_mask, rule_map, keywords), outputs[0], fmt)
+        write_frame(rule_map, outputs[1], fmt)
+        t3 = time.perf_counter()
+        summary.update(rows=len(df), flagged=int(final_mask.sum()), outputs=outputs,
+                       read_seconds=t1 - t0, analyze_seconds=t2 - t1, write_seconds=t3 - t2)
+    except Exception as e:
+        summary['error'] = f'{type(e).__name__}: {e}'
+    summary['seconds'] = time.perf_counter() - t0
+    return summary
+
+
+def format_summary(s):
+    if 'error' in s:
+        return f"  ✗ {s['name']}: 실패 — {s['error']}"
+    rate = s['rows'] / s['seconds'] if s['seconds'] > 0 else 0
+    if s.get('chunked'):
+        return (f"  ✓ {s['name']}: {s['rows']:,}행, 일치 {s['flagged']:,}행 | chunk 분석 {s['seconds']:.2f}s "
+                f"| {rate:,.0f}행/초")
+    return (f"  ✓ {s['name']}: {s['rows']:,}행, 일치 {s['flagged']:,}행 | 읽기 {s['read_seconds']:.2f}s "
+            f"분석 {s['analyze_seconds']:.2f}s 쓰기 {s['write_seconds']:.2f}s | {rate:,.0f}행/초")
+
+
+def run(inputs, params, out_dir, fmt='csv', workers=1, use_store=True, chunksize=None):
+    """inputs: find_inputs 결과. 완료되는 대로 요약을 출력하고, 입력 순서대로 요약 목록을 돌려준다."""
+    summaries = {}
+    if workers > 1 and len(inputs) > 1:
+        # 파일 단위로 나누므로 파일 안에서는 행 병렬 평가를 쓰지 않는다 (workers=1)
+        with ProcessPoolExecutor(min(workers, len(inputs))) as pool:
+            futures = {pool.submit(analyze_file, path, name, params, out_dir, fmt, use_store, 1, chunksize): path
+                       for path, name in inputs}
+            for future in as_completed(futures):
+                s = future.result()
+                summaries[s['file']] = s
+                print(format_summary(s), flush=True)
+    else:
+        for path, name in inputs:
+            # 파일을 하나씩 처리할 때는 행 병렬 평가 설정(ANALYZE_WORKERS)을 그대로 따른다
+            s = analyze_file(path, name, params, out_dir, fmt, use_store, workers=None, chunksize=chunksize)
+            summaries[path] = s
+            print(format_summary(s), flush=True)
+    return [summaries[path] for path, _ in inputs]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m backend.cli', description='분개장 일괄 규칙 분석')
+    parser.add_argument('inputs', nargs='+', help='분개장 파일 또는 디렉터리')
+    parser.add_argument('--rules', required=True, help='규칙 JSON 파일 (logic_tree 또는 /analyze 요청 형식)')
+    parser.add_argument('--out', required=True, help='결과를 쓸 디렉터리')
+    parser.add_argument('--format', choices=('csv', 'parquet'), default='csv')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='동시에 처리할 파일 수 (프로세스)')
+    parser.add_argument('--recursive', action='store_true', help='하위 디렉터리의 파일도 분석')
+    parser.add_argument('--no-store', action='store_true', help='데이터셋 저장소를 쓰지 않고 매번 파싱')
+    parser.add_argument('--chunked', action='store_true', help='큰 CSV를 chunk 단위로 읽어 분석하고 결과를 이어 쓴다')
+    parser.add_argument('--chunksize', type=int, default=200_000, help='--chunked에서 한 번에 읽는 행 수')
+    parser.add_argument('--summary', help='파일별 처리 요약을 JSON으로 저장할 경로')
+    args = parser.parse_args(argv)
+
+    try:
+        params = load_rules(args.rules)
+        inputs = find_inputs(args.inputs, args.recursive)
+    except (OSError, ValueError) as e:
+        print(f"오류: {e}", file=sys.stderr)
+        return 2
+    if not inputs:
+        print("분석할 분개장 파일이 없습니다.", file=sys.stderr)
+        return 2
+
+    print(f"분개장 {len(inputs)}개 분석 (작업 프로세스 {min(args.workers, len(inputs))}개)")
+    t0 = time.perf_counter()
+    summaries = run(inputs, params, args.out, args.format, args.workers, not args.no_store,
+                    args.chunksize if args.chunked else None)
+    wall = time.perf_counter() - t0
+
+    ok = [s for s in summaries if 'error' not in s]
+    total_rows = sum(s['rows'] for s in ok)
+    print(f"\n완료 {len(ok)}개 / 실패 {len(summaries) - len(ok)}개, 전체 {total_rows:,}행, "
+          f"일치 {sum(s['flagged'] for s in ok):,}행, {wall:.2f}s ({total_rows / wall if wall > 0 else 0:,.0f}행/초)")
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump({'seconds': wall, 'files': summaries}, f, ensure_ascii=False, indent=1)
+    return 0 if len(ok) == len(summaries) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+
+# 업로드된 분개장을 한 번만 파싱하고, 이후 요청은 dataset_id로 재사용하기 위한 캐시
+# 프로세스 메모리에 있으므로 서버 프로세스가 여러 개면 다른 프로세스로 간 요청은 dataset_id를 찾지 못한다 (410).
+# 단일 프로세스 배포가 전제다 (backend/jobs.py 참고)
+MAX_ENTRIES = int(os.environ.get('DATASET_CACHE_MAX_ENTRIES', 8))
+TTL_SECONDS = int(os.environ.get('DATASET_CACHE_TTL', 30 * 60))            # 마지막 사용 후 30분
+MEMORY_BUDGET_MB = int(os.environ.get('DATASET_CACHE_MEMORY_MB', 1024))
+MAX_RESULTS_PER_DATASET = int(os.environ.get('DATASET_CACHE_MAX_RESULTS', 4))   # 데이터셋별 분석 결과 보관 수
+
+
+def _df_nbytes(df):
+    """DataFrame이 실제로 차지하는 메모리(문자열 객체 포함)."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _result_nbytes(result):
+    """분석 결과(numpy 배열과 그 dict·tuple, 키워드 상세 포함)의 대략적인 크기."""
+    if isinstance(result, dict):
+        return sum(_result_nbytes(v) for v in result.values())
+    if isinstance(result, (list, tuple)):
+        return sum(_result_nbytes(v) for v in result)
+    return int(getattr(result, 'nbytes', 0))
+
+
+class DatasetCache:
+    """
+    dataset_id → 파싱된 DataFrame LRU 캐시.
+    항목 수, 유휴 시간(TTL), 전체 메모리 예산 중 하나라도 넘으면 오래된 것부터 제거한다.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS, memory_budget_mb=MEMORY_BUDGET_MB):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        # dataset_id → {'df', 'filename', 'nbytes', 'last_access', 'results', 'memo', 'memo_nbytes'}
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, df, filename=''):
+        dataset_id = uuid.uuid4().hex
+        entry = {'df': df, 'filename': filename, 'nbytes': _df_nbytes(df), 'last_access': time.monotonic(),
+                 'results': OrderedDict(), 'memo': {}, 'memo_nbytes': 0}
+        with self._lock:
+            self._entries[dataset_id] = entry
+            self._nbytes += entry['nbytes']
+            self._evict()
+        return dataset_id
+
+    def get(self, dataset_id):
+        """없거나 만료된 경우 None."""
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(dataset_id)
+            if entry is None:
+                return None
+            entry['last_access'] = time.monotonic()
+            self._entries.move_to_end(dataset_id)
+            return entry['df']
+
+    def memo(self, dataset_id):
+        """
+        데이터셋별 분석 메모 (analyzer.run_rules의 memo). 데이터셋과 함께 제거된다. 없으면 None.
+        캐시된 DataFrame은 읽기 전용으로 다룬다 (고치면 메모의 조건 mask와 맞지 않게 된다).
+        """
+        with self._lock:
+            entry = self._entries.get(dataset_id)
+            return None if entry is None else entry['memo']
+
+    def update_memo_nbytes(self, dataset_id, nbytes):
+        """분석으로 늘어난 메모 크기(analyzer.memo_nbytes)를 메모리 예산에 반영하고, 넘으면 오래된 것부터 제거한다."""
+        with self._lock:
+            entry = self._entries.get(dataset_id)
+            if entry is None:
+                return
+            delta = nbytes - entry['memo_nbytes']
+            entry['memo_nbytes'] = nbytes
+            entry['nbytes'] += delta
+            self._nbytes += delta
+            self._evict()
+
+    def put_result(self, dataset_id, result):
+        """
+        데이터셋에 딸린 분석 결과를 보관하고 result_id를 돌려준다.
+        데이터셋이 제거되면 결과도 함께 제거된다. 데이터셋이 없으면 None.
+        """
+        result_id = uuid.uuid4().hex
+        with self._lock:
+            entry = self._entries.get(dataset_id)
+            if entry is None:
+                return None
+            nbytes = _result_nbytes(result)
+            entry['results'][result_id] = (result, nbytes)
+            entry['nbytes'] += nbytes
+            self._nbytes += nbytes
+            while len(entry['results']) > MAX_RESULTS_PER_DATASET:
+                _, (_, old_nbytes) = entry['results'].popitem(last=False)
+                entry['nbytes'] -= old_nbytes
+                self._nbytes -= old_nbytes
+            self._evict()
+        return result_id
+
+    def get_result(self, dataset_id, result_id):
+        """(df, result). 데이터셋이나 결과가 없거나 만료되면 (None, None)."""
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(dataset_id)
+            if entry is None or result_id not in entry['results']:
+                return None, None
+            entry['last_access'] = time.monotonic()
+            self._entries.move_to_end(dataset_id)
+            entry['results'].move_to_end(result_id)
+            return entry['df'], entry['results'][result_id][0]
+
+    def discard(self, dataset_id):
+        with self._lock:
+            self._remove(dataset_id)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'nbytes': self._nbytes, 'budget': self.memory_budget}
+
+    # ───────────────── 내부 ──────────────────
+    def _remove(self, dataset_id):
+        entry = self._entries.pop(dataset_id, None)
+        if entry is not None:
+            self._nbytes -= entry['nbytes']
+
+    def _expire(self):
+        now = time.monotonic()
+        for dataset_id in [k for k, e in self._entries.items() if now - e['last_access'] > self.ttl]:
+            self._remove(dataset_id)
+
+    def _evict(self):
+        self._expire()
+        # 방금 넣은 항목(맨 뒤)은 예산을 넘더라도 하나는 남겨 둔다
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._nbytes > self.memory_budget
+        ):
+            self._remove(next(iter(self._entries)))
+
+
+dataset_cache = DatasetCache()
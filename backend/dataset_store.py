@@ -0,0 +1,161 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.feather as feather
+except ImportError:   # pyarrow가 없으면 저장소 없이 매번 파싱한다
+    pa = None
+
+from backend.ingest import read_journal
+from backend.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# 업로드한 분개장을 정규화된 형태(read_journal 결과) 그대로 디스크에 보관해,
+# 같은 파일을 다시 올리면 CSV/XLSX 파싱 없이 메모리 매핑으로 바로 읽는다.
+# 파일 이름이 아니라 내용의 해시로 찾으므로 같은 내용은 한 번만 변환한다.
+STORE_DIR = os.environ.get('DATASET_STORE_DIR', os.path.join(os.path.dirname(__file__), 'dataset_store'))
+STORE_MAX_MB = int(os.environ.get('DATASET_STORE_MAX_MB', 4096))         # 넘으면 오래 안 쓴 파일부터 지운다
+# parquet: 작게 저장 / feather: 무압축 Arrow IPC라 파일은 크지만 더 빨리 읽는다
+STORE_FORMAT = os.environ.get('DATASET_STORE_FORMAT', 'parquet')
+STORE_DISABLED = os.environ.get('DATASET_STORE_DISABLED', '0') == '1'
+SCHEMA_VERSION = 1   # read_journal이 돌려주는 열 형식(dtype·정규화)을 바꾸면 올린다 (저장된 파일 무효화)
+
+HASH_BLOCK = 1024 * 1024
+
+
+def content_hash(source):
+    """경로 또는 파일 객체의 내용 → sha256 hex. 파일 객체는 처음 위치로 되감아 둔다."""
+    h = hashlib.sha256()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b''):
+                h.update(block)
+    else:
+        source.seek(0)
+        for block in iter(lambda: source.read(HASH_BLOCK), b''):
+            h.update(block)
+        source.seek(0)
+    return h.hexdigest()
+
+
+class DatasetStore:
+    """내용 해시 → 정규화된 분개장 파일 (parquet 또는 feather)."""
+
+    def __init__(self, directory=STORE_DIR, max_mb=STORE_MAX_MB, fmt=STORE_FORMAT, enabled=not STORE_DISABLED):
+        if fmt not in ('parquet', 'feather'):
+            raise ValueError(f"지원하지 않는 저장 형식입니다: {fmt}")
+        self.directory = directory
+        self.max_bytes = max_mb * 1024 * 1024
+        self.format = fmt
+        self.enabled = enabled and pa is not None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}-v{SCHEMA_VERSION}.{self.format}')
+
+    def load(self, key):
+        """저장된 DataFrame (메모리 매핑으로 읽는다). 없거나 읽지 못하면 None."""
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            reader = pq.read_table if self.format == 'parquet' else feather.read_table
+            df = reader(path, memory_map=True).to_pandas()
+        except (OSError, pa.ArrowException) as e:
+            logger.warning("데이터셋 저장소 읽기 실패 (%s): %s", path, e)
+            return None
+        os.utime(path)     # 마지막 사용 시각 (오래된 파일부터 지울 때 기준)
+        return df
+
+    def save(self, key, df):
+        """임시 파일에 쓴 뒤 이름을 바꿔 넣는다. 실패해도 분석은 계속되도록 예외를 올리지 않는다."""
+        if not self.enabled:
+            return
+        path = self._path(key)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self.format == 'parquet':
+                pq.write_table(table, tmp)
+            else:
+                feather.write_feather(table, tmp, compression='uncompressed')
+            os.replace(tmp, path)
+        except (OSError, pa.ArrowException) as e:
+            logger.warning("데이터셋 저장소 쓰기 실패 (%s): %s", path, e)
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self._evict()
+
+    def read(self, source, filename=None):
+        """
+        read_journal과 같은 DataFrame. 같은 내용을 이전에 변환해 두었으면 저장된 파일을 읽고,
+        처음 보는 내용이면 파싱한 뒤 저장해 둔다.
+        적중·누락 수는 stats()로 /metrics에, 읽은 시간은 단계 시간(store_load)으로 남는다.
+        """
+        if not self.enabled:
+            return read_journal(source, filename)
+        key = content_hash(source)
+        t0 = time.perf_counter()
+        with span('store_load'):
+            df = self.load(key)
+        with self._lock:
+            if df is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if df is not None:
+            logger.debug("데이터셋 저장소에서 읽음: %s행 %.3f초", f'{len(df):,}', time.perf_counter() - t0)
+            return df
+        df = read_journal(source, filename)
+        self.save(key, df)
+        return df
+
+    def stats(self):
+        files = self._files()
+        with self._lock:
+            return {'files': len(files), 'nbytes': sum(size for _, size, _ in files),
+                    'hits': self.hits, 'misses': self.misses}
+
+    def _files(self):
+        """[(경로, 크기, 마지막 사용 시각)] (임시 파일 제외)."""
+        if not os.path.isdir(self.directory):
+            return []
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(('.parquet', '.feather')):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((path, st.st_size, st.st_mtime))
+        return files
+
+    def _evict(self):
+        files = sorted(self._files(), key=lambda f: f[2])
+        total = sum(size for _, size, _ in files)
+        # 방금 쓴 파일(가장 최근)은 예산을 넘더라도 남겨 둔다
+        for path, size, _ in files[:-1]:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+dataset_store = DatasetStore()
@@ -0,0 +1,178 @@
+import io
+import os
+import csv
+import logging
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:   # pyarrow가 없으면 pandas C 엔진으로 읽는다
+    pa = None
+
+# 금액 열은 읽는 시점에 숫자로 받고, 식별자·텍스트 등 나머지 열은 문자열로 받는다.
+AMOUNT_COLUMNS = ('차변금액', '대변금액')
+
+# 고유값이 행 수의 이 비율 이하인 텍스트 열은 category(정수 코드 + 고유 문자열)로 보관한다
+CATEGORY_MAX_RATIO = float(os.environ.get('CATEGORY_MAX_RATIO', 0.5))
+
+logger = logging.getLogger(__name__)
+
+ENCODINGS = ('utf-8-sig', 'cp949')   # utf-8-sig는 BOM 없는 UTF-8도 읽는다
+DELIMITERS = ',\t;|'
+SAMPLE_BYTES = 64 * 1024
+
+
+def _open_binary(source):
+    """경로 또는 (Flask FileStorage 같은) 파일 객체 → 처음 위치로 되감은 바이너리 스트림."""
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'rb')
+    source.seek(0)
+    return source
+
+
+def sniff_csv(sample: bytes):
+    """
+    앞부분 샘플만 보고 (인코딩, 구분자, 헤더) 추정.
+    헤더는 파일에 적힌 그대로 돌려준다 (읽을 때 dtype의 키로 쓰므로 다듬지 않고, 열 이름은 읽은 뒤에 다듬는다).
+    """
+    # 샘플 끝에서 잘린 멀티바이트 문자를 피하려고 마지막 줄바꿈까지만 사용
+    cut = sample.rfind(b'\n')
+    if cut > 0:
+        sample = sample[:cut]
+    for enc in ENCODINGS:
+        try:
+            text = sample.decode(enc)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise ValueError("CSV 파일을 읽는 데 실패했습니다. 인코딩 또는 구분자를 확인해주세요.")
+    try:
+        sep = csv.Sniffer().sniff(text, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        sep = ','
+    header = next(csv.reader(io.StringIO(text), delimiter=sep), [])
+    return enc, sep, header
+
+
+def _journal_dtypes(header, amounts_numeric=True):
+    """원래 헤더 이름 → dtype. 금액 열은 앞뒤 공백을 뺀 이름으로 알아본다."""
+    return {h: 'float64' if amounts_numeric and h.strip() in AMOUNT_COLUMNS else str for h in header}
+
+
+def _read_csv_arrow(f, encoding, sep, dtypes):
+    types = {h: (pa.float64() if t == 'float64' else pa.string()) for h, t in dtypes.items()}
+    table = pa_csv.read_csv(
+        f,
+        read_options=pa_csv.ReadOptions(encoding=encoding),
+        parse_options=pa_csv.ParseOptions(delimiter=sep),
+        convert_options=pa_csv.ConvertOptions(column_types=types, strings_can_be_null=True),
+    )
+    return table.to_pandas()
+
+
+def _read_csv_c(f, encoding, sep, dtypes):
+    return pd.read_csv(f, encoding=encoding, sep=sep, engine='c', dtype=dtypes)
+
+
+def _coerce_amounts(df):
+    """문자열로 읽힌 금액 열('1,100,000' 등) → float64. 빈 값은 NaN으로 둔다."""
+    for col in AMOUNT_COLUMNS:
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', '', regex=False).str.strip(), errors='coerce')
+    return df
+
+
+def _fill_text(df):
+    text_cols = [c for c in df.columns if c not in AMOUNT_COLUMNS]
+    df[text_cols] = df[text_cols].fillna('')
+    return df
+
+
+def normalize_journal(df):
+    """
+    분석용 정규화 (파일을 읽을 때 한 번).
+    금액 열은 이미 float64(원 단위 정수도 정확히 표현, 빈 값 NaN)이고, 반복이 많은 텍스트 열
+    (계정과목, 거래처코드, 적요, 전표일자 등)은 사전순 category로 바꾼다. 값은 그대로라 화면·규칙 결과는 같고,
+    메모리와 factorize·groupby 비용이 줄어든다. 변환 전후 메모리는 debug 로그로 남긴다.
+    전표일자는 datetime64로 바꾸지 않고 원래 문자열의 category로 둔다. 화면·결과 파일·AI 프롬프트와
+    전표세트 키(전표일자, 전표번호)는 파일에 적힌 값(20240105, 2024-01-05, 엑셀 직렬값 등)을 그대로 써야 하고,
+    날짜 규칙용 datetime64는 데이터셋마다 한 번 고유값 단위로 파싱해 데이터셋 메모에 둔다 (RuleContext.dates).
+    """
+    before = int(df.memory_usage(index=True, deep=True).sum())
+    limit = len(df) * CATEGORY_MAX_RATIO
+    for col in df.columns:
+        if col in AMOUNT_COLUMNS or not pd.api.types.is_object_dtype(df[col]):
+            continue
+        codes, uniques = pd.factorize(df[col], sort=True)
+        if len(uniques) <= limit:
+            df[col] = pd.Categorical.from_codes(codes, categories=uniques)
+    after = int(df.memory_usage(index=True, deep=True).sum())
+    logger.debug("분개장 %s행 메모리: %.1fMB → %.1fMB", f'{len(df):,}', before / 2**20, after / 2**20)
+    return df
+
+
+def read_csv_journal(source):
+    f = _open_binary(source)
+    try:
+        enc, sep, header = sniff_csv(f.read(SAMPLE_BYTES))
+        # 금액 열을 바로 float64로 파싱하고, 천 단위 쉼표 등으로 실패하면 금액 열만 문자열로 다시 읽는다.
+        # 샘플 뒤쪽에서 인코딩이 어긋나는 드문 경우에만 다른 인코딩을 시도한다.
+        attempts = [(enc, True), (enc, False)] + [(e, False) for e in ENCODINGS if e != enc]
+        for n, (encoding, amounts_numeric) in enumerate(attempts, 1):
+            f.seek(0)
+            try:
+                reader = _read_csv_arrow if pa is not None else _read_csv_c
+                df = reader(f, encoding, sep, _journal_dtypes(header, amounts_numeric))
+                break
+            except ValueError:   # UnicodeDecodeError, ArrowInvalid 포함
+                if n == len(attempts):
+                    raise ValueError("CSV 파일을 읽는 데 실패했습니다. 인코딩 또는 구분자를 확인해주세요.")
+    finally:
+        if isinstance(source, (str, os.PathLike)):
+            f.close()
+    df.columns = [str(c).strip() for c in df.columns]
+    if df.empty or len(df.columns) == 0:
+        raise ValueError("CSV 파일을 읽는 데 실패했습니다. 인코딩 또는 구분자를 확인해주세요.")
+    return _fill_text(_coerce_amounts(df))
+
+
+def read_excel_journal(source):
+    f = _open_binary(source)
+    try:
+        df = pd.read_excel(f, engine='openpyxl', dtype=str)
+    finally:
+        if isinstance(source, (str, os.PathLike)):
+            f.close()
+    df.columns = [str(c).strip() for c in df.columns]
+    return _fill_text(_coerce_amounts(df))
+
+
+def read_journal(source, filename=None):
+    """
+    분개장 파일(CSV/XLS/XLSX) → DataFrame.
+    금액 열은 float64(빈 값 NaN), 나머지 열은 문자열(빈 값 '')로 반환한다.
+    반복이 많은 텍스트 열은 category로 보관한다 (normalize_journal).
+    """
+    name = (filename or str(source)).lower()
+    if name.endswith('.csv'):
+        return normalize_journal(read_csv_journal(source))
+    if name.endswith(('.xls', '.xlsx')):
+        return normalize_journal(read_excel_journal(source))
+    raise ValueError("지원하지 않는 파일 형식입니다. CSV 또는 Excel 파일을 업로드해주세요.")
+
+
+def iter_csv_chunks(path, chunksize=200_000):
+    """
+    큰 CSV를 chunksize 행씩 읽는 제너레이터 (스트리밍 분석용).
+    각 chunk의 index는 파일 전체 기준 행 번호이고, 열 형식은 read_journal과 같다.
+    """
+    with open(path, 'rb') as f:
+        enc, sep, header = sniff_csv(f.read(SAMPLE_BYTES))
+    reader = pd.read_csv(path, encoding=enc, sep=sep, engine='c',
+                         dtype=_journal_dtypes(header, amounts_numeric=False), chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            chunk.columns = [str(c).strip() for c in chunk.columns]
+            yield _fill_text(_coerce_amounts(chunk))
@@ -0,0 +1,162 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 오래 걸리는 분석(규칙 분석, AI 전표세트 분석)을 요청 밖의 작업으로 돌리고 진행 상황을 조회한다.
+# 작업 상태는 dataset_cache와 마찬가지로 이 프로세스 메모리에만 있으므로, 서버는 프로세스 하나로 띄워야 한다
+# (gunicorn -w 1, 동시 요청은 --threads로. 저장소 루트의 gunicorn.conf.py 참고). 프로세스가 여러 개면 작업을 만든
+# 프로세스가 아닌 곳으로 간 조회·취소·SSE 요청은 작업을 찾지 못한다.
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))                # 동시에 실행하는 작업 수
+JOB_TTL_SECONDS = int(os.environ.get('JOB_TTL', 60 * 60))          # 끝난 작업을 보관하는 시간
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """
+    작업 하나의 상태. 작업 함수는 progress()로 진행 상황을, emit()으로 부분 결과를 남기고,
+    check_cancelled()로 취소 요청을 확인한다 (취소되었으면 JobCancelled).
+    status: queued → running → done | failed | cancelled
+    """
+
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = 'queued'
+        self.stage = ''
+        self.done = 0
+        self.total = 0
+        self.items = []        # 부분 결과 (도착 순서)
+        self.result = None
+        self.error = None
+        self.finished_at = None
+        self.version = 0       # 상태가 바뀔 때마다 증가 (SSE 대기용)
+        self._cancel = threading.Event()
+        self._changed = threading.Condition()
+
+    # ───────────────── 작업 함수에서 호출 ──────────────────
+    def progress(self, stage=None, done=None, total=None):
+        self.check_cancelled()
+        with self._changed:
+            if stage is not None:
+                self.stage = stage
+            if done is not None:
+                self.done = done
+            if total is not None:
+                self.total = total
+            self._touch()
+
+    def emit(self, items):
+        with self._changed:
+            self.items.extend(items)
+            self._touch()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled("작업이 취소되었습니다.")
+
+    # ───────────────── 조회 ──────────────────
+    def snapshot(self, cursor=0):
+        """cursor 이후의 부분 결과와 현재 상태. 다음 조회 때는 돌려준 cursor를 넘긴다."""
+        with self._changed:
+            snap = {
+                'job_id': self.id, 'kind': self.kind, 'status': self.status,
+                'stage': self.stage, 'done': self.done, 'total': self.total,
+                'items': self.items[cursor:], 'cursor': len(self.items), 'version': self.version,
+            }
+            if self.status == 'done':
+                snap['result'] = self.result
+            if self.error is not None:
+                snap['error'] = self.error
+            return snap
+
+    def wait(self, version, timeout):
+        """version 이후 변경이 있거나 timeout이 지날 때까지 기다린다."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed', 'cancelled')
+
+    # ───────────────── 내부 ──────────────────
+    def _touch(self):
+        self.version += 1
+        self._changed.notify_all()
+
+    def _set_status(self, status, result=None, error=None):
+        with self._changed:
+            self.status = status
+            self.result = result
+            self.error = error
+            if self.finished:
+                self.finished_at = time.monotonic()
+            self._touch()
+
+
+class JobManager:
+    """작업 저장소 + 스레드 풀. 끝난 작업은 JOB_TTL_SECONDS 뒤에 지운다."""
+
+    def __init__(self, workers=JOB_WORKERS, ttl=JOB_TTL_SECONDS):
+        self.ttl = ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """fn(job, *args, **kwargs)를 백그라운드에서 실행하고 Job을 바로 돌려준다. fn의 반환값이 job.result."""
+        job = Job(kind)
+        with self._lock:
+            self._expire()
+            self._jobs[job.id] = job
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """취소를 요청한다. 대기 중인 작업은 시작하지 않고, 실행 중인 작업은 다음 확인 지점에서 멈춘다."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job._cancel.set()
+        with job._changed:
+            job._touch()
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancelled:
+            job._set_status('cancelled', error="작업이 취소되었습니다.")
+            return
+        job._set_status('running')
+        try:
+            result = fn(job, *args, **kwargs)
+            job.check_cancelled()
+            job._set_status('done', result=result)
+        except JobCancelled as e:
+            job._set_status('cancelled', error=str(e))
+        except Exception as e:
+            logger.exception('작업 %s %s 실패', job.kind, job.id)
+            job._set_status('failed', error=str(e))
+
+    def _expire(self):
+        now = time.monotonic()
+        for job_id in [k for k, j in self._jobs.items() if j.finished and now - j.finished_at > self.ttl]:
+            del self._jobs[job_id]
+
+
+job_manager = JobManager()
@@ -0,0 +1,99 @@
+import functools
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# 키워드 검색(keyword_search)용 다중 패턴 매칭.
+# 키워드 목록으로 Aho-Corasick 오토마톤을 한 번 만들고, 열의 고유값마다 한 번씩만 훑는다.
+# (적요·계정과목은 같은 문자열이 반복되므로 행 수가 아니라 고유값 수만큼만 검사한다)
+
+
+def parse_keywords(text):
+    """'현금, 가지급,현금' → ['현금', '가지급'] (빈 항목·중복 제거, 순서 유지)."""
+    return list(dict.fromkeys(k.strip() for k in str(text).split(',') if k.strip()))
+
+
+class KeywordMatcher:
+    """
+    대소문자를 무시하는 부분 문자열 매칭.
+    first(text)는 왼쪽부터 훑어 가장 먼저 끝나는 키워드의 번호(self.keywords 기준), 없으면 -1.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        self._goto = [{}]      # 상태 → {문자: 다음 상태}
+        self._fail = [0]
+        self._out = [-1]       # 상태에서 끝나는(실패 링크 포함) 키워드 번호
+        for i, kw in enumerate(self.keywords):
+            state = 0
+            for ch in kw.lower():
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(-1)
+                    self._goto[state][ch] = nxt
+                state = nxt
+            if self._out[state] < 0:
+                self._out[state] = i
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                if self._out[nxt] < 0:
+                    self._out[nxt] = self._out[self._fail[nxt]]
+
+    def first(self, text):
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state] >= 0:
+                return out[state]
+        return -1
+
+    def match_values(self, values):
+        """문자열 목록 → 값마다 처음 일치한 키워드 번호 (int32, 없으면 -1)."""
+        if not self.keywords:
+            return np.full(len(values), -1, dtype=np.int32)
+        return np.fromiter((self.first(v) for v in values), dtype=np.int32, count=len(values))
+
+
+@functools.lru_cache(maxsize=64)
+def get_matcher(text):
+    """쉼표로 구분한 키워드 문자열 → KeywordMatcher (같은 목록은 한 번만 만든다)."""
+    return KeywordMatcher(parse_keywords(text))
+
+
+def factorize_text(df, col):
+    """
+    열 → (행별 고유값 번호, 고유 문자열 목록). 열이 없으면 모든 행이 ''.
+    결측은 str()과 같이 'nan'으로 다룬다 (astype(str) 후 검색하던 방식과 같은 결과).
+    """
+    if col not in df.columns:
+        return np.zeros(len(df), dtype=np.intp), ['']
+    series = df[col]
+    if isinstance(series.dtype, pd.CategoricalDtype) and not series.isna().any():
+        return series.cat.codes.to_numpy(), [str(u) for u in series.cat.categories]
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    return codes, [str(u) for u in uniques]
+
+
+def keyword_hits(columns):
+    """
+    columns: [(행별 고유값 번호, 고유값별 키워드 번호 match_values(uniques)), ...] (앞 열의 일치를 우선).
+    반환: 행마다 일치한 키워드 번호 (int32, 없으면 -1).
+    """
+    hits = None
+    for codes, per_unique in columns:
+        col_hits = per_unique[codes]
+        hits = col_hits if hits is None else np.where(hits >= 0, hits, col_hits)
+    return hits
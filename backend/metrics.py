@@ -0,0 +1,204 @@
+import os
+import time
+import threading
+import contextvars
+import tracemalloc
+from contextlib import contextmanager
+
+# 요청 단위 계측: 단계·조건별 소요 시간, AI 호출 지연·토큰 수, 요청별 메모리 최대치.
+# 누적 값은 Prometheus 텍스트 형식으로 /metrics에 내보내고,
+# METRICS_SERVER_TIMING=1이면 요청별 구간 시간을 Server-Timing 응답 헤더로도 붙인다.
+
+SERVER_TIMING = os.environ.get('METRICS_SERVER_TIMING', '0') == '1'
+# tracemalloc은 할당마다 비용이 들어 기본으로는 끈다. 켜면 요청마다 파이썬·numpy 할당 최대치를 잰다
+# (프로세스 전체 기준이라 동시에 처리 중인 요청의 할당도 섞인다)
+TRACE_MEMORY = os.environ.get('METRICS_TRACE_MEMORY', '0') == '1'
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTES_BUCKETS = tuple(2 ** p for p in range(20, 34, 2))     # 1MB ~ 8GB
+
+# 이름 → (종류, 설명, 버킷)
+FAMILIES = {
+    'entrychecker_requests_total': ('counter', '엔드포인트·상태 코드별 요청 수', None),
+    'entrychecker_request_seconds': ('histogram', '엔드포인트별 요청 처리 시간', SECONDS_BUCKETS),
+    'entrychecker_stage_seconds': ('histogram', '분석 단계별 소요 시간 (parse, to_numeric, format_rows, keywords, json 등)',
+                                   SECONDS_BUCKETS),
+    'entrychecker_rule_seconds': ('histogram', '조건(규칙 leaf) 하나의 mask 계산 시간', SECONDS_BUCKETS),
+    'entrychecker_ai_call_seconds': ('histogram', 'AI 모델 호출 지연 (재시도는 호출마다 따로)', SECONDS_BUCKETS),
+    'entrychecker_ai_tokens_total': ('counter', 'AI 모델 호출 토큰 수 (usage_metadata 기준)', None),
+    'entrychecker_ai_abandoned_calls_total': ('counter', '제한 시간을 넘겨 결과를 버린 AI 호출 수', None),
+    'entrychecker_ai_abandoned_calls_running': ('gauge', '제한 시간을 넘겨 버렸지만 아직 실행 중인 AI 호출 수', None),
+    'entrychecker_request_peak_memory_bytes': ('histogram', '요청 처리 중 할당 최대치 (METRICS_TRACE_MEMORY=1일 때)',
+                                               BYTES_BUCKETS),
+    'entrychecker_process_max_rss_bytes': ('gauge', '프로세스 최대 상주 메모리', None),
+    'entrychecker_ai_cache_lookups_total': ('counter', 'AI 응답 캐시 조회 수', None),
+    'entrychecker_dataset_store_lookups_total': ('counter', '업로드 파일의 데이터셋 저장소 조회 수', None),
+    'entrychecker_dataset_store_bytes': ('gauge', '데이터셋 저장소 파일 크기 합계', None),
+}
+
+
+class Registry:
+    """카운터·히스토그램 누적 값. 라벨은 키워드 인자로 받는다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}     # (이름, 라벨 튜플) → 카운터 값 또는 [버킷별 개수..., 합계, 개수]
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        buckets = FAMILIES[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self._values.get(key)
+            if h is None:
+                h = self._values[key] = [0] * (len(buckets) + 2)
+            for i, le in enumerate(buckets):
+                if value <= le:
+                    h[i] += 1
+            h[-2] += value
+            h[-1] += 1
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self, extra=()):
+        """Prometheus 텍스트 형식 (text/plain; version=0.0.4). extra: [(이름, 라벨 dict, 값)] 수집 시점 값."""
+        with self._lock:
+            values = {k: (list(v) if isinstance(v, list) else v) for k, v in self._values.items()}
+        for name, labels, value in extra:
+            values[(name, tuple(sorted(labels.items())))] = value
+        lines = []
+        for name, (kind, help_text, buckets) in FAMILIES.items():
+            series = sorted((k[1], v) for k, v in values.items() if k[0] == name)
+            if not series:
+                continue
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, v in series:
+                if kind != 'histogram':
+                    lines.append(f'{name}{_labels(labels)} {_num(v)}')
+                    continue
+                for le, count in zip(buckets, v):
+                    lines.append(f'{name}_bucket{_labels(labels + (("le", _num(le)),))} {count}')
+                lines.append(f'{name}_bucket{_labels(labels + (("le", "+Inf"),))} {v[-1]}')
+                lines.append(f'{name}_sum{_labels(labels)} {_num(v[-2])}')
+                lines.append(f'{name}_count{_labels(labels)} {v[-1]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escape = lambda s: str(s).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in labels) + '}'
+
+
+def _num(v):
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+registry = Registry()
+
+# 현재 요청의 구간 기록 [(이름, 초)]. 요청 밖(백그라운드 작업 등)에서는 None이고 누적 값만 남긴다
+_trace = contextvars.ContextVar('metrics_trace', default=None)
+
+
+def _record(name, seconds):
+    trace = _trace.get()
+    if trace is not None:
+        trace.append((name, seconds))
+
+
+@contextmanager
+def span(stage):
+    """with span('format_rows'): ... → 단계 소요 시간 기록."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        registry.observe('entrychecker_stage_seconds', dt, stage=stage)
+        _record(stage, dt)
+
+
+@contextmanager
+def rule_span(rule):
+    """조건 하나의 mask 계산 시간 (같은 요청의 같은 규칙은 Server-Timing에서 합친다)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        registry.observe('entrychecker_rule_seconds', dt, rule=str(rule))
+        _record(f'rule_{rule}', dt)
+
+
+def observe_ai_call(module, call):
+    """call()(모델의 generate_content 호출)의 지연·토큰 수를 기록하고 응답을 돌려준다."""
+    t0 = time.perf_counter()
+    status = 'error'
+    try:
+        response = call()
+        status = 'ok'
+    finally:
+        dt = time.perf_counter() - t0
+        registry.observe('entrychecker_ai_call_seconds', dt, module=module, status=status)
+        _record(f'ai_{module}', dt)
+    usage = getattr(response, 'usage_metadata', None)
+    for kind, attr in (('prompt', 'prompt_token_count'), ('output', 'candidates_token_count')):
+        count = getattr(usage, attr, None) if usage is not None else None
+        if count:
+            registry.inc('entrychecker_ai_tokens_total', int(count), module=module, kind=kind)
+    return response
+
+
+if TRACE_MEMORY and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+def begin_request():
+    """요청 시작: 구간 기록을 새로 열고 (시작 시각, 시작 시점 할당량)을 돌려준다."""
+    _trace.set([])
+    base = None
+    if TRACE_MEMORY:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    return time.perf_counter(), base
+
+
+def end_request(state, endpoint, status):
+    """요청 끝: 누적 값을 기록하고 이 요청의 구간 목록 [(이름, 초)]을 돌려준다."""
+    t0, base = state
+    dt = time.perf_counter() - t0
+    registry.inc('entrychecker_requests_total', endpoint=endpoint, status=str(status))
+    registry.observe('entrychecker_request_seconds', dt, endpoint=endpoint)
+    if base is not None:
+        registry.observe('entrychecker_request_peak_memory_bytes',
+                         max(tracemalloc.get_traced_memory()[1] - base, 0), endpoint=endpoint)
+    entries = _trace.get() or []
+    _trace.set(None)
+    return entries + [('total', dt)]
+
+
+def server_timing(entries):
+    """[(이름, 초)] → Server-Timing 헤더 값. 같은 이름은 합치고 기록 순서를 유지한다."""
+    totals = {}
+    for name, seconds in entries:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ', '.join(f'{name};dur={seconds * 1000:.1f}' for name, seconds in totals.items())
+
+
+def process_gauges():
+    """수집 시점 값 (render의 extra)."""
+    try:
+        import resource
+        # 리눅스의 ru_maxrss는 KB 단위
+        return [('entrychecker_process_max_rss_bytes', {},
+                 resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)]
+    except ImportError:
+        return []
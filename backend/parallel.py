@@ -0,0 +1,216 @@
+import os
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from backend.analyzer import RuleContext, evaluate_plan, eval_rule, DATASET_RULES
+from backend.rule_plan import iter_leaves
+
+# 병렬 평가 설정: 작업 프로세스 수(1 = 사용 안 함)와 병렬로 돌릴 최소 행 수
+WORKERS = int(os.environ.get('ANALYZE_WORKERS', 1))
+MIN_ROWS = int(os.environ.get('ANALYZE_PARALLEL_MIN_ROWS', 200_000))
+# 작업 프로세스 시작 방식. 서버는 요청·작업 스레드 여러 개에서 분석을 돌리므로, 다른 스레드가 잠금을 잡은 채
+# fork되면 자식이 그 잠금에서 멈출 수 있다. 기본은 forkserver(없으면 spawn)이고, 'fork'는 단일 스레드로 돌릴 때
+# (명령줄 등)만 쓴다. 어느 방식이든 열은 공유 메모리로 넘기므로 입력 크기만큼 직렬화하지 않는다.
+# forkserver/spawn 작업 프로세스는 실행한 스크립트를 다시 import하므로, 병렬 분석을 부르는 스크립트는
+# 진입 코드를 `if __name__ == '__main__':` 아래에 두어야 한다 (backend.cli, benchmarks 스크립트처럼).
+START_METHOD = os.environ.get('ANALYZE_PARALLEL_START_METHOD', 'forkserver')
+
+# (시작 방식, 작업 프로세스 수) → 프로세스 풀. 처음 쓸 때 만들고 프로세스가 끝날 때까지 재사용한다.
+# 작업은 입력을 인자(공유 메모리 이름)로만 받으므로 여러 스레드의 분석이 한 풀을 같이 써도 섞이지 않는다.
+_POOLS = {}
+_POOL_LOCK = threading.Lock()
+
+
+def _context():
+    methods = mp.get_all_start_methods()
+    method = START_METHOD if START_METHOD in methods else 'forkserver' if 'forkserver' in methods else 'spawn'
+    ctx = mp.get_context(method)
+    if method == 'forkserver':
+        # 작업 프로세스마다 pandas·분석 모듈을 다시 import하지 않도록 forkserver에 미리 올려 둔다
+        ctx.set_forkserver_preload(['backend.parallel'])
+    return ctx
+
+
+def _pool(workers):
+    ctx = _context()
+    key = (ctx.get_start_method(), workers)
+    with _POOL_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = _POOLS[key] = ProcessPoolExecutor(workers, mp_context=ctx)
+    return key, pool
+
+
+def _discard_pool(key, pool):
+    """작업 프로세스가 죽어 못 쓰게 된 풀은 버리고 다음 호출에서 새로 만든다."""
+    with _POOL_LOCK:
+        if _POOLS.get(key) is pool:
+            del _POOLS[key]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pools():
+    """재사용 중인 프로세스 풀을 모두 닫는다 (테스트·종료 처리용)."""
+    with _POOL_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.shutdown()
+
+
+def _local_ids(vid):
+    """분할 안에서 0부터 다시 매긴 전표세트 ID (-1은 유지)."""
+    local = np.full(len(vid), -1, dtype=np.int64)
+    valid = vid >= 0
+    local[valid] = pd.factorize(vid[valid])[0]
+    return local
+
+
+def partition_rows(vid, n_rows, n_parts):
+    """전표세트가 쪼개지지 않도록 전표세트 ID 기준으로 행 위치를 n_parts개로 나눈다."""
+    if vid is None:
+        return np.array_split(np.arange(n_rows), n_parts)
+    bucket = np.where(vid >= 0, vid % n_parts, 0)
+    return [np.flatnonzero(bucket == k) for k in range(n_parts)]
+
+
+def _share(arrays):
+    """
+    배열들을 공유 메모리 블록 하나에 이어 붙여 복사한다.
+    반환: (SharedMemory, {이름: (dtype, shape, offset)}) — 작업 프로세스는 이름과 배치만 받아 붙는다.
+    """
+    layout, size = {}, 0
+    for name, a in arrays.items():
+        layout[name] = (a.dtype.str, a.shape, size)
+        size += -(-a.nbytes // 8) * 8
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for name, a in arrays.items():
+        dtype, shape, offset = layout[name]
+        np.ndarray(shape, dtype, buffer=shm.buf, offset=offset)[...] = a
+    return shm, layout
+
+
+def _shared_columns(df):
+    """
+    DataFrame 열 → (공유할 배열, 열 정보, 직렬화해서 넘길 열).
+    숫자·날짜 열은 값, category 열은 정수 코드를 공유하고, 그 밖의 열(문자열 등)만 분할별로 직렬화한다.
+    """
+    arrays, columns, objects = {}, [], []
+    for i, name in enumerate(df.columns):
+        col = df.iloc[:, i]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            arrays[f'col{i}'] = col.cat.codes.to_numpy()
+            columns.append((name, 'category', col.dtype))
+        elif isinstance(col.dtype, np.dtype) and col.dtype.kind in 'biufmM':
+            arrays[f'col{i}'] = col.to_numpy()
+            columns.append((name, 'shared', None))
+        else:
+            columns.append((name, 'object', None))
+            objects.append(i)
+    return arrays, columns, objects
+
+
+def _gather(buf, layout, columns, objects, index, bounds):
+    """공유 메모리에서 이 분할의 행만 모아 DataFrame과 컨텍스트 입력을 만든다 (결과는 공유 메모리를 참조하지 않는다)."""
+    arrays = {name: np.ndarray(shape, dtype, buffer=buf, offset=offset)
+              for name, (dtype, shape, offset) in layout.items()}
+    pos = arrays['pos'][bounds[0]:bounds[1]]
+    idx = pd.Index(index[0] + index[1] * pos) if isinstance(index, tuple) else index     # (start, step)이면 RangeIndex
+    data = {}
+    for i, (name, kind, dtype) in enumerate(columns):
+        if kind == 'category':
+            data[name] = pd.Categorical.from_codes(arrays[f'col{i}'][pos], dtype=dtype)
+        elif kind == 'shared':
+            data[name] = arrays[f'col{i}'][pos]
+        else:
+            data[name] = objects[i]
+    df = pd.DataFrame(data, index=idx, copy=False)
+    memo = {}
+    if 'dates' in arrays:
+        memo['dates'] = pd.Series(arrays['dates'][pos], index=idx)
+    vid = _local_ids(arrays['vid'][pos]) if 'vid' in arrays else None
+    party_freq = pd.Series(arrays['party_freq'][pos], index=idx) if 'party_freq' in arrays else None
+    leaf_masks = {name[5:]: arrays[name][pos] for name in layout if name.startswith('leaf:')}
+    return df, vid, party_freq, memo, leaf_masks
+
+
+def _run_partition(block, layout, columns, objects, index, bounds, plan, short_circuit):
+    shm = shared_memory.SharedMemory(name=block)
+    try:
+        df, vid, party_freq, memo, leaf_masks = _gather(shm.buf, layout, columns, objects, index, bounds)
+    finally:
+        shm.close()
+    ctx = RuleContext(df, vid=vid, party_freq=party_freq, memo=memo, leaf_masks=leaf_masks)
+    return evaluate_plan(plan, ctx, short_circuit)
+
+
+def evaluate_parallel(df, plan, vid, workers, short_circuit=False, memo=None):
+    """
+    전표세트 단위로 행을 나눠 프로세스 풀에서 계획을 평가하고 결과를 원래 행 순서로 합친다.
+    반환 형식은 analyzer.evaluate_plan과 같다.
+    전표세트 안에서 끝나는 규칙은 분할별로 계산해도 같고, 전표세트를 넘나드는 거래처 빈도와
+    계정·거래처 단위 통계 규칙(DATASET_RULES)만 미리 전체로 계산한다.
+    열과 전체 기준 중간 결과는 호출마다 공유 메모리 블록 하나에 두고, 작업 프로세스는 거기서 자기 분할만 읽는다.
+    memo(데이터셋 메모)에 이미 있는 조건 mask는 다시 계산하지 않고, 새로 계산한 mask는 메모에 남긴다
+    (short_circuit이면 평가된 행의 일치만 있으므로 남기지 않는다).
+    """
+    full = RuleContext(df, vid, memo=memo)
+    leaf_masks = {}
+    for leaf in iter_leaves(plan):
+        key = leaf['key']
+        if leaf['node'].get('rule') in DATASET_RULES:
+            leaf_masks[key] = eval_rule(df, leaf['node'], full).to_numpy(dtype=bool)
+        elif (stored := full.stored_leaf(key)) is not None:
+            leaf_masks[key] = stored
+    if all(leaf['key'] in leaf_masks for leaf in iter_leaves(plan)):
+        return evaluate_plan(plan, full, short_circuit)     # 결합만 남았으면 프로세스 풀을 쓰지 않는다
+
+    parts = [p for p in partition_rows(vid, len(df), workers) if len(p)]
+    arrays, columns, objects = _shared_columns(df)
+    arrays['pos'] = np.concatenate(parts)
+    if vid is not None:
+        arrays['vid'] = vid
+    if '거래처코드' in df.columns and any(l['node'].get('rule') == 'party_freq' for l in iter_leaves(plan)):
+        arrays['party_freq'] = full.party_freq.to_numpy(dtype=np.float64)
+    dates = full.stored_dates
+    if dates is not None and isinstance(dates.dtype, np.dtype):     # datetime64 (시간대가 붙은 날짜는 작업에서 다시 파싱)
+        arrays['dates'] = dates.to_numpy()
+    arrays.update({f'leaf:{key}': m for key, m in leaf_masks.items()})
+    index = (df.index.start, df.index.step) if isinstance(df.index, pd.RangeIndex) else None
+
+    shm, layout = _share(arrays)
+    del arrays
+    key, pool = _pool(workers)
+    try:
+        futures, start = [], 0
+        for p in parts:
+            part_objects = {i: df.iloc[:, i].array[p] for i in objects}
+            futures.append(pool.submit(_run_partition, shm.name, layout, columns, part_objects,
+                                       index if index is not None else df.index[p],
+                                       (start, start + len(p)), plan, short_circuit))
+            start += len(p)
+        results = [f.result() for f in futures]
+    except BrokenProcessPool:
+        _discard_pool(key, pool)
+        raise
+    finally:
+        shm.close()
+        shm.unlink()
+
+    final_mask = np.zeros(len(df), dtype=bool)
+    hits = {}
+    for pos, (part_mask, part_hits) in zip(parts, results):
+        final_mask[pos] = part_mask
+        for no, m in part_hits.items():
+            hits.setdefault(no, np.zeros(len(df), dtype=bool))[pos] = m
+    if memo is not None and not short_circuit:
+        for leaf in iter_leaves(plan):
+            if leaf['key'] not in leaf_masks:
+                full.leaf_mask(leaf['key'], lambda: hits[leaf['node']['_no']])
+    return final_mask, hits
@@ -0,0 +1,126 @@
+import os
+import json
+import math
+
+# AI 전표세트 분석 프롬프트에 넣을 전표 목록을 토큰 예산에 맞춰 배치로 나눈다.
+# 전표마다 빈 항목·전표 단위로 이미 있는 열을 뺀 compact JSON으로 만들고 토큰 수를 추정해,
+# 예산(TOKEN_BUDGET)과 배치당 최대 전표 수를 넘지 않는 한 한 요청에 최대한 담는다.
+# 혼자서도 예산을 넘는 전표는 계정과목별 합계로 요약해 넣는다 (분석 결과는 전표당 하나로 유지).
+
+TOKEN_BUDGET = int(os.environ.get('AI_PROMPT_TOKEN_BUDGET', 6000))   # 요청 하나에 넣는 전표 목록의 추정 토큰 수
+ENTRY_KEY_COLUMNS = ('전표일자', '전표번호')    # 전표 단위 date/voucherNo와 같은 값이라 분개마다 반복하지 않는다
+AMOUNT_COLUMNS = ('차변금액', '대변금액')
+ID_TOKENS = 4                                   # 배치 안에서 붙이는 "id":N, 몫
+
+
+def estimate_tokens(text):
+    """
+    토큰 수 추정 (보수적으로). ASCII는 4글자에 1토큰, 한글 등 그 밖의 문자는 1글자에 1토큰으로 센다.
+    """
+    n_ascii = len(text.encode('ascii', 'ignore'))
+    return (n_ascii + 3) // 4 + (len(text) - n_ascii)
+
+
+def compact_json(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+def _is_empty(value):
+    return value is None or value == '' or (isinstance(value, float) and math.isnan(value))
+
+
+def _compact_value(value):
+    # 1500000.0 → 1500000 (소수점 아래가 없는 금액은 정수로)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def compact_entry(entry):
+    """분개 하나 → 빈 값과 전표 키 열을 뺀 dict (열 순서 유지)."""
+    return {k: _compact_value(v) for k, v in entry.items()
+            if k not in ENTRY_KEY_COLUMNS and not _is_empty(v)}
+
+
+def _amount(entry, col):
+    value = entry.get(col)
+    return 0 if _is_empty(value) else value
+
+
+def summarize_entries(entries, budget):
+    """
+    분개 목록 → 계정과목별 합계 요약. 금액 합이 큰 계정부터 예산 안에 들어가는 만큼만 남기고
+    나머지는 개수만 적는다 (같은 입력이면 항상 같은 결과).
+    """
+    by_account = {}
+    for entry in entries:
+        account = entry.get('계정과목', entry.get('계정코드', ''))
+        account = '' if _is_empty(account) else str(account)
+        row = by_account.setdefault(account, {'계정과목': account, '차변금액': 0, '대변금액': 0, '건수': 0})
+        row['차변금액'] += _amount(entry, '차변금액')
+        row['대변금액'] += _amount(entry, '대변금액')
+        row['건수'] += 1
+    rows = sorted(by_account.values(),
+                  key=lambda r: (-(abs(r['차변금액']) + abs(r['대변금액'])), r['계정과목']))
+    rows = [{k: _compact_value(v) for k, v in r.items()} for r in rows]
+
+    summary = {
+        'entryCount': len(entries),
+        'debitTotal': _compact_value(sum(_amount(e, '차변금액') for e in entries)),
+        'creditTotal': _compact_value(sum(_amount(e, '대변금액') for e in entries)),
+        'summary': [],
+    }
+    used = estimate_tokens(compact_json(summary)) + estimate_tokens(',"omittedAccounts":0000')
+    for row in rows:
+        cost = estimate_tokens(compact_json(row)) + 1
+        if summary['summary'] and used + cost > budget:
+            break
+        summary['summary'].append(row)
+        used += cost
+    omitted = len(rows) - len(summary['summary'])
+    if omitted:
+        summary['omittedAccounts'] = omitted
+    return summary
+
+
+def voucher_payload(voucher, budget=TOKEN_BUDGET):
+    """
+    전표세트 → 프롬프트에 넣을 dict (id 제외). 분개를 compact하게 넣되,
+    그래도 예산을 넘으면 분개 대신 summarize_entries 요약을 넣는다.
+    """
+    payload = {
+        'date': voucher['date'], 'voucherNo': voucher['voucherNo'],
+        'is_balanced': voucher['is_balanced'],
+        'entries': [compact_entry(e) for e in voucher['entries']],
+    }
+    if payload_tokens(payload) <= budget:
+        return payload
+    head = {k: payload[k] for k in ('date', 'voucherNo', 'is_balanced')}
+    return {**head, **summarize_entries(voucher['entries'], budget - payload_tokens(head))}
+
+
+def payload_tokens(payload):
+    return estimate_tokens(compact_json(payload)) + ID_TOKENS
+
+
+def pack_batches(costs, budget=TOKEN_BUDGET, max_items=None):
+    """
+    전표별 추정 토큰 수 → 배치 목록 [[전표 위치, ...], ...].
+    순서를 유지하며 앞에서부터 채우고, 예산이나 max_items를 넘기 직전에 다음 배치로 넘어간다.
+    모든 위치는 정확히 한 배치에 한 번 들어간다.
+    """
+    batches, current, used = [], [], 0
+    for i, cost in enumerate(costs):
+        if current and (used + cost > budget or (max_items and len(current) >= max_items)):
+            batches.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def batch_json(payloads):
+    """배치 안의 전표 dict 목록 → id(1부터)를 붙인 compact JSON 배열."""
+    return compact_json([{'id': idx + 1, **p} for idx, p in enumerate(payloads)])
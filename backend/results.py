@@ -0,0 +1,88 @@
+import numpy as np
+
+from backend.analyzer import voucher_ids, to_numeric_amounts, format_rows, VOUCHER_KEY
+from backend.serialize import frame_records
+
+# 한 번에 내려 주는 최대 행 수
+PAGE_LIMIT_MAX = 1000
+
+
+def make_result(df, final_mask, bits, keywords=None, vid=None):
+    """
+    캐시에 보관할 분석 결과 (dataset_cache.put_result). keywords: analyzer.keyword_details 결과.
+    전표세트 확장 강조와 강조 행 위치도 여기서 미리 계산해 둔다. 캐시에 넣은 뒤에는 읽기만 하므로
+    여러 요청이 잠금 없이 같이 읽고, 크기도 처음부터 메모리 예산에 들어간다.
+    vid: 데이터셋 메모의 전표세트 ID (없으면 전표세트 키 열이 있을 때 새로 구한다).
+    """
+    result = {'final': final_mask, 'bits': bits, 'keywords': keywords or {},
+              'positions': np.flatnonzero(final_mask)}
+    if vid is None and set(VOUCHER_KEY) <= set(df.columns):
+        vid = voucher_ids(df)
+    if vid is not None:
+        valid = vid >= 0
+        flagged_sets = np.zeros(int(vid.max()) + 1 if valid.any() else 0, dtype=bool)
+        flagged_sets[vid[final_mask & valid]] = True
+        result['expanded'] = final_mask | (valid & flagged_sets[np.where(valid, vid, 0)])
+        result['positions_expanded'] = np.flatnonzero(result['expanded'])
+    return result
+
+
+def _matched_keywords(result, pos):
+    """행 위치 배열 → 행마다 일치한 키워드 목록 (키워드 조건이 없거나 일치하지 않으면 빈 목록)."""
+    out = [[] for _ in range(len(pos))]
+    for keywords, rows, index in result.get('keywords', {}).values():
+        j = np.minimum(np.searchsorted(rows, pos), max(len(rows) - 1, 0))
+        found = (rows[j] == pos) if len(rows) else np.zeros(len(pos), dtype=bool)
+        for k in np.flatnonzero(found):
+            kw = keywords[index[j[k]]]
+            if kw not in out[k]:
+                out[k].append(kw)
+    return out
+
+
+def highlight_mask(result, expand_sets=False):
+    """강조할 행. expand_sets면 일치한 행이 속한 전표세트 전체 (전표세트 키가 없으면 일치한 행만)."""
+    if expand_sets and 'expanded' in result:
+        return result['expanded']
+    return result['final']
+
+
+def _view_positions(result, expand_sets):
+    if expand_sets and 'expanded' in result:
+        return result['positions_expanded']
+    return result['positions']
+
+
+def get_page(df, result=None, offset=0, limit=200, flagged_only=False, expand_sets=False):
+    """
+    행 구간 하나를 화면용 레코드로. 각 레코드에는 원래 행 위치 '__idx'가 붙고,
+    분석 결과가 있으면 강조 여부 '__hi'와, 키워드 조건에 일치한 행이면 그 키워드 목록 '__kw'가 붙는다
+    (분석 결과가 있으면 금액 열은 천 단위 구분 문자열. 결측은 None).
+    flagged_only면 강조된 행만 모은 목록에서 offset/limit을 적용한다.
+    """
+    offset = max(0, int(offset))
+    limit = max(0, min(int(limit), PAGE_LIMIT_MAX))
+    hi = None if result is None else highlight_mask(result, expand_sets)
+
+    if hi is not None and flagged_only:
+        positions = _view_positions(result, expand_sets)
+        total = len(positions)
+        pos = positions[offset:offset + limit]
+    else:
+        total = len(df)
+        pos = np.arange(offset, min(total, offset + limit))
+
+    chunk = df.iloc[pos]
+    records = frame_records(chunk) if result is None else format_rows(to_numeric_amounts(chunk))
+    matched = _matched_keywords(result, pos) if result is not None else None
+    for k, (rec, p) in enumerate(zip(records, pos.tolist())):
+        rec['__idx'] = p
+        if hi is not None:
+            rec['__hi'] = bool(hi[p])
+        if matched and matched[k]:
+            rec['__kw'] = matched[k]
+
+    page = {'total': int(total), 'offset': offset, 'rows': records}
+    if hi is not None:
+        page['highlighted'] = int(hi.sum())
+    return page
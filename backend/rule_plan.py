@@ -0,0 +1,93 @@
+import json
+import numpy as np
+
+# build_rule_tree가 만든 트리를 실행 계획으로 바꾸고 실행한다.
+# 계획의 노드는 둘 중 하나:
+#   {'key': 조건 식별자, 'node': 원래 조건 노드}          ← 잎(조건)
+#   {'op': 'AND' | 'OR', 'items': [하위 계획, ...]}     ← 그룹
+# 같은 key의 조건은 한 번만 계산되고, rule_map에는 조건 노드마다 자기 번호가 기록된다.
+
+_NON_PARAM_KEYS = ('_no', 'id', 'type')
+
+
+def leaf_key(node):
+    """규칙 이름 + 파라미터가 같으면 같은 key (UI용 id, 규칙 번호는 무시)."""
+    params = {k: v for k, v in node.items() if k not in _NON_PARAM_KEYS}
+    return json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def compile_plan(tree):
+    """
+    트리 정규화:
+      - 같은 연산자의 중첩 그룹은 펼치고, 항목이 하나인 그룹은 그 항목으로 대체
+      - 빈 그룹/빈 노드는 항상 False인 빈 그룹으로 남긴다 (AND에서 결과에 영향을 주므로)
+    """
+    if not tree:
+        return {'op': 'OR', 'items': []}
+    if tree.get('type') == 'cond':
+        return {'key': leaf_key(tree), 'node': tree}
+
+    op = 'OR' if tree.get('op', 'AND').upper() == 'OR' else 'AND'
+    items = []
+    for child in (compile_plan(it) for it in tree.get('items', [])):
+        if child.get('op') == op and child['items']:
+            items.extend(child['items'])
+        else:
+            items.append(child)
+    if len(items) == 1:
+        return items[0]
+    return {'op': op, 'items': items}
+
+
+def iter_leaves(plan):
+    if 'key' in plan:
+        yield plan
+    else:
+        for it in plan['items']:
+            yield from iter_leaves(it)
+
+
+def execute_plan(plan, n_rows, leaf_mask, on_leaf=None, short_circuit=False):
+    """
+    계획을 실행해 최종 bool 배열(길이 n_rows)을 돌려준다.
+
+    leaf_mask(node, pos) : 조건 노드의 mask. pos가 None이면 전체 행, 아니면 그 위치의 행만 (길이 len(pos))
+    on_leaf(node, mask)  : 조건마다 일치한 행 mask로 호출 (rule_map 기록용)
+    short_circuit        : True면 AND는 아직 True인 행, OR는 아직 False인 행만 다음 조건을 평가한다.
+                           이때 rule_map에는 실제로 평가된 행의 일치만 기록된다.
+    """
+    full_masks = {}
+
+    def leaf(p, active):
+        full = full_masks.get(p['key'])
+        if full is None and (active is None or not short_circuit):
+            full = full_masks[p['key']] = np.asarray(leaf_mask(p['node'], None), dtype=bool)
+        if full is not None:
+            m = full if active is None else full & active
+        else:
+            pos = np.flatnonzero(active)
+            m = np.zeros(n_rows, dtype=bool)
+            if len(pos):
+                m[pos] = np.asarray(leaf_mask(p['node'], pos), dtype=bool)
+        if on_leaf is not None:
+            on_leaf(p['node'], m)
+        return m
+
+    def run(p, active):
+        if 'key' in p:
+            return leaf(p, active)
+        if not p['items']:
+            return np.zeros(n_rows, dtype=bool)
+        first, rest = p['items'][0], p['items'][1:]
+        everything = np.ones(n_rows, dtype=bool) if active is None else active
+        if p['op'] == 'OR':
+            result = run(first, active).copy()
+            for child in rest:
+                result |= run(child, (everything & ~result) if short_circuit else active)
+            return result
+        result = run(first, active) & everything
+        for child in rest:
+            result &= run(child, result if short_circuit else active)
+        return result
+
+    return run(plan, None)
@@ -0,0 +1,100 @@
+import math
+import json
+import numpy as np
+import pandas as pd
+
+try:  # 있으면 빠른 인코더를 쓴다 (선택 설치: pip install orjson)
+    import orjson
+except ImportError:
+    orjson = None
+
+# 응답 직렬화: 결측·무한대는 열 단위로 None으로 바꾸고, 금액은 고유값만 문자열로 만든 뒤 펼친다.
+# 이렇게 만든 레코드는 NaN이 없으므로 응답 전체를 재귀로 훑는 clean_nan 없이 바로 인코딩한다.
+
+AMOUNT_COLUMNS = ('차변금액', '대변금액')
+STREAM_CHUNK_ITEMS = 2000    # 긴 목록은 이 개수씩 인코딩해 응답 본문을 조각으로 보낸다
+
+
+def clean_nan(obj):
+    """dict/list 안의 NaN·무한대 float → None (인코더가 NaN을 만나면 쓰는 느린 대체 경로)."""
+    if isinstance(obj, dict): return {k: clean_nan(v) for k, v in obj.items()}
+    if isinstance(obj, list): return [clean_nan(v) for v in obj]
+    if isinstance(obj, float) and (math.isnan(obj) or math.isinf(obj)): return None
+    return obj
+
+
+def format_amounts(values):
+    """숫자 배열 → 천 단위 구분 문자열 배열 (f"{int(round(v)):,}"와 같은 값, 고유값마다 한 번만 포맷)."""
+    codes, uniques = pd.factorize(np.asarray(values, dtype=np.float64), use_na_sentinel=False)
+    labels = np.array([f"{int(round(v)):,}" for v in uniques.tolist()], dtype=object)
+    return labels[codes]
+
+
+def column_values(series):
+    """열 → 파이썬 값 목록. 결측·무한대는 None."""
+    values = series.to_numpy(dtype=object)
+    if series.dtype.kind == 'f':
+        missing = ~np.isfinite(series.to_numpy(dtype=np.float64, na_value=np.nan))
+    else:
+        missing = series.isna().to_numpy()
+    if missing.any():
+        values[missing] = None
+    return values.tolist()
+
+
+def frame_records(df, amount_columns=()):
+    """
+    DataFrame → to_dict('records') 형식의 레코드 목록 (결측·무한대는 None).
+    amount_columns에 있는 열은 천 단위 구분 문자열로 바꾼다 (format_amounts).
+    """
+    columns = list(df.columns)
+    arrays = [format_amounts(df[col]).tolist() if col in amount_columns else column_values(df[col])
+              for col in columns]
+    return [dict(zip(columns, row)) for row in zip(*arrays)]
+
+
+def _dumps_bytes(obj):
+    if orjson is not None:
+        try:
+            # orjson은 NaN·무한대를 null로 쓴다
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:     # 64비트를 넘는 정수 등 orjson이 못 쓰는 값은 표준 json으로
+            pass
+    try:
+        text = json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+    except ValueError:        # NaN이 섞인 값만 clean_nan을 거친다
+        text = json.dumps(clean_nan(obj), ensure_ascii=False, separators=(',', ':'))
+    return text.encode('utf-8')
+
+
+def dumps(obj):
+    """JSON 문자열 (NaN·무한대는 null)."""
+    return _dumps_bytes(obj).decode('utf-8')
+
+
+def iter_json(obj, chunk_items=STREAM_CHUNK_ITEMS):
+    """
+    dict 응답 → JSON 본문 조각(bytes). 최상위 값 중 긴 목록(rows 등)은 chunk_items개씩 나눠 인코딩해
+    응답 전체를 한 문자열로 만들지 않고 보낸다.
+    긴 목록이 아닌 값과 긴 목록의 첫 조각은 첫 조각(b'{')을 내보내기 전에 모두 인코딩한다. 그래서 인코딩 오류는
+    첫 next()에서 나고, 호출한 쪽은 상태 코드를 보내기 전에 오류 응답으로 바꿀 수 있다 (app.json_response).
+    나머지 조각은 frame_records 레코드처럼 이미 JSON 값만 든 목록이어야 한다 (보내는 도중에는 되돌릴 수 없다).
+    """
+    if not isinstance(obj, dict):
+        yield _dumps_bytes(obj)
+        return
+    parts = []   # (미리 인코딩한 조각, 이어서 나눠 인코딩할 긴 목록 또는 None)
+    for i, (key, value) in enumerate(obj.items()):
+        head = (b',' if i else b'') + _dumps_bytes(str(key)) + b':'
+        if isinstance(value, list) and len(value) > chunk_items:
+            parts.append((head + b'[' + _dumps_bytes(value[:chunk_items])[1:-1], value))
+        else:
+            parts.append((head + _dumps_bytes(value), None))
+    yield b'{'
+    for encoded, rest in parts:
+        yield encoded
+        if rest is not None:
+            for start in range(chunk_items, len(rest), chunk_items):
+                yield b',' + _dumps_bytes(rest[start:start + chunk_items])[1:-1]
+            yield b']'
+    yield b'}'
@@ -0,0 +1,223 @@
+import numpy as np
+import pandas as pd
+
+from backend.analyzer import (
+    VOUCHER_KEY, DATASET_RULES, RuleContext, build_rule_tree, eval_rule, compare, to_numeric_amounts, format_rows,
+    rule_bits, encode_rule_map, keyword_details, encode_keyword_details,
+)
+from backend.rule_plan import compile_plan, execute_plan, iter_leaves, leaf_key
+
+# 전표세트 단위 규칙: 전체 데이터를 본 뒤에야 판정할 수 있으므로 1차 패스에서 집계한다
+SET_RULES = {'unbalanced_set', 'uniform_account', 'party_freq'}
+# 통계 규칙(DATASET_RULES)이 쓰는 열. 1차 패스에서 조건에 필요한 열만 모아 전체 기준 mask를 만든다.
+# 통계 규칙은 데이터셋 전체를 봐야 하므로 이 부분은 행 수에 비례한 메모리가 든다: 금액 2열(float64)과
+# 텍스트 열의 category 코드(행당 1~4바이트)뿐이고, 적요 등 나머지 열과 결과 행은 모으지 않는다.
+DATASET_RULE_COLUMNS = ['전표일자', '전표번호', '계정과목', '계정코드', '거래처코드', '차변금액', '대변금액']
+
+
+def iter_frame_chunks(df, chunksize=200_000):
+    """이미 메모리에 있는 DataFrame을 chunk로 나눈다 (analyze_journal_chunked 입력용)."""
+    return lambda: (df.iloc[i:i + chunksize] for i in range(0, len(df), chunksize))
+
+
+def _rules_in(tree, found=None):
+    found = set() if found is None else found
+    if tree:
+        if tree.get('type') == 'cond':
+            found.add(tree.get('rule'))
+        for it in tree.get('items', []):
+            _rules_in(it, found)
+    return found
+
+
+def _dataset_columns(nodes, cols):
+    """dataset_nodes가 실제로 쓰는 열 (계정 통계: 계정 열·금액, 중복 입력: 거래처코드·전표 키·금액)."""
+    rules = {node.get('rule') for node in nodes}
+    need = {'차변금액', '대변금액'}
+    if rules & {'benford', 'amount_outlier'}:
+        need.add('계정과목' if '계정과목' in cols or '계정코드' not in cols else '계정코드')
+    if 'duplicate_entry' in rules:
+        need.update(['거래처코드'] + VOUCHER_KEY)
+    return [c for c in DATASET_RULE_COLUMNS if c in need and c in cols]
+
+
+def _compact_columns(chunk, columns):
+    """chunk → 통계 규칙용 열만 (금액은 float64, 텍스트는 category)."""
+    part = to_numeric_amounts(chunk[columns])
+    for col in columns:
+        if col not in ('차변금액', '대변금액'):
+            part[col] = part[col].astype('category')
+    return part
+
+
+def _concat_compact(parts):
+    """chunk별 compact 열 → 하나의 DataFrame. category는 chunk마다 범주가 달라 union_categoricals로 합친다."""
+    data = {}
+    for col in parts[0].columns:
+        if isinstance(parts[0][col].dtype, pd.CategoricalDtype):
+            data[col] = pd.api.types.union_categoricals([p[col] for p in parts])
+        else:
+            data[col] = np.concatenate([p[col].to_numpy() for p in parts])
+    return pd.DataFrame(data)
+
+
+def _fold_sums(total, chunk):
+    """전표세트별 차/대변 합계에 chunk의 합계를 더한다 (전표세트 수만큼만 남는다)."""
+    part = to_numeric_amounts(chunk).groupby(VOUCHER_KEY, observed=True)[['차변금액', '대변금액']].sum()
+    if total is None:
+        return part
+    return pd.concat([total, part]).groupby(level=[0, 1], observed=True).sum()
+
+
+def _fold_accounts(state, chunk):
+    """
+    전표세트별 (처음 본 계정과목, 계정이 섞였는지)에 chunk를 합친다.
+    (전표세트, 계정과목) 쌍을 모두 들고 있지 않고 전표세트마다 한 행만 남긴다.
+    """
+    grouped = chunk.groupby(VOUCHER_KEY, observed=True)['계정과목']
+    part = pd.DataFrame({'account': grouped.first().astype(object), 'mixed': grouped.nunique() > 1})
+    if state is None:
+        return part
+    both = pd.concat([state, part])
+    merged = both.groupby(level=[0, 1], observed=True)
+    return pd.DataFrame({'account': merged['account'].first(),
+                         'mixed': merged['mixed'].any() | (merged['account'].nunique() > 1)})
+
+
+def _fold_parties(pairs, chunk):
+    """서로 다른 (거래처코드, 전표세트) 쌍에 chunk의 쌍을 더한다 (chunk마다 중복을 지운다)."""
+    part = chunk[['거래처코드'] + VOUCHER_KEY].dropna(subset=['거래처코드']).astype(object).drop_duplicates()
+    if pairs is None:
+        return part
+    return pd.concat([pairs, part], ignore_index=True).drop_duplicates()
+
+
+def collect_set_aggregates(chunks, rules, dataset_nodes=()):
+    """
+    1차 패스: chunk를 읽을 때마다 전표세트 집계에 합쳐 넣는다.
+      - unbalanced_set : 차/대변 합이 다른 전표세트 키 (MultiIndex)
+      - uniform_account: 계정과목이 한 종류뿐인 전표세트 키 (MultiIndex)
+      - party_freq     : 거래처코드 → 전표세트 수 (Series)
+      - dataset        : dataset_nodes(DATASET_RULES 조건 노드)의 leaf_key → 전체 행 bool 배열
+                         (조건에 필요한 열만 compact하게 모아 계산한다, DATASET_RULE_COLUMNS 참고)
+    집계는 행 수가 아니라 전표세트 수(거래처 빈도는 서로 다른 거래처·전표세트 쌍 수)만큼만 남는다.
+    필요한 열이 없는 규칙은 결과에 넣지 않는다 (= 전부 False).
+    """
+    sums = accounts = parties = None
+    columns = []
+    for chunk in chunks():
+        cols = set(chunk.columns)
+        if dataset_nodes:
+            columns.append(_compact_columns(chunk, _dataset_columns(dataset_nodes, cols)))
+        if 'unbalanced_set' in rules and set(VOUCHER_KEY) <= cols:
+            sums = _fold_sums(sums, chunk)
+        if 'uniform_account' in rules and set(VOUCHER_KEY + ['계정과목']) <= cols:
+            accounts = _fold_accounts(accounts, chunk)
+        if 'party_freq' in rules and '거래처코드' in cols:
+            parties = _fold_parties(parties, chunk)
+
+    agg = {}
+    if sums is not None:
+        agg['unbalanced_set'] = sums.index[sums['차변금액'] != sums['대변금액']]
+    if accounts is not None:
+        agg['uniform_account'] = accounts.index[~accounts['mixed'] & accounts['account'].notna()]
+    if parties is not None:
+        agg['party_freq'] = parties.groupby('거래처코드').size()
+    if columns:
+        frame = _concat_compact(columns)
+        del columns
+        ctx = RuleContext(frame)
+        agg['dataset'] = {leaf_key(node): eval_rule(frame, node, ctx).to_numpy(dtype=bool) for node in dataset_nodes}
+    return agg
+
+
+def _set_rule_mask(chunk, node, agg):
+    rule = node.get('rule')
+    if rule not in agg:
+        return pd.Series(False, index=chunk.index)
+    if rule == 'party_freq':
+        freq = chunk['거래처코드'].map(agg[rule]).astype('float64').fillna(0)
+        return compare(freq, node.get('op', '>='), float(node.get('value', 0)))
+    keys = pd.MultiIndex.from_frame(chunk[VOUCHER_KEY])
+    return pd.Series(keys.isin(agg[rule]), index=chunk.index)
+
+
+def iter_analyze_chunks(
+    chunks,
+    active_rules,
+    rule_values,
+    logic_op: str = 'AND',
+    logic_tree: dict | None = None,
+):
+    """
+    analyze_journal과 같은 판정을 chunk 단위로 계산해 chunk마다 내보낸다 (결과 전체를 메모리에 모으지 않는다).
+    chunks: 호출할 때마다 처음부터 DataFrame chunk를 돌려주는 함수 (2번 순회한다).
+            예) lambda: iter_csv_chunks(path), iter_frame_chunks(df)
+    행 단위 규칙은 chunk별로 바로 평가하고, 전표세트 규칙은 1차 패스에서 병합한 집계로 판정한다.
+    통계 규칙(DATASET_RULES)은 1차 패스에서 필요한 열만 모아 전체 기준으로 계산해 두고 chunk별로 잘라 쓴다.
+    yield (chunk, final_mask, bits, keywords)
+      chunk     : 읽은 그대로의 chunk (금액 결측도 그대로). index는 파일 전체 기준 행 위치 (RangeIndex)
+      final_mask: chunk 행별 최종 일치 여부, bits: chunk의 규칙 비트셋 (rule_bits, 규칙 번호는 전체와 같다)
+      keywords  : chunk의 keyword_details 결과 (행 위치는 chunk 안 기준)
+    """
+    tree = build_rule_tree(active_rules, rule_values, logic_op, logic_tree)
+    plan = compile_plan(tree)
+    dataset_nodes = [leaf['node'] for leaf in iter_leaves(plan) if leaf['node'].get('rule') in DATASET_RULES]
+    agg = collect_set_aggregates(chunks, _rules_in(tree) & SET_RULES, dataset_nodes)
+
+    max_rule_no = max((leaf['node']['_no'] for leaf in iter_leaves(plan)), default=0)
+    offset = 0
+    for raw in chunks():
+        raw.index = pd.RangeIndex(offset, offset + len(raw))
+        offset += len(raw)
+        chunk = to_numeric_amounts(raw)
+        hits = {}
+
+        def leaf_mask(node, pos):
+            if node.get('rule') in SET_RULES:
+                return _set_rule_mask(chunk, node, agg).to_numpy(dtype=bool)
+            if node.get('rule') in DATASET_RULES:
+                return agg['dataset'][leaf_key(node)][chunk.index]
+            return eval_rule(chunk, node).to_numpy(dtype=bool)
+
+        def record(node, m):
+            hits[node['_no']] = m
+
+        final_mask = execute_plan(plan, len(chunk), leaf_mask, record)
+        bits = rule_bits(hits, len(chunk), max_rule_no)
+        yield raw, final_mask, bits, keyword_details(chunk, bits, active_rules, rule_values, logic_op, logic_tree)
+
+
+def analyze_journal_chunked(
+    chunks,
+    active_rules,
+    rule_values,
+    logic_op: str = 'AND',
+    logic_tree: dict | None = None,
+):
+    """
+    analyze_journal과 같은 결과 dict를 chunk 단위로 계산한다 (iter_analyze_chunks 결과를 모은다).
+    화면 응답처럼 전체 행이 필요할 때 쓰고, 결과를 파일로 내보낼 때는 iter_analyze_chunks로 chunk마다 쓴다.
+    """
+    headers, rows, flagged, bits = None, [], [], []
+    keywords = {}   # 규칙 번호 → (키워드 목록, [chunk별 행 위치], [chunk별 키워드 번호])
+    for chunk, final_mask, chunk_bits, chunk_keywords in iter_analyze_chunks(
+            chunks, active_rules, rule_values, logic_op, logic_tree):
+        if headers is None:
+            headers = list(chunk.columns)
+        flagged.extend(chunk.index[final_mask])
+        bits.append(chunk_bits)
+        rows.extend(format_rows(to_numeric_amounts(chunk)))
+        for no, (kws, pos, index) in chunk_keywords.items():
+            keywords.setdefault(no, (kws, [], []))
+            keywords[no][1].append(pos + chunk.index[0])
+            keywords[no][2].append(index)
+
+    return {
+        "headers": headers or [],
+        "rows": rows,
+        "flagged_indices": flagged,
+        "rule_map": encode_rule_map(np.vstack(bits) if bits else rule_bits({}, 0)),
+        "keyword_matches": encode_keyword_details(
+            {no: (kws, np.concatenate(pos), np.concatenate(index)) for no, (kws, pos, index) in keywords.items()}),
+    }
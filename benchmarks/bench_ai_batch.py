@@ -0,0 +1,102 @@
+"""
+AI 전표세트 분석 벤치마크: 10개씩 indent=2 프롬프트로 순차 호출 + 배치마다 1초 대기(변경 전 구현 그대로)
+vs 토큰 예산 패킹 + 동시 호출 파이프라인.
+실제 API 대신 지연이 있는 스텁 모델을 쓴다.
+
+    python benchmarks/bench_ai_batch.py [--vouchers 200] [--latency 1.0] [--concurrency 4] [--rate 4]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.ai_cache import AICache
+from backend.ai_voucher_analyzer import (
+    analyze_voucher_sets_with_ai, parse_batch_response, BATCH_SIZE,
+)
+from benchmarks.synthetic import make_journal
+from benchmarks.stub_model import StubModel
+
+
+LEGACY_BATCH_SIZE = 10
+
+
+def legacy_prompt(batch):
+    """변경 전 프롬프트: 전표마다 모든 항목을 indent=2 JSON으로."""
+    vouchers_json = json.dumps(
+        [{"id": i + 1, "date": v["date"], "voucherNo": v["voucherNo"], "entries": v["entries"],
+          "is_balanced": v["is_balanced"]} for i, v in enumerate(batch)],
+        ensure_ascii=False, indent=2
+    )
+    return f"""
+    당신은 회계감사 시스템에 내장된 최고 수준의 'AI 감사 로봇'입니다. 당신의 임무는 주어진 전표 목록에서 회계 원칙에 위배되거나, 내부통제상 허점이 될 수 있는 문제들을 시스템적으로 분석하고 명확한 보고서를 생성하는 것입니다.
+    주어진 전표 목록의 각 전표를 개별적으로 심층 분석하고, 모든 전표에 대한 분석 결과를 하나의 JSON 배열(리스트)로 반환해주세요.
+
+    [분석 대상 전표 목록]
+    {vouchers_json}
+
+    [응답 형식]
+    반드시 아래와 같은 JSON 객체들의 리스트(배열) 형식으로만 답변해주세요. 다른 설명은 절대 추가하지 마세요.
+    [
+      {{"id": 1, "isError": true, "errorType": "전표 1의 오류 유형 (예: 대차차액 발생)", "cause": "전표 1의 오류 원인에 대한 전문가 수준의 분석", "solution": "전표 1의 문제를 해결하기 위한 구체적인 업무 절차"}},
+      {{"id": 2, "isError": false, "errorType": "", "cause": "", "solution": ""}}
+    ]
+    """
+
+
+def legacy_sequential(df, model):
+    """변경 전 analyze_voucher_sets_with_ai: 전표세트마다 합계 비교, 10개씩 순차 호출, 배치마다 1초 대기."""
+    suspicious = []
+    for (date, voucher_no), voucher_set in df.groupby(['전표일자', '전표번호']):
+        if voucher_set['차변금액'].sum() != voucher_set['대변금액'].sum():
+            suspicious.append({"date": str(date), "voucherNo": str(voucher_no),
+                               "entries": voucher_set.to_dict('records'), "is_balanced": False})
+    results = []
+    for i in range(0, len(suspicious), LEGACY_BATCH_SIZE):
+        batch = suspicious[i:i + LEGACY_BATCH_SIZE]
+        try:
+            for idx, analysis in enumerate(parse_batch_response(model.generate_content(legacy_prompt(batch)).text)):
+                k = analysis.get("id", idx + 1) - 1
+                if analysis.get("isError") and 0 <= k < len(batch):
+                    results.append({"date": batch[k]["date"], "voucherNo": batch[k]["voucherNo"],
+                                    "analysis": analysis, "entries": batch[k]["entries"]})
+            time.sleep(1)
+        except Exception as e:
+            print(f"배치 {i // LEGACY_BATCH_SIZE + 1} 분석 중 오류: {e}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--vouchers', type=int, default=200, help='대차 불일치 전표세트 수')
+    parser.add_argument('--latency', type=float, default=1.0, help='스텁 모델 호출당 지연(초)')
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=4.0, help='초당 호출 수 제한')
+    args = parser.parse_args()
+
+    # 전표세트당 3행, 모두 대차 불일치
+    df = make_journal(args.vouchers * 3, lines_per_voucher=3, unbalanced_ratio=1.0)
+    print(f"전표세트 {args.vouchers}개, 배치 {-(-args.vouchers // LEGACY_BATCH_SIZE)}개(변경 전) / "
+          f"최대 {BATCH_SIZE}개씩 토큰 예산 패킹(변경 후), 호출 지연 {args.latency}s")
+
+    model = StubModel(args.latency, args.fail_rate)
+    t0 = time.perf_counter()
+    legacy = legacy_sequential(df, model)
+    print(f"  순차(변경 전)  : {time.perf_counter() - t0:7.2f}s  결과 {len(legacy)}건  호출 {model.calls}회")
+
+    model = StubModel(args.latency, args.fail_rate)
+    t0 = time.perf_counter()
+    # 캐시를 끄지 않으면 스텁 응답이 운영 캐시(backend/ai_cache.sqlite3)에 쌓이고 다음 실행은 모두 적중한다
+    current = analyze_voucher_sets_with_ai(df, model=model, cache=AICache(enabled=False),
+                                           max_concurrency=args.concurrency,
+                                           rate_per_sec=args.rate, burst=args.concurrency, backoff=0.2)
+    failed = sum(r['analysis']['errorType'] == 'AI 분석 실패' for r in current)
+    print(f"  동시 파이프라인: {time.perf_counter() - t0:7.2f}s  결과 {len(current)}건 (실패 {failed})  호출 {model.calls}회")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+임계값만 바꾼 재분석 벤치마크: 매번 처음부터 계산 vs 데이터셋별 조건 mask 메모 + 정렬 인덱스.
+
+    python benchmarks/bench_incremental.py [--rows 1000000]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.analyzer import run_rules
+from benchmarks.synthetic import make_journal
+
+
+def tree_with(amount):
+    return {'type': 'group', 'op': 'OR', 'items': [
+        {'type': 'cond', 'rule': 'weekend_txn'},
+        {'type': 'cond', 'rule': 'keyword_search', 'value': '현금,가지급', 'mode': 'include'},
+        {'type': 'cond', 'rule': 'party_freq', 'op': '<=', 'value': 2},
+        {'type': 'cond', 'rule': 'unbalanced_set'},
+        {'type': 'cond', 'rule': 'amount_over', 'op': '>=', 'value': amount, 'target': 'debit'},
+    ]}
+
+
+def timed(df, amount, memo=None):
+    t0 = time.perf_counter()
+    _, final_mask, bits = run_rules(df, [], {}, 'AND', tree_with(amount), workers=1, memo=memo)
+    return time.perf_counter() - t0, final_mask, bits
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = make_journal(args.rows)
+    memo = {}      # 서버에서는 dataset_cache.memo(dataset_id)
+    print(f"{args.rows:,}행, 조건 5개 중 금액 임계값만 바꿔 재분석")
+    elapsed, _, _ = timed(df, 1_000_000, memo)
+    print(f"  첫 분석        : {elapsed:7.3f}s")
+    for amount in (2_000_000, 3_000_000, 4_900_000, 4_990_000):
+        cold, f1, b1 = timed(df, amount)            # 메모 없이 처음부터 계산
+        warm, f2, b2 = timed(df, amount, memo)
+        same = np.array_equal(f1, f2) and np.array_equal(b1, b2)
+        print(f"  금액 >= {amount:>9,}: 처음부터 {cold:7.3f}s  메모 {warm:7.3f}s  결과 동일 {same}")
+
+
+if __name__ == '__main__':
+    main()
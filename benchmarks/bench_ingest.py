@@ -0,0 +1,78 @@
+"""
+분개장 CSV 읽기 벤치마크.
+sample/분개장(오류).csv 를 N배(기본 100배) 복제한 파일로
+기존 방식(python 엔진 + 인코딩 루프)과 backend/ingest.py 를 비교한다.
+
+    python benchmarks/bench_ingest.py [--scale 100]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from backend import ingest
+
+SAMPLE = os.path.join(ROOT, 'sample', '분개장(오류).csv')
+
+
+def legacy_read(path):
+    """변경 전 read_file_to_df 의 CSV 경로."""
+    for enc in ['cp949', 'utf-8-sig', 'utf-8']:
+        try:
+            df = pd.read_csv(path, encoding=enc, sep=None, engine='python', dtype=str).fillna('')
+            if not df.empty and len(df.columns) > 0:
+                return df
+        except Exception:
+            continue
+    raise ValueError(path)
+
+
+def build_scaled_csv(scale, encoding):
+    with open(SAMPLE, 'rb') as f:
+        header, _, body = f.read().decode('cp949').partition('\n')
+    body = body.rstrip('\n') + '\n'
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    with os.fdopen(fd, 'w', encoding=encoding, newline='') as out:
+        out.write(header + '\n')
+        for _ in range(scale):
+            out.write(body)
+    return path
+
+
+def timed(fn, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for encoding in ('cp949', 'utf-8-sig'):
+        path = build_scaled_csv(args.scale, encoding)
+        try:
+            size_mb = os.path.getsize(path) / 1e6
+            t_old, df_old = timed(legacy_read, path, repeat=args.repeat)
+            t_new, df_new = timed(ingest.read_journal, path, repeat=args.repeat)
+            print(f"[{encoding}] {len(df_new):,} rows, {size_mb:.1f} MB")
+            engine = 'pyarrow' if ingest.pa is not None else 'c'
+            print(f"  legacy (python engine) : {t_old:8.3f} s")
+            print(f"  ingest ({engine:<7})      : {t_new:8.3f} s   x{t_old / t_new:.1f}")
+            assert len(df_old) == len(df_new)
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
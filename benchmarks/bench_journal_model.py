@@ -0,0 +1,51 @@
+"""
+정규화된 분개장(category 텍스트 열) 벤치마크: 메모리와 규칙 분석 시간, 문자열 열 그대로일 때와 비교.
+
+    python benchmarks/bench_journal_model.py [--rows 1000000]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.analyzer import run_rules, RULE_ORDER
+from backend.ingest import normalize_journal
+from benchmarks.synthetic import make_journal
+
+RULE_VALUES = {
+    'amount_over': {'op': '>=', 'value': 4_000_000, 'target': 'debit'},
+    'keyword_search': {'value': '경조사비,회식', 'mode': 'include'},
+    'party_freq': {'op': '<=', 'value': 3},
+}
+
+
+def mb(df):
+    return df.memory_usage(index=True, deep=True).sum() / 2**20
+
+
+def timed(df):
+    t0 = time.perf_counter()
+    _, final_mask, bits = run_rules(df, RULE_ORDER, RULE_VALUES, 'OR', workers=1)
+    return time.perf_counter() - t0, final_mask, bits
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    raw = make_journal(args.rows)
+    norm = normalize_journal(raw.copy())
+    t_raw, f1, b1 = timed(raw)
+    t_norm, f2, b2 = timed(norm)
+    same = np.array_equal(f1, f2) and np.array_equal(b1, b2)
+    print(f"{args.rows:,}행, 규칙 {len(RULE_ORDER)}개 (OR)")
+    print(f"  문자열 열  : {mb(raw):8.1f}MB  분석 {t_raw:6.2f}s")
+    print(f"  category 열: {mb(norm):8.1f}MB  분석 {t_norm:6.2f}s  결과 동일 {same}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+키워드 검색 벤치마크: 정규식 alternation + 행마다 str.contains(변경 전) vs 고유값별 Aho-Corasick.
+
+    python benchmarks/bench_keyword.py [--rows 1000000] [--keywords 300] [--descriptions 20000]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.analyzer import flag_keyword
+from benchmarks.synthetic import make_journal
+
+
+def legacy_flag_keyword(df, keywords):
+    kw_list = [k.strip() for k in keywords.split(',') if k.strip()]
+    if not kw_list:
+        return pd.Series(False, index=df.index)
+    pattern = '|'.join(map(re.escape, kw_list))
+    subject = df['계정과목'].astype(str)
+    desc = df.get('적요', pd.Series('', index=df.index)).astype(str)
+    return subject.str.contains(pattern, case=False, na=False) | \
+        desc.str.contains(pattern, case=False, na=False)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--keywords', type=int, default=300)
+    parser.add_argument('--descriptions', type=int, default=20_000, help='서로 다른 적요 수')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vendors = [f'거래처{i:05d}' for i in range(args.descriptions // 4 + args.keywords)]
+    words = ['대금 지급', '매출 입금', '비용 정산', '선급금', '카드 결제', '경조사비', '회식비', '소모품 구입']
+    descriptions = np.array([f'{vendors[rng.integers(len(vendors))]} {words[rng.integers(len(words))]}'
+                             for _ in range(args.descriptions)], dtype=object)
+    df = make_journal(args.rows)
+    df['적요'] = descriptions[rng.integers(0, len(descriptions), args.rows)]
+    keywords = ','.join(rng.choice(vendors, args.keywords, replace=False))
+    print(f"{args.rows:,}행, 적요 {args.descriptions:,}종, 키워드 {args.keywords}개")
+
+    t0 = time.perf_counter()
+    new = flag_keyword(df, keywords)
+    t_new = time.perf_counter() - t0
+    print(f"  Aho-Corasick(고유값): {t_new:7.2f}s  일치 {int(new.sum()):,}행")
+
+    # 변경 전 방식은 느리므로 일부 행으로 재고 전체 행 수로 환산한다
+    sample = df.iloc[:min(len(df), 20_000)]
+    t0 = time.perf_counter()
+    old = legacy_flag_keyword(sample, keywords)
+    t_old = (time.perf_counter() - t0) * len(df) / len(sample)
+    same = old.equals(flag_keyword(sample, keywords))
+    print(f"  정규식(행마다)      : {t_old:7.2f}s  ({len(sample):,}행 측정 후 환산, 결과 동일 {same})")
+
+
+if __name__ == '__main__':
+    main()
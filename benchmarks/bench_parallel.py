@@ -0,0 +1,53 @@
+"""
+병렬 규칙 평가 확장성 벤치마크: 작업 프로세스 수 1..N 에 따른 analyze_journal 규칙 평가 시간.
+
+    python benchmarks/bench_parallel.py [--rows 2000000] [--max-workers 16]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import parallel
+from backend.analyzer import RuleContext, build_rule_tree, evaluate_plan, to_numeric_amounts, voucher_ids
+from backend.rule_plan import compile_plan
+from benchmarks.synthetic import make_journal
+
+TREE = {'type': 'group', 'op': 'OR', 'items': [
+    {'type': 'cond', 'rule': 'weekend_txn'},
+    {'type': 'cond', 'rule': 'keyword_search', 'value': '경조,회식'},
+    {'type': 'cond', 'rule': 'party_freq', 'op': '>=', 'value': 1000},
+    {'type': 'cond', 'rule': 'round_million'},
+    {'type': 'cond', 'rule': 'uniform_account'},
+    {'type': 'cond', 'rule': 'unbalanced_set'},
+]}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    df = to_numeric_amounts(make_journal(args.rows))
+    vid = voucher_ids(df)
+    plan = compile_plan(build_rule_tree([], {}, 'AND', TREE))
+    print(f"{len(df):,} rows, {os.cpu_count()} CPUs")
+
+    counts = sorted({1, 2, 4, 8, 16, args.max_workers} & set(range(1, args.max_workers + 1)))
+    base = None
+    for n in counts:
+        t0 = time.perf_counter()
+        if n == 1:
+            mask, _ = evaluate_plan(plan, RuleContext(df, vid))
+        else:
+            mask, _ = parallel.evaluate_parallel(df, plan, vid, n)
+        elapsed = time.perf_counter() - t0
+        base = base or elapsed
+        print(f"  workers={n:<3} {elapsed:7.3f} s   x{base / elapsed:.2f}   flagged={int(mask.sum()):,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+AI 전표세트 프롬프트 구성 비교: 고정 10개 배치 + indent=2 JSON(변경 전) vs 토큰 예산 패킹 + compact JSON.
+요청 수와 요청별 추정 토큰 수를 비교하고, 스텁 모델로 돌려 모든 대차 불일치 전표세트가
+정확히 한 번씩 분석되고 결과가 제 전표에 붙는지(id 매핑) 확인한다.
+
+    python benchmarks/bench_prompt_packing.py [--rows 50000] [--budget 6000] [--large 3]
+"""
+import os
+import sys
+import json
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+
+from backend.analyzer import flag_unbalanced_set, to_numeric_amounts
+from backend.ai_voucher_analyzer import analyze_voucher_sets_with_ai, create_prompt_for_batch, BATCH_SIZE
+from backend.ai_cache import AICache
+from backend.prompt_packing import estimate_tokens, voucher_payload, payload_tokens, pack_batches
+from benchmarks.synthetic import make_sample_like_journal
+from benchmarks.stub_model import StubModel
+
+
+def legacy_prompt_json(batch):
+    return json.dumps([{"id": i + 1, "date": v["date"], "voucherNo": v["voucherNo"], "entries": v["entries"],
+                        "is_balanced": v["is_balanced"]} for i, v in enumerate(batch)], ensure_ascii=False, indent=2)
+
+
+def with_large_vouchers(df, n_large, entries=400):
+    """분개가 아주 많은 불일치 전표세트를 n_large개 덧붙인다 (요약 경로 확인용)."""
+    rows = df.sample(entries * n_large, replace=True, random_state=1).reset_index(drop=True)
+    rows['전표일자'] = '20241231'
+    rows['전표번호'] = [f'L{i // entries}' for i in range(len(rows))]
+    rows.loc[rows.index % entries == 0, '차변금액'] += 1     # 대차 불일치
+    return pd.concat([df, rows], ignore_index=True)
+
+
+def suspicious_vouchers(df):
+    unbalanced = flag_unbalanced_set(df)
+    return [{"date": str(d), "voucherNo": str(n), "entries": g.to_dict('records'), "is_balanced": False}
+            for (d, n), g in df[unbalanced].groupby(['전표일자', '전표번호'], observed=True)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--budget', type=int, default=6000)
+    parser.add_argument('--large', type=int, default=3, help='덧붙일 대형 불일치 전표세트 수')
+    args = parser.parse_args()
+
+    df = to_numeric_amounts(with_large_vouchers(make_sample_like_journal(args.rows), args.large))
+    vouchers = suspicious_vouchers(df)
+    print(f"대차 불일치 전표세트 {len(vouchers):,}개")
+
+    legacy = [estimate_tokens(legacy_prompt_json(vouchers[i:i + 10])) for i in range(0, len(vouchers), 10)]
+    costs = [payload_tokens(voucher_payload(v, args.budget)) for v in vouchers]
+    packed = pack_batches(costs, args.budget, BATCH_SIZE)
+    packed_tokens = [sum(costs[i] for i in b) for b in packed]
+    summarized = sum('summary' in voucher_payload(v, args.budget) for v in vouchers)
+    print(f"  변경 전: 요청 {len(legacy):,}개, 전표 목록 추정 토큰 합 {sum(legacy):,} (요청당 최대 {max(legacy):,})")
+    print(f"  패킹   : 요청 {len(packed):,}개, 전표 목록 추정 토큰 합 {sum(packed_tokens):,} "
+          f"(요청당 최대 {max(packed_tokens):,}, 예산 {args.budget:,}), 요약된 전표 {summarized}개")
+
+    # 모든 전표가 정확히 한 배치에 한 번
+    covered = sorted(i for b in packed for i in b)
+    assert covered == list(range(len(vouchers))), "배치가 전표를 빠뜨리거나 중복했습니다"
+    # 여러 전표가 든 배치는 예산을 넘지 않는다
+    assert all(t <= args.budget for b, t in zip(packed, packed_tokens) if len(b) > 1)
+    # 실제 프롬프트의 id는 배치 안에서 1..n
+    for b in packed[:20]:
+        prompt = create_prompt_for_batch([vouchers[i] for i in b])
+        listing = json.loads(prompt.split('[분석 대상 전표 목록]')[1].split('[응답 형식]')[0])
+        assert [v['id'] for v in listing] == list(range(1, len(b) + 1))
+        assert [v['voucherNo'] for v in listing] == [vouchers[i]['voucherNo'] for i in b]
+
+    # 스텁 모델은 받은 전표번호를 cause에 적어 돌려준다 → 결과가 제 전표에 붙었는지 확인
+    model = StubModel(latency=0)
+    results = analyze_voucher_sets_with_ai(df, model=model, cache=AICache(enabled=False), backoff=0)
+    assert len(results) == len(vouchers), (len(results), len(vouchers))
+    assert sorted(r['voucherNo'] for r in results) == sorted(v['voucherNo'] for v in vouchers)
+    assert all(r['analysis']['cause'] == f"스텁 {r['voucherNo']}" for r in results), "id 매핑 불일치"
+    print(f"  스텁 모델 호출 {model.calls}회, 결과 {len(results):,}건 — 전표별 1회·id 매핑 확인")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+전표세트 규칙 벤치마크: 튜플 zip + set 조회 방식(변경 전) vs 전표세트 ID 기반 벡터 연산.
+
+    python benchmarks/bench_voucher_rules.py [--rows 1000000]
+"""
+import os
+import sys
+import time
+import argparse
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.analyzer import flag_uniform_account, flag_unbalanced_set, voucher_ids
+from benchmarks.synthetic import make_journal
+
+
+def legacy_uniform_account(df):
+    grouped = df.groupby(['전표일자', '전표번호'])['계정과목'].nunique()
+    target_sets = set(grouped[grouped == 1].index)
+    idx = list(zip(df['전표일자'], df['전표번호']))
+    return pd.Series([(k in target_sets) for k in idx], index=df.index)
+
+
+def legacy_unbalanced_set(df):
+    sums = df.groupby(['전표일자', '전표번호'])[['차변금액', '대변금액']].sum()
+    bad_sets = set(sums.index[sums['차변금액'] != sums['대변금액']])
+    idx = list(zip(df['전표일자'], df['전표번호']))
+    return pd.Series([(k in bad_sets) for k in idx], index=df.index)
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - t0, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = make_journal(args.rows)
+    t_vid, vid = timed(voucher_ids, df)
+    print(f"{len(df):,} rows, {vid.max() + 1:,} voucher sets (voucher_ids: {t_vid:.3f} s, once per dataset)")
+    for name, old, new in (('uniform_account', legacy_uniform_account, flag_uniform_account),
+                           ('unbalanced_set', legacy_unbalanced_set, flag_unbalanced_set)):
+        t_old, m_old = timed(old, df)
+        t_new, m_new = timed(new, df, vid)
+        assert m_old.equals(m_new), name
+        print(f"  {name:<16} legacy {t_old:7.3f} s   vectorized {t_new:7.3f} s   x{t_old / t_new:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""
+분석기·엔드포인트 벤치마크 모음. 결과를 JSON으로 남겨 릴리스 사이의 성능 회귀를 비교한다.
+
+    python benchmarks/run_suite.py [--sizes 10000,100000,1000000] [--repeat 3] [--out bench_results.json]
+                                   [--compare 이전결과.json --threshold 1.25] [--profile-dir prof/]
+
+측정 항목 (행 수별):
+  flag.<규칙>          backend/analyzer.py의 규칙 함수 하나
+  rules.flat/tree      run_rules (평면 모드 / 중첩 트리)
+  analyze.flat/tree    analyze_journal (화면용 레코드 포함, --records-max-rows 이하)
+  ingest.csv/xlsx      app.read_file_to_df로 업로드 파일 파싱 (XLSX는 --xlsx-max-rows 이하)
+  ingest.store         데이터셋 저장소에 변환해 둔 같은 파일 다시 읽기 (pyarrow가 있을 때)
+  json.analyze         analyze_journal 결과를 응답 본문으로 인코딩 (serialize.iter_json)
+  endpoint.*           Flask 테스트 클라이언트로 /preview, /analyze, /rows
+매 실행은 새 DataFrame 객체(얕은 복사)로 해서 데이터셋별 메모의 영향을 받지 않는다.
+--compare를 주면 같은 (항목, 행 수)의 best 시간이 threshold배 넘게 느려진 항목을 출력하고 종료 코드 1로 끝낸다.
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import cProfile
+import subprocess
+from datetime import datetime, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+from backend import analyzer
+from backend.analyzer import RULE_ORDER, run_rules, analyze_journal, to_numeric_amounts
+from backend.ingest import normalize_journal
+from backend.app import app, read_file_to_df
+from backend.serialize import iter_json
+from backend.dataset_store import DatasetStore, dataset_store
+from werkzeug.datastructures import FileStorage
+from benchmarks.synthetic import make_sample_like_journal
+
+RULE_VALUES = {
+    'amount_over': {'op': '>=', 'value': 5_000_000, 'target': 'debit'},
+    'keyword_search': {'value': '경조사비,회식비,현금', 'mode': 'include'},
+    'party_freq': {'op': '<=', 'value': 2},
+}
+TREE = {'type': 'group', 'op': 'OR', 'items': [
+    {'type': 'cond', 'rule': 'unbalanced_set'},
+    {'type': 'group', 'op': 'AND', 'items': [
+        {'type': 'cond', 'rule': 'weekend_txn'},
+        {'type': 'cond', 'rule': 'amount_over', 'op': '>=', 'value': 1_000_000, 'target': 'debit'},
+    ]},
+    {'type': 'group', 'op': 'AND', 'items': [
+        {'type': 'cond', 'rule': 'keyword_search', 'value': '경조사비,회식비', 'mode': 'include'},
+        {'type': 'cond', 'rule': 'party_freq', 'op': '<=', 'value': 2},
+    ]},
+    {'type': 'cond', 'rule': 'round_million'},
+    {'type': 'cond', 'rule': 'uniform_account'},
+]}
+FLAGS = {
+    'weekend_txn': lambda df: analyzer.flag_weekend_txn(df),
+    'amount_over': lambda df: analyzer.flag_amount_over(df, '>=', 5_000_000),
+    'keyword_search': lambda df: analyzer.flag_keyword(df, RULE_VALUES['keyword_search']['value']),
+    'party_freq': lambda df: analyzer.flag_party_freq(df, '<=', 2),
+    'round_million': lambda df: analyzer.flag_round_million(df),
+    'uniform_account': lambda df: analyzer.flag_uniform_account(df),
+    'unbalanced_set': lambda df: analyzer.flag_unbalanced_set(df),
+    'benford': lambda df: analyzer.flag_benford(df),
+    'duplicate_entry': lambda df: analyzer.flag_duplicate_entry(df, days=3),
+    'amount_outlier': lambda df: analyzer.flag_amount_outlier(df, 'iqr', 3),
+}
+
+
+class Suite:
+    def __init__(self, repeat, profile_dir=None):
+        self.repeat = repeat
+        self.profile_dir = profile_dir
+        self.results = []
+
+    def measure(self, name, rows, fn, setup=lambda: None, repeat=None):
+        """setup()의 반환값으로 fn을 repeat번 실행한 시간(초). setup 시간은 재지 않는다."""
+        runs = []
+        for _ in range(repeat or self.repeat):
+            arg = setup()
+            t0 = time.perf_counter()
+            fn(arg)
+            runs.append(time.perf_counter() - t0)
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profiler = cProfile.Profile()
+            arg = setup()
+            profiler.runcall(fn, arg)
+            profiler.dump_stats(os.path.join(self.profile_dir, f'{name}-{rows}.prof'))
+        result = {'name': name, 'rows': rows, 'best': min(runs), 'median': float(np.median(runs)), 'runs': runs}
+        self.results.append(result)
+        print(f"  {name:<22} {rows:>11,}행  best {result['best']:8.4f}s  median {result['median']:8.4f}s")
+        return result
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(__file__)).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run_size(suite, n_rows, args):
+    print(f"[{n_rows:,}행]")
+    base = normalize_journal(make_sample_like_journal(n_rows, seed=args.seed))
+    numeric = to_numeric_amounts(base)
+    fresh = lambda df: (lambda: df.copy(deep=False))
+
+    for rule, fn in FLAGS.items():
+        suite.measure(f'flag.{rule}', n_rows, fn, fresh(numeric))
+
+    suite.measure('rules.flat', n_rows, lambda df: run_rules(df, RULE_ORDER, RULE_VALUES, 'OR', workers=1), fresh(base))
+    suite.measure('rules.tree', n_rows, lambda df: run_rules(df, [], {}, 'AND', TREE, workers=1), fresh(base))
+
+    if n_rows <= args.records_max_rows:
+        suite.measure('analyze.flat', n_rows,
+                      lambda df: analyze_journal(df, RULE_ORDER, RULE_VALUES, 'OR', workers=1), fresh(base))
+        suite.measure('analyze.tree', n_rows,
+                      lambda df: analyze_journal(df, [], {}, 'AND', TREE, workers=1), fresh(base))
+        result = analyze_journal(base, RULE_ORDER, RULE_VALUES, 'OR', workers=1)
+        suite.measure('json.analyze', n_rows,
+                      lambda r: b''.join(iter_json(r)), lambda: result)
+
+    raw = make_sample_like_journal(n_rows, seed=args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'journal.csv')
+        raw.to_csv(csv_path, index=False, encoding='utf-8-sig')
+        suite.measure('ingest.csv', n_rows, read_file_to_df, upload(csv_path))
+        store = DatasetStore(os.path.join(tmp, 'store'))
+        if store.enabled:
+            store.read(csv_path)
+            suite.measure('ingest.store', n_rows, store.read, lambda: csv_path)
+        if n_rows <= args.xlsx_max_rows:
+            xlsx_path = os.path.join(tmp, 'journal.xlsx')
+            raw.to_excel(xlsx_path, index=False, engine='openpyxl')
+            suite.measure('ingest.xlsx', n_rows, read_file_to_df, upload(xlsx_path), repeat=1)
+
+        if n_rows <= args.records_max_rows:
+            run_endpoints(suite, n_rows, csv_path)
+
+
+def upload(path):
+    """업로드된 파일처럼 FileStorage를 만들어 주는 setup 함수 (디스크 읽기는 재지 않는다)."""
+    with open(path, 'rb') as f:
+        content = f.read()
+    return lambda: FileStorage(io.BytesIO(content), filename=os.path.basename(path))
+
+
+def run_endpoints(suite, n_rows, csv_path):
+    client = app.test_client()
+    with open(csv_path, 'rb') as f:
+        content = f.read()
+
+    def preview(_):
+        res = client.post('/preview', data={'file': (io.BytesIO(content), 'journal.csv')})
+        assert res.status_code == 200, res.status_code
+        return res.get_json()['dataset_id']
+
+    suite.measure('endpoint.preview', n_rows, preview)
+    state = {}
+
+    def analyze(dataset_id):
+        form = {'dataset_id': dataset_id, 'active_rules': json.dumps(RULE_ORDER),
+                'values': json.dumps(RULE_VALUES), 'logic_op': 'OR'}
+        res = client.post('/analyze', data=form)
+        assert res.status_code == 200, res.status_code
+        state.update(dataset_id=dataset_id, analysis_id=res.get_json()['analysis_id'])
+
+    # 매번 새로 올린 데이터셋으로 분석한다 (같은 데이터셋의 마스크 메모가 재사용되지 않도록)
+    suite.measure('endpoint.analyze', n_rows, analyze, lambda: preview(None))
+    suite.measure('endpoint.rows', n_rows, lambda _: client.get(
+        f"/rows?dataset_id={state['dataset_id']}&analysis_id={state['analysis_id']}"
+        f"&flagged_only=1&offset=0&limit=200"))
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['name'], r['rows']): r for r in json.load(f)['results']}
+    regressions = []
+    for r in results:
+        old = baseline.get((r['name'], r['rows']))
+        if old and old['best'] > 0 and r['best'] / old['best'] > threshold:
+            regressions.append((r, old))
+    print(f"\n기준 결과 {baseline_path} 대비 {threshold:.2f}배 넘게 느려진 항목: {len(regressions)}개")
+    for r, old in regressions:
+        print(f"  {r['name']:<22} {r['rows']:>11,}행  {old['best']:.4f}s → {r['best']:.4f}s "
+              f"(x{r['best'] / old['best']:.2f})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help='쉼표로 구분한 행 수 (예: 10000,100000,1000000,10000000)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--records-max-rows', type=int, default=1_000_000,
+                        help='화면용 레코드·JSON·엔드포인트를 재는 최대 행 수')
+    parser.add_argument('--xlsx-max-rows', type=int, default=100_000, help='XLSX 읽기를 재는 최대 행 수')
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--compare', help='이전 --out 결과 파일')
+    parser.add_argument('--threshold', type=float, default=1.25)
+    parser.add_argument('--profile-dir', help='항목별 cProfile 결과(.prof)를 저장할 디렉터리')
+    args = parser.parse_args()
+
+    # 파싱 시간을 재야 하므로 업로드 경로의 저장소는 끈다 (저장소 읽기는 ingest.store로 따로 잰다)
+    dataset_store.enabled = False
+    suite = Suite(args.repeat, args.profile_dir)
+    for n_rows in (int(s) for s in args.sizes.split(',') if s.strip()):
+        run_size(suite, n_rows, args)
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump({'meta': metadata(), 'results': suite.results}, f, ensure_ascii=False, indent=1)
+    print(f"\n결과 저장: {args.out}")
+
+    if args.compare and compare(suite.results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Gemini 대신 쓸 수 있는 로컬 스텁 모델. generate_content(prompt).text 형식만 흉내 낸다.
+프롬프트 안의 전표 id마다 {"id", "isError": true, "cause": "스텁 <전표번호>", ...}를 돌려준다.
+"""
+import re
+import json
+import time
+import random
+import threading
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    """
+    latency    : 호출당 지연(초)
+    fail_rate  : 이 비율로 예외를 던진다 (재시도 확인용)
+    """
+
+    model_name = 'stub'     # AI 응답 캐시 키에 들어가는 이름 (Gemini 응답과 섞이지 않도록)
+
+    def __init__(self, latency=1.0, fail_rate=0.0, seed=0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self._lock:
+            self.calls += 1
+            fail = self._random.random() < self.fail_rate
+        time.sleep(self.latency)
+        if fail:
+            raise RuntimeError("스텁 모델 임의 실패")
+        # cause에 받은 전표번호를 그대로 적어, 결과가 어느 전표에 붙었는지 확인할 수 있게 한다
+        listing = prompt.split('[응답 형식]')[0]
+        numbers = {}
+        for i, no in re.findall(r'"id":\s*(\d+),\s*"date":\s*"[^"]*",\s*"voucherNo":\s*"([^"]*)"', listing):
+            numbers[int(i)] = no
+        for i in re.findall(r'"id":\s*(\d+)', listing):
+            numbers.setdefault(int(i), '')
+        return StubResponse(json.dumps([
+            {"id": i, "isError": True, "errorType": "대차차액 발생", "cause": f"스텁 {numbers[i]}".strip(),
+             "solution": "스텁"}
+            for i in sorted(numbers)
+        ], ensure_ascii=False))
@@ -0,0 +1,112 @@
+"""벤치마크용 합성 분개장 생성기."""
+import os
+import numpy as np
+import pandas as pd
+
+ACCOUNTS = ['외상매출금', '제품매출', '부가세예수금', '보통예금', '외상매입금', '원재료',
+            '부가세대급금', '복리후생비', '접대비', '여비교통비', '소모품비', '미지급금']
+
+
+def make_journal(n_rows, seed=0, lines_per_voucher=3, unbalanced_ratio=0.01):
+    """
+    n_rows 행짜리 분개장. 전표세트는 평균 lines_per_voucher 줄이고,
+    unbalanced_ratio 비율의 전표세트는 대차가 맞지 않는다.
+    """
+    rng = np.random.default_rng(seed)
+    n_sets = max(1, n_rows // lines_per_voucher)
+    set_of_row = np.sort(rng.integers(0, n_sets, n_rows))
+    days = pd.date_range('2024-01-01', '2024-12-31', freq='D')
+    set_day = rng.integers(0, len(days), n_sets)
+    amounts = (rng.integers(1, 5_000, n_rows) * 1_000).astype('float64')
+    is_debit = rng.random(n_rows) < 0.5
+    debit = np.where(is_debit, amounts, 0.0)
+    credit = np.where(is_debit, 0.0, amounts)
+    # 첫 줄에 차액을 몰아 넣어 대부분의 전표세트는 대차를 맞춘다
+    diff = pd.Series(debit - credit).groupby(set_of_row).sum()
+    first = np.r_[True, set_of_row[1:] != set_of_row[:-1]]
+    balance = -diff.reindex(set_of_row).to_numpy()
+    balance[~first] = 0
+    debit = debit + np.clip(balance, 0, None)
+    credit = credit + np.clip(-balance, 0, None)
+    broken = np.isin(set_of_row, rng.choice(n_sets, int(n_sets * unbalanced_ratio), replace=False))
+    debit[broken & first] += 1_000
+
+    return pd.DataFrame({
+        '전표일자': days.strftime('%Y%m%d').to_numpy()[set_day[set_of_row]],
+        '전표번호': (set_of_row % 500 + 1).astype(str),
+        '계정과목': np.asarray(ACCOUNTS, dtype=object)[rng.integers(0, len(ACCOUNTS), n_rows)],
+        '차변금액': debit,
+        '대변금액': credit,
+        '거래처코드': (rng.integers(10_000, 10_000 + max(10, n_sets // 20), n_rows)).astype(str),
+        '적요': np.asarray(['매출', '매입', '급여', '경조사비', '회식', ''], dtype=object)[rng.integers(0, 6, n_rows)],
+    })
+
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), '..', 'sample', '분개장(오류).csv')
+# 적요 문구 (키워드 검색용). 샘플 분개장에는 적요 열이 없어 계정과목과 조합해 만든다
+MEMO_PHRASES = ['대금 지급', '매출 입금', '카드 결제', '경비 정산', '선급금 지급', '현금 인출',
+                '경조사비', '회식비', '가지급금 정산', '세금계산서 발행', '']
+
+
+def make_sample_like_journal(n_rows, seed=0, sample_path=SAMPLE_CSV, unbalanced_ratio=0.01, new_party_ratio=0.3):
+    """
+    sample/분개장(오류).csv의 전표세트를 본떠 n_rows 행짜리 분개장을 만든다.
+      - 전표세트 구성(계정·차대 구성·줄 수)은 샘플 전표세트를 복원 추출하고, 금액은 세트마다 같은 정수배
+        (대차가 맞는 세트는 그대로 맞는다). unbalanced_ratio 비율의 세트는 첫 줄 금액을 바꿔 대차를 깨뜨린다.
+      - 전표일자는 샘플의 날짜 분포(주말·공휴일 비율 포함)를 따르고, 전표번호는 날짜별 일련번호.
+      - 거래처는 샘플 거래처 빈도를 따르되 new_party_ratio 비율은 새 거래처 코드(긴 꼬리)로 바꾼다.
+      - 적요는 '계정과목 + 문구' (MEMO_PHRASES).
+    열 형식은 ingest.read_journal과 같다 (금액 float64, 나머지 문자열).
+    """
+    from backend.ingest import read_csv_journal
+    sample = read_csv_journal(sample_path)
+    rng = np.random.default_rng(seed)
+
+    keys = sample['전표일자'].astype(str) + '|' + sample['전표번호'].astype(str)
+    template_of_row, _ = pd.factorize(keys)
+    order = np.argsort(template_of_row, kind='stable')
+    lengths = np.bincount(template_of_row)
+    starts = np.r_[0, np.cumsum(lengths)[:-1]]
+
+    # 전표세트(템플릿) 추출: 평균 줄 수로 넉넉히 뽑고 n_rows에서 자른다
+    n_sets = int(n_rows / lengths.mean() * 1.2) + 10
+    tid = rng.integers(0, len(lengths), n_sets)
+    set_len = lengths[tid]
+    n_sets = int(np.searchsorted(np.cumsum(set_len), n_rows)) + 1
+    tid, set_len = tid[:n_sets], set_len[:n_sets]
+    set_of_row = np.repeat(np.arange(n_sets), set_len)[:n_rows]
+    within = np.arange(len(set_of_row)) - np.repeat(np.r_[0, np.cumsum(set_len)[:-1]], set_len)[:n_rows]
+    src = order[starts[tid][set_of_row] + within]
+
+    scale = rng.choice([1, 1, 1, 2, 3, 5, 10], n_sets)[set_of_row]
+    debit = sample['차변금액'].to_numpy()[src] * scale
+    credit = sample['대변금액'].to_numpy()[src] * scale
+    first = np.r_[True, set_of_row[1:] != set_of_row[:-1]]
+    broken = first & np.isin(set_of_row, rng.choice(n_sets, int(n_sets * unbalanced_ratio), replace=False))
+    debit = np.where(broken & ~np.isnan(debit), debit + 1_000, debit)
+    credit = np.where(broken & np.isnan(debit), credit + 1_000, credit)
+
+    dates = sample['전표일자'].to_numpy(dtype=object)
+    set_date = dates[rng.integers(0, len(dates), n_sets)]
+    set_no = pd.Series(np.arange(n_sets)).groupby(set_date).cumcount().to_numpy() + 1
+
+    parties = sample['거래처코드'].to_numpy(dtype=object)
+    set_party = parties[rng.integers(0, len(parties), n_sets)]
+    new_party = rng.random(n_sets) < new_party_ratio
+    long_tail = np.char.mod('%d', 100_000 + rng.zipf(1.3, n_sets) % 900_000).astype(object)
+    set_party = np.where(new_party, long_tail, set_party)
+
+    accounts = sample['계정과목'].to_numpy(dtype=object)[src]
+    phrases = np.asarray(MEMO_PHRASES, dtype=object)[rng.integers(0, len(MEMO_PHRASES), len(src))]
+
+    return pd.DataFrame({
+        '전표일자': set_date[set_of_row],
+        '전표번호': np.char.mod('%d', set_no).astype(object)[set_of_row],
+        '계정코드': sample['계정코드'].to_numpy(dtype=object)[src],
+        '계정과목': accounts,
+        '차변금액': debit,
+        '대변금액': credit,
+        '거래처코드': set_party[set_of_row],
+        '입력사원': sample['입력사원'].to_numpy(dtype=object)[src],
+        '적요': accounts + ' ' + phrases,
+    })
@@ -5,10 +5,18 @@ let nextId = 1;
 const ruleTitles = {
   weekend_txn: '주말·공휴일 거래', amount_over: '금액 조건', keyword_search: '특정 키워드',
   party_freq: '거래처별 거래 횟수', round_million: '백만단위 이하 0',
-  uniform_account: '동일 계정 전표세트', unbalanced_set: '차/대변 불일치 세트'
+  uniform_account: '동일 계정 전표세트', unbalanced_set: '차/대변 불일치 세트',
+  benford: '벤포드 첫자리 편차(계정별)', duplicate_entry: '중복 의심 분개', amount_outlier: '계정별 이상 금액'
 };
 
-let dataHeaders = [], journalData = [], originalJournalData = [], lastRuleMap = {};
+const NO_RULES = { get: () => undefined };
+let dataHeaders = [], lastRuleMap = NO_RULES;
+let datasetId = null; // /preview가 돌려준 서버 캐시 ID
+
+// 결과 표는 서버(/rows)에서 구간 단위로 받아 보이는 부분만 그린다 (가상 스크롤)
+const PAGE_SIZE = 200, ROW_HEIGHT = 33, OVERSCAN = 20;
+let view = null;                 // { analysisId, flaggedOnly, expandSets, total, pages: Map(page → rows), pending: Set }
+const rowsByIdx = new Map();     // 원래 행 위치 → 받아 온 행 (AI 코치용)
 
 const $file = document.getElementById('file-upload');
 const $fileName = document.getElementById('file-name');
@@ -18,11 +26,13 @@ const $logicTree = document.getElementById('logic-tree');
 const $log = document.getElementById('log-content');
 const $tableContainer = document.getElementById('table-container');
 const $aiVoucherResultsContainer = document.getElementById('ai-voucher-results-container');
-const $tableWrap = $tableContainer;
+const $tableWrap = $tableContainer; // 결과 표의 스크롤 영역이기도 하다
 const $aiVoucherResults = $aiVoucherResultsContainer;
 const $chkSet = document.getElementById('chk-whole-voucher');
 const $chkOnly = document.getElementById('chk-show-matching-only');
 const $loading = document.getElementById('loading');
+const $loadingText = document.getElementById('loading-text');
+const $cancelJob = document.getElementById('cancel-job');
 const $modal = document.getElementById('ai-modal');
 const $modalBody = document.getElementById('modal-body');
 const $closeModalBtn = document.getElementById('close-modal-btn');
@@ -33,6 +43,9 @@ function newCond(rule) {
   if (rule === 'amount_over') { cond.op = '>'; cond.value = 0; cond.target = 'debit'; }
   else if (rule === 'party_freq') { cond.op = '>='; cond.value = 0; }
   else if (rule === 'keyword_search') { cond.value = ''; cond.mode = 'include'; }
+  else if (rule === 'benford') { cond.value = 1.96; }
+  else if (rule === 'duplicate_entry') { cond.value = 0; }
+  else if (rule === 'amount_outlier') { cond.method = 'iqr'; cond.value = 3; }
   return cond;
 }
 
@@ -105,6 +118,21 @@ function renderItem(item) {
     modeSel.onchange = () => { item.mode = modeSel.value; };
     const inp = document.createElement('input'); inp.type = 'text'; inp.className = 'border rounded w-28 px-1 py-0.5 text-xs'; inp.value = item.value || ''; inp.oninput = () => { item.value = inp.value; };
     d.appendChild(modeSel); d.appendChild(inp);
+  } else if (item.rule === 'benford' || item.rule === 'duplicate_entry' || item.rule === 'amount_outlier') {
+    // benford: z 임계값 / duplicate_entry: 며칠 이내 (0 = 같은 날) / amount_outlier: IQR 배수 또는 z 임계값
+    if (item.rule === 'amount_outlier') {
+      const mSel = document.createElement('select'); mSel.className = 'border rounded px-1 py-0.5 text-xs';
+      [['iqr', 'IQR'], ['zscore', 'Z점수']].forEach(([v, t]) => { const o = document.createElement('option'); o.value = v; o.textContent = t; if (item.method === v) o.selected = true; mSel.appendChild(o); });
+      mSel.onchange = () => { item.method = mSel.value; };
+      d.appendChild(mSel);
+    }
+    const unit = Object.assign(document.createElement('span'), { className: 'text-xs text-gray-500',
+      textContent: item.rule === 'duplicate_entry' ? '일 이내' : item.rule === 'benford' ? 'z >' : '배' });
+    const inp = document.createElement('input'); inp.type = 'number'; inp.min = 0; inp.step = item.rule === 'duplicate_entry' ? 1 : 0.1;
+    inp.className = 'border rounded w-16 px-1 py-0.5 text-xs'; inp.value = item.value; inp.oninput = () => { item.value = parseFloat(inp.value || 0); };
+    if (item.rule === 'benford') d.appendChild(unit);
+    d.appendChild(inp);
+    if (item.rule !== 'benford') d.appendChild(unit);
   }
   const del = document.createElement('button'); del.innerHTML = '<i class="fas fa-trash-alt"></i>'; del.className = 'text-xs text-red-500 hover:text-red-700 ml-2'; del.onclick = () => { deleteItem(logicTree, item.id); renderTree(); };
   d.appendChild(del);
@@ -114,10 +142,10 @@ function renderItem(item) {
 function findGroupById(tree, id) { if (tree.id === id) return tree; for (const it of tree.items) { if (it.type === 'group') { const r = findGroupById(it, id); if (r) return r; } } return null; }
 function deleteItem(tree, id) { tree.items = tree.items.filter(it => { if (it.id === id) return false; if (it.type === 'group') deleteItem(it, id); return true; }); }
 function collectRuleIds(tree, set = new Set()) { for (const it of tree.items) { if (it.type === 'cond') set.add(it.rule); else if (it.type === 'group') collectRuleIds(it, set); } return set; }
-function collectValues(tree, vals = {}) { for (const it of tree.items) { if (it.type === 'cond') { if (it.rule === 'keyword_search') vals[it.rule] = { value: it.value, mode: it.mode }; else if (it.rule === 'amount_over') vals[it.rule] = { op: it.op, value: it.value, target: it.target }; else if (it.rule === 'party_freq') vals[it.rule] = { op: it.op, value: it.value }; } else if (it.type === 'group') collectValues(it, vals); } return vals; }
+function collectValues(tree, vals = {}) { for (const it of tree.items) { if (it.type === 'cond') { if (it.rule === 'keyword_search') vals[it.rule] = { value: it.value, mode: it.mode }; else if (it.rule === 'amount_over') vals[it.rule] = { op: it.op, value: it.value, target: it.target }; else if (it.rule === 'party_freq') vals[it.rule] = { op: it.op, value: it.value }; else if (it.rule === 'amount_outlier') vals[it.rule] = { method: it.method, value: it.value }; else if (it.rule === 'benford' || it.rule === 'duplicate_entry') vals[it.rule] = { value: it.value }; } else if (it.type === 'group') collectValues(it, vals); } return vals; }
 
 function logMsg(msg, type = 'info') { const p = document.createElement('p'); p.textContent = `[${new Date().toLocaleTimeString()}] ${msg}`; if (type === 'error') p.classList.add('text-red-400'); if (type === 'success') p.classList.add('text-green-400'); $log.prepend(p); }
-function showLoading(show) { $loading.classList.toggle('hidden', !show); $loading.classList.toggle('flex', show); }
+function showLoading(show, text = '분석중...') { $loading.classList.toggle('hidden', !show); $loading.classList.toggle('flex', show); $loadingText.textContent = text; }
 
 function adjustColumnWidths(tbl) {
   const rows = Array.from(tbl.rows);
@@ -138,32 +166,126 @@ function adjustColumnWidths(tbl) {
   });
 }
 
-function renderTable(rows, hi = new Set(), ruleMap = {}) {
+function base64ToBuffer(b64) {
+  const bin = atob(b64);
+  const bytes = new Uint8Array(bin.length);
+  for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+  return bytes.buffer;
+}
+
+// 서버의 규칙 비트셋(analyzer.encode_rule_map)을 읽는다. 행별 목록은 조회할 때만 풀어낸다.
+// 반환: { get(행 위치) → [규칙 번호, ...] | undefined }
+function decodeRuleMap(rm) {
+  if (!rm || rm.encoding !== 'bitset') return NO_RULES;
+  const Arr = { 8: Uint8Array, 16: Uint16Array, 32: Uint32Array }[rm.width];
+  const bits = new Arr(base64ToBuffer(rm.bits));
+  const rows = rm.rows === null ? null : new Int32Array(base64ToBuffer(rm.rows));
+  const slotOf = i => {
+    if (rows === null) return i < bits.length / rm.words ? i : -1;
+    let lo = 0, hi = rows.length - 1;
+    while (lo <= hi) { const mid = (lo + hi) >> 1; if (rows[mid] === i) return mid; if (rows[mid] < i) lo = mid + 1; else hi = mid - 1; }
+    return -1;
+  };
+  return {
+    get(i) {
+      const slot = slotOf(i);
+      if (slot < 0) return undefined;
+      const list = [];
+      for (let w = 0; w < rm.words; w++) {
+        const word = bits[slot * rm.words + w];
+        for (let b = 0; b < rm.width; b++) if ((word >>> b) & 1) list.push(w * rm.width + b);
+      }
+      return list.length ? list : undefined;
+    }
+  };
+}
+
+function rememberRows(rows) { rows.forEach(r => rowsByIdx.set(r.__idx, r)); }
+
+// 새 보기 열기: 분석 결과(analysisId)가 있으면 체크박스 설정에 따라 강조/필터, 없으면 미리보기
+async function openView(analysisId = null, firstPage = null) {
+  view = {
+    analysisId, flaggedOnly: !!analysisId && $chkOnly.checked, expandSets: !!analysisId && $chkSet.checked,
+    total: 0, pages: new Map(), pending: new Set(),
+  };
+  rowsByIdx.clear();
+  $tableWrap.scrollTop = 0;
+  if (firstPage) { view.total = firstPage.total; view.pages.set(0, firstPage.rows); rememberRows(firstPage.rows); }
+  else await loadPage(0, false);
+  renderTable();
+  return view;
+}
+
+async function loadPage(p, rerender = true) {
+  const v = view;
+  if (!v || v.pages.has(p) || v.pending.has(p)) return;
+  v.pending.add(p);
+  const qs = new URLSearchParams({ dataset_id: datasetId, offset: p * PAGE_SIZE, limit: PAGE_SIZE, flagged_only: v.flaggedOnly ? 1 : 0, expand_sets: v.expandSets ? 1 : 0 });
+  if (v.analysisId) qs.set('analysis_id', v.analysisId);
+  try {
+    const res = await fetch('/rows?' + qs);
+    if (!res.ok) throw new Error(await res.text());
+    const data = await res.json();
+    if (v !== view) return; // 그사이 보기가 바뀜
+    v.total = data.total; v.highlighted = data.highlighted;
+    v.pages.set(p, data.rows); rememberRows(data.rows);
+    if (rerender) renderWindow();
+  } catch (e) { logMsg('행 불러오기 오류: ' + e.message, 'error'); } finally { v.pending.delete(p); }
+}
+
+function renderTable() {
   $aiVoucherResults.classList.add('hidden');
   $tableWrap.classList.remove('hidden');
   // Ensure the table container aligns to the start when displaying data
   $tableWrap.classList.remove('items-center', 'justify-center', 'flex');
   $tableWrap.classList.add('block');
-  if (!rows.length) {
+  if (!view || !view.total) {
     // Revert to centered layout when showing the empty message
     $tableWrap.classList.remove('block');
     $tableWrap.classList.add('flex', 'items-center', 'justify-center');
     $tableWrap.innerHTML = '<p class="text-gray-500">표시할 데이터가 없습니다.</p>';
     return;
-  }  const tbl = document.createElement('table'); tbl.className = 'text-sm text-left border-collapse';
+  }
+  $tableWrap.style.maxHeight = '75vh'; $tableWrap.style.overflowY = 'auto';
+  const tbl = document.createElement('table'); tbl.className = 'text-sm text-left border-collapse';
   const headers = [...dataHeaders, 'AI 코칭'];
-  const head = `<thead class="bg-gray-100"><tr>${headers.map(h => `<th class="p-2 border-b font-semibold whitespace-nowrap">${h}</th>`).join('')}</tr></thead>`;
-  const body = `<tbody>${rows.map((row, idx) => {
-    const originalIndex = row.__idx;
-    const isHighlighted = hi.has(idx);
-    const cls = isHighlighted ? 'highlight' : '';
-    const ruleId = isHighlighted && ruleMap[originalIndex] ? ruleMap[originalIndex][0] : null;
-    const ruleName = ruleId ? Object.keys(ruleTitles)[ruleId - 1] : '';
-    const coachButton = isHighlighted ? `<button class="ai-coach-btn text-blue-500 hover:text-blue-700" data-row-index="${originalIndex}" data-rule-name="${ruleName}" title="AI 코치에게 물어보기"><i class="fas fa-user-md"></i></button>` : '';
-    return `<tr class="border-b hover:bg-gray-50 ${cls}">${dataHeaders.map(c => `<td class="p-2 whitespace-nowrap">${row[c] ?? ''}</td>`).join('')}<td class="p-2 text-center whitespace-nowrap">${coachButton}</td></tr>`;
-  }).join('')}</tbody>`;
-  tbl.innerHTML = head + body;
-  $tableWrap.innerHTML = ''; $tableWrap.appendChild(tbl); adjustColumnWidths(tbl);
+  tbl.innerHTML = `<thead class="bg-gray-100 sticky top-0"><tr>${headers.map(h => `<th class="p-2 border-b font-semibold whitespace-nowrap">${h}</th>`).join('')}</tr></thead><tbody id="vt-body"></tbody>`;
+  $tableWrap.innerHTML = ''; $tableWrap.appendChild(tbl);
+  renderWindow();
+  adjustColumnWidths(tbl);
+}
+
+function rowHtml(row) {
+  const originalIndex = row.__idx;
+  const isHighlighted = !!row.__hi;
+  const cls = isHighlighted ? 'highlight' : '';
+  const ruleIds = isHighlighted ? lastRuleMap.get(originalIndex) : undefined;
+  const ruleId = ruleIds ? ruleIds[0] : null;
+  const ruleName = ruleId ? Object.keys(ruleTitles)[ruleId - 1] : '';
+  // 키워드 조건에 일치한 행은 어떤 키워드였는지 표시하고 AI 코치에도 넘긴다
+  const keywords = isHighlighted && row.__kw ? row.__kw.join(', ') : '';
+  const kwBadge = keywords ? `<span class="text-xs bg-yellow-100 text-yellow-800 px-1 rounded mr-1" title="일치한 키워드">${keywords}</span>` : '';
+  const coachRule = keywords ? `${ruleName} (일치 키워드: ${keywords})` : ruleName;
+  const coachButton = isHighlighted ? `${kwBadge}<button class="ai-coach-btn text-blue-500 hover:text-blue-700" data-row-index="${originalIndex}" data-rule-name="${coachRule}" title="AI 코치에게 물어보기"><i class="fas fa-user-md"></i></button>` : '';
+  return `<tr class="border-b hover:bg-gray-50 ${cls}" style="height:${ROW_HEIGHT}px">${dataHeaders.map(c => `<td class="p-2 whitespace-nowrap">${row[c] ?? ''}</td>`).join('')}<td class="p-2 text-center whitespace-nowrap">${coachButton}</td></tr>`;
+}
+
+// 스크롤 위치에 보이는 행(+여유분)만 그리고, 위아래는 빈 행 높이로 채운다
+function renderWindow() {
+  const body = document.getElementById('vt-body');
+  if (!body || !view) return;
+  const span = dataHeaders.length + 1;
+  const start = Math.max(0, Math.floor($tableWrap.scrollTop / ROW_HEIGHT) - OVERSCAN);
+  const end = Math.min(view.total, start + Math.ceil($tableWrap.clientHeight / ROW_HEIGHT) + 2 * OVERSCAN);
+  let html = `<tr style="height:${start * ROW_HEIGHT}px"><td colspan="${span}"></td></tr>`;
+  for (let i = start; i < end; i++) {
+    const p = Math.floor(i / PAGE_SIZE), rows = view.pages.get(p);
+    if (!rows) { loadPage(p); html += `<tr style="height:${ROW_HEIGHT}px"><td colspan="${span}" class="p-2 text-gray-400">불러오는 중...</td></tr>`; continue; }
+    const row = rows[i - p * PAGE_SIZE];
+    if (row) html += rowHtml(row);
+  }
+  html += `<tr style="height:${(view.total - end) * ROW_HEIGHT}px"><td colspan="${span}"></td></tr>`;
+  body.innerHTML = html;
 }
 
 function renderAiVoucherResults(results) {
@@ -174,7 +296,12 @@ function renderAiVoucherResults(results) {
     const errorVouchers = results.filter(r => r.analysis.isError);
     if (errorVouchers.length === 0) { $aiVoucherResults.innerHTML = '<p class="text-green-600 font-semibold text-center p-8">AI 분석 완료! 모든 전표가 대차평형의 원리를 만족합니다.</p>'; return; }
     logMsg(`AI 전표세트 분석 완료. ${errorVouchers.length}개의 잠재적 오류 발견.`, 'success');
-    errorVouchers.forEach(voucher => {
+    appendVoucherCards(errorVouchers);
+}
+
+// 작업 진행 중 도착한 결과는 카드만 덧붙인다
+function appendVoucherCards(vouchers) {
+    vouchers.filter(r => r.analysis.isError).forEach(voucher => {
         const card = document.createElement('div');
         card.className = 'voucher-card bg-white p-4 rounded-lg shadow-md mb-4';
         const { analysis, entries } = voucher;
@@ -187,50 +314,92 @@ function renderAiVoucherResults(results) {
     });
 }
 
+// 업로드한 분개장은 서버에 캐시되므로 이후 요청은 dataset_id만 보낸다. 캐시가 만료(410)되면 파일을 다시 보낸다.
+async function postDataset(url, fields = {}) {
+    const build = withFile => {
+        const fd = new FormData();
+        if (withFile || !datasetId) fd.append('file', $file.files[0]); else fd.append('dataset_id', datasetId);
+        for (const k in fields) fd.append(k, fields[k]);
+        return fd;
+    };
+    let res = await fetch(url, { method: 'POST', body: build(false) });
+    if (res.status === 410) { datasetId = null; res = await fetch(url, { method: 'POST', body: build(true) }); }
+    return res;
+}
+
+// 오래 걸리는 분석은 서버 작업(/jobs)으로 제출하고 진행 상황·부분 결과를 SSE로 받는다.
+// SSE 연결이 끊기면 마지막 cursor부터 폴링으로 이어 받는다. 반환값은 작업 결과.
+let currentJobId = null;
+
+async function runJob(url, fields, onUpdate) {
+    const res = await postDataset(url, fields);
+    const data = await res.json();
+    if (!res.ok) throw new Error(data.error || '서버 응답 오류');
+    if (data.dataset_id) datasetId = data.dataset_id;
+    currentJobId = data.job_id;
+    $cancelJob.classList.remove('hidden');
+    try { return await followJob(data.job_id, onUpdate); }
+    finally { currentJobId = null; $cancelJob.classList.add('hidden'); }
+}
+
+function followJob(jobId, onUpdate) {
+    return new Promise((resolve, reject) => {
+        let cursor = 0;
+        const handle = s => {
+            cursor = s.cursor;
+            onUpdate(s);
+            if (s.status === 'done') { resolve(s.result); return true; }
+            if (s.status === 'failed' || s.status === 'cancelled') { reject(new Error(s.error || '작업이 실패했습니다.')); return true; }
+            return false;
+        };
+        const poll = async () => {
+            try {
+                const r = await fetch(`/jobs/${jobId}?cursor=${cursor}`);
+                const s = await r.json();
+                if (!r.ok) throw new Error(s.error || '서버 응답 오류');
+                if (!handle(s)) setTimeout(poll, 1000);
+            } catch (e) { reject(e); }
+        };
+        if (!window.EventSource) { poll(); return; }
+        const es = new EventSource(`/jobs/${jobId}/events?cursor=${cursor}`);
+        es.onmessage = e => { if (handle(JSON.parse(e.data))) es.close(); };
+        es.onerror = () => { es.close(); poll(); };
+    });
+}
+
 async function runRuleBasedAnalysis() {
     const f = $file.files[0];
     if (!f) { logMsg('파일을 먼저 선택하세요.', 'error'); return; }
     const activeRules = [...collectRuleIds(logicTree)];
     if (!activeRules.length) { logMsg('활성화된 규칙이 없습니다.', 'error'); return; }
     const vals = collectValues(logicTree);
-    const fd = new FormData();
-    fd.append('file', f); fd.append('active_rules', JSON.stringify(activeRules)); fd.append('values', JSON.stringify(vals)); fd.append('logic_op', 'AND'); fd.append('logic_tree', JSON.stringify(logicTree));
     showLoading(true);
     try {
-        const res = await fetch('/analyze', { method: 'POST', body: fd });
-        if (!res.ok) throw new Error(await res.text());
-        const data = await res.json();
-        dataHeaders = data.headers; originalJournalData = data.rows;
-        journalData = data.rows.map((r, i) => ({ ...r, __idx: i }));
-        lastRuleMap = {}; for (const k in data.rule_map) lastRuleMap[+k] = data.rule_map[k];
-        const flagged = new Set(data.flagged_indices);
-        let hi = new Set(flagged);
-        if ($chkSet.checked) {
-            const keys = new Set([...flagged].map(i => `${journalData[i]['전표일자']}|${journalData[i]['전표번호']}`));
-            journalData.forEach((r, i) => { if (keys.has(`${r['전표일자']}|${r['전표번호']}`)) hi.add(i); });
-        }
-        let rowsToDisplay = journalData;
-        if ($chkOnly.checked) rowsToDisplay = rowsToDisplay.filter(r => hi.has(r.__idx));
-        const displayedHighlightSet = new Set();
-        rowsToDisplay.forEach((r, i) => { if (hi.has(r.__idx)) displayedHighlightSet.add(i); });
-        renderTable(rowsToDisplay, displayedHighlightSet, lastRuleMap);
-        logMsg(`규칙 기반 분석 완료 – ${hi.size}개 분개 확인`, 'success');
+        const data = await runJob('/jobs/analyze', { active_rules: JSON.stringify(activeRules), values: JSON.stringify(vals), logic_op: 'AND', logic_tree: JSON.stringify(logicTree) },
+            s => { if (s.total) $loadingText.textContent = `규칙 평가 중... (${s.done}/${s.total})`; });
+        if (data.dataset_id) datasetId = data.dataset_id;
+        dataHeaders = data.headers;
+        lastRuleMap = decodeRuleMap(data.rule_map);
+        const v = await openView(data.analysis_id);
+        logMsg(`규칙 기반 분석 완료 – ${v.highlighted ?? data.flagged_count}개 분개 확인`, 'success');
     } catch (e) { logMsg('분석 오류: ' + e.message, 'error'); } finally { showLoading(false); }
 }
 
 async function runAiVoucherAnalysis() {
     const f = $file.files[0];
     if (!f) { logMsg('파일을 먼저 선택하세요.', 'error'); return; }
-    const fd = new FormData();
-    fd.append('file', f);
     showLoading(true);
     logMsg('AI 전표세트 분석을 시작합니다...', 'info');
+    $tableWrap.classList.add('hidden');
+    $aiVoucherResults.classList.remove('hidden');
+    $aiVoucherResults.innerHTML = '';
     try {
-        const res = await fetch('/ai_analyze_vouchers', { method: 'POST', body: fd });
-        if (!res.ok) { const errData = await res.json(); throw new Error(errData.error || '서버 응답 오류'); }
-        const data = await res.json();
+        const data = await runJob('/jobs/ai_analyze_vouchers', {}, s => {
+            appendVoucherCards(s.items);
+            if (s.total) $loadingText.textContent = `AI 분석 중... (${s.done}/${s.total} 배치)`;
+        });
         renderAiVoucherResults(data);
-    } catch (e) { logMsg('AI 분석 오류: ' + e.message, 'error'); $aiVoucherResults.innerHTML = `<p class="text-red-500">${e.message}</p>`; } finally { showLoading(false); }
+    } catch (e) { logMsg('AI 분석 오류: ' + e.message, 'error'); $aiVoucherResults.insertAdjacentHTML('afterbegin', `<p class="text-red-500">${e.message}</p>`); } finally { showLoading(false); }
 }
 
 async function getAiCoaching(entryData, ruleName) {
@@ -252,6 +421,7 @@ document.addEventListener('DOMContentLoaded', () => {
         if (!f) return;
         $fileName.textContent = f.name;
         logMsg(`파일 선택: ${f.name}`, 'info');
+        datasetId = null;
         const fd = new FormData();
         fd.append('file', f);
         showLoading(true);
@@ -259,25 +429,28 @@ document.addEventListener('DOMContentLoaded', () => {
             const res = await fetch('/preview', { method: 'POST', body: fd });
             if (!res.ok) throw new Error(await res.text());
             const data = await res.json();
-            originalJournalData = data.rows;
+            datasetId = data.dataset_id;
             dataHeaders = data.headers;
-            journalData = originalJournalData.map((r, i) => ({ ...r, __idx: i }));
-            renderTable(journalData);
+            lastRuleMap = NO_RULES;
+            await openView(null, data);
             logMsg('파일 파싱 및 미리보기 완료', 'success');
         } catch (err) {
             logMsg('파일 파싱 오류: ' + err.message, 'error');
-            originalJournalData = [];
             dataHeaders = [];
-            journalData = [];
+            view = null;
             $tableContainer.innerHTML = `<p class="text-red-500">${err.message}</p>`;
         } finally {
             showLoading(false);
         }
     };    $runAnalysis.onclick = runRuleBasedAnalysis;
+    $tableWrap.addEventListener('scroll', () => requestAnimationFrame(renderWindow));
+    // 강조/필터 옵션이 바뀌면 같은 분석 결과를 다시 조회한다
+    [$chkSet, $chkOnly].forEach(chk => chk.onchange = () => { if (view && view.analysisId) openView(view.analysisId); });
     $runAiVoucherAnalysis.onclick = runAiVoucherAnalysis;
+    $cancelJob.onclick = () => { if (currentJobId) fetch(`/jobs/${currentJobId}/cancel`, { method: 'POST' }); };
     $closeModalBtn.onclick = () => $modal.classList.add('hidden');
     $modal.onclick = (e) => { if (e.target === $modal) $modal.classList.add('hidden'); };
-    $tableContainer.onclick = e => { const btn = e.target.closest('.ai-coach-btn'); if (btn) { const rowIndex = parseInt(btn.dataset.rowIndex); const ruleName = btn.dataset.ruleName; const entryData = originalJournalData[rowIndex]; getAiCoaching(entryData, ruleName); } };
+    $tableContainer.onclick = e => { const btn = e.target.closest('.ai-coach-btn'); if (btn) { const rowIndex = parseInt(btn.dataset.rowIndex); const ruleName = btn.dataset.ruleName; const { __idx, __hi, __kw, ...entryData } = rowsByIdx.get(rowIndex) || {}; getAiCoaching(entryData, ruleName); } };
     document.getElementById('add-condition-btn').onclick = () => { const sel = document.getElementById('condition-select').value; logicTree.items.push(newCond(sel)); renderTree(); };
     document.getElementById('add-group-btn').onclick = () => { logicTree.items.push(newGroup()); renderTree(); };
     logMsg('EntryChecker가 준비되었습니다. 파일을 업로드하고 분석을 시작하세요.');
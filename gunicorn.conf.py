@@ -0,0 +1,10 @@
+import os
+
+# 작업 상태(backend/jobs.py)와 업로드 캐시(backend/dataset_cache.py)는 프로세스 메모리에 있으므로
+# 작업 프로세스는 하나로 고정하고, 동시 요청은 스레드로 처리한다.
+#     gunicorn backend.app:app
+workers = 1
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+# 긴 분석은 작업으로 돌리지만, 동기 엔드포인트(/analyze 등)의 큰 요청도 끝날 수 있도록
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 300))
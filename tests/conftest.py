@@ -0,0 +1,7 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# 테스트가 저장소 디렉터리·AI 응답 캐시 파일을 건드리지 않도록 한다
+os.environ.setdefault('DATASET_STORE_DISABLED', '1')
+os.environ.setdefault('AI_CACHE_DISABLED', '1')
@@ -0,0 +1,108 @@
+import time
+import threading
+
+from backend import ai_batch
+from backend.ai_batch import BatchFailed, run_batches
+from backend.ai_cache import AICache
+from backend.ai_voucher_analyzer import analyze_voucher_sets_with_ai, create_prompt_for_batch, parse_batch_response
+from backend.metrics import registry
+from benchmarks.stub_model import StubModel
+from benchmarks.synthetic import make_journal
+
+FAST = {'rate_per_sec': 1000, 'burst': 100, 'backoff': 0}
+
+
+def vouchers(n):
+    return [{"date": "20240105", "voucherNo": str(i), "entries": [{"계정과목": "현금", "차변금액": 100.0}],
+             "is_balanced": False} for i in range(n)]
+
+
+def stub_call(model, batch):
+    return parse_batch_response(model.generate_content(create_prompt_for_batch(batch)).text)
+
+
+def test_results_keep_input_order():
+    # 앞 배치일수록 늦게 끝나도 결과는 입력 순서, on_done은 끝난 순서대로 모든 배치에 한 번씩
+    batches = [vouchers(k + 1) for k in range(6)]
+    done = []
+
+    def call(batch):
+        time.sleep(0.02 * (6 - len(batch)))
+        return stub_call(StubModel(latency=0), batch)
+
+    results = run_batches(batches, call, max_concurrency=6, on_done=lambda i, r: done.append(i), **FAST)
+    assert [len(r) for r in results] == [1, 2, 3, 4, 5, 6]
+    assert [[a['cause'] for a in r] for r in results] == [[f'스텁 {i}' for i in range(k + 1)] for k in range(6)]
+    assert sorted(done) == list(range(6)) and done != list(range(6))
+
+
+def test_failures_are_retried_with_backoff():
+    model = StubModel(latency=0, fail_rate=0.5, seed=3)
+    batches = [vouchers(2) for _ in range(8)]
+    results = run_batches(batches, lambda b: stub_call(model, b), retries=10, **FAST)
+    assert all(len(r) == 2 for r in results)
+    assert model.calls > len(batches)
+
+    # 재시도 사이에는 backoff * 2^n만큼 기다린다 (0.05 + 0.1)
+    attempts = []
+
+    def always_fail(batch):
+        attempts.append(time.monotonic())
+        raise RuntimeError('실패')
+
+    results = run_batches([vouchers(1)], always_fail, retries=2, rate_per_sec=1000, burst=100, backoff=0.05)
+    assert isinstance(results[0], BatchFailed) and '실패' in str(results[0])
+    assert len(attempts) == 3
+    assert attempts[1] - attempts[0] >= 0.05 and attempts[2] - attempts[1] >= 0.1
+
+
+def test_rate_limit_spaces_call_starts():
+    starts = []
+    lock = threading.Lock()
+
+    def call(batch):
+        with lock:
+            starts.append(time.monotonic())
+        return stub_call(StubModel(latency=0), batch)
+
+    run_batches([vouchers(1) for _ in range(6)], call, max_concurrency=6, rate_per_sec=20, burst=1, backoff=0)
+    starts.sort()
+    # burst 1이면 초당 20개 → 호출 시작 간격 약 0.05초, 6개에 최소 0.25초
+    assert starts[-1] - starts[0] >= 0.25 * 0.9
+
+
+def test_timed_out_call_is_counted_until_it_finishes(monkeypatch):
+    release = threading.Event()
+
+    def hang(batch):
+        release.wait(5)
+        return []
+
+    before = dict(registry._values).get(('entrychecker_ai_abandoned_calls_total', ()), 0)
+    results = run_batches([vouchers(1)], hang, retries=0, timeout=0.05, **FAST)
+    assert isinstance(results[0], BatchFailed)
+    assert ai_batch.abandoned_calls() == 1
+    assert registry._values[('entrychecker_ai_abandoned_calls_total', ())] == before + 1
+
+    # 버려 둔 호출이 상한에 이르면 새 호출을 보내지 않는다
+    monkeypatch.setattr(ai_batch, 'MAX_ABANDONED_CALLS', 1)
+    calls = []
+    results = run_batches([vouchers(1)], lambda b: calls.append(b) or [], retries=1, **FAST)
+    assert isinstance(results[0], BatchFailed) and not calls
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while ai_batch.abandoned_calls() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert ai_batch.abandoned_calls() == 0
+    assert run_batches([vouchers(1)], lambda b: calls.append(b) or [], retries=0, **FAST) == [[]]
+
+
+def test_stub_analysis_recovers_from_failures():
+    df = make_journal(60, lines_per_voucher=3, unbalanced_ratio=1.0)
+    expected = analyze_voucher_sets_with_ai(df, model=StubModel(latency=0), cache=AICache(enabled=False), **FAST)
+    model = StubModel(latency=0, fail_rate=0.4, seed=1)
+    results = analyze_voucher_sets_with_ai(df, model=model, cache=AICache(enabled=False), retries=10, **FAST)
+    assert [(r['voucherNo'], r['analysis']['cause']) for r in results] == \
+           [(r['voucherNo'], r['analysis']['cause']) for r in expected]
+    assert all(r['analysis']['cause'] == f"스텁 {r['voucherNo']}" for r in results)
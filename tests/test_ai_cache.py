@@ -0,0 +1,68 @@
+import pytest
+
+from backend import ai_voucher_analyzer
+from backend.ai_cache import AICache
+from backend.ai_voucher_analyzer import analyze_voucher_sets_with_ai
+from benchmarks.stub_model import StubModel
+from benchmarks.synthetic import make_journal
+
+FAST = {'rate_per_sec': 1000, 'burst': 100, 'backoff': 0}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AICache(path=str(tmp_path / 'ai_cache.sqlite3'), enabled=True)
+
+
+@pytest.fixture
+def journal():
+    # 대차 불일치 전표세트 여러 개
+    return make_journal(36, lines_per_voucher=3, unbalanced_ratio=1.0)
+
+
+def analyze(df, model, cache):
+    return analyze_voucher_sets_with_ai(df, model=model, cache=cache, **FAST)
+
+
+def test_first_call_misses_and_repeat_hits(journal, cache):
+    model = StubModel(latency=0)
+    first = analyze(journal, model, cache)
+    calls, n = model.calls, len(first)
+    assert calls > 0 and n > 1
+    assert cache.stats()['misses'] == {'voucher': n} and cache.stats()['entries'] == n
+
+    again = analyze(journal, model, cache)
+    assert model.calls == calls     # 모두 캐시에서 나와 AI를 다시 부르지 않는다
+    assert cache.stats()['hits'] == {'voucher': n}
+    assert [(r['voucherNo'], r['analysis']) for r in again] == [(r['voucherNo'], r['analysis']) for r in first]
+
+
+def test_prompt_version_change_misses(journal, cache, monkeypatch):
+    model = StubModel(latency=0)
+    n = len(analyze(journal, model, cache))
+    calls = model.calls
+    monkeypatch.setattr(ai_voucher_analyzer, 'PROMPT_VERSION', ai_voucher_analyzer.PROMPT_VERSION + 1)
+    analyze(journal, model, cache)
+    assert model.calls == 2 * calls
+    assert cache.stats()['misses'] == {'voucher': 2 * n}
+
+
+def test_model_change_misses(journal, cache):
+    class OtherStub(StubModel):
+        model_name = 'stub-2'
+
+    model = StubModel(latency=0)
+    n = len(analyze(journal, model, cache))
+    other = OtherStub(latency=0)
+    analyze(journal, other, cache)
+    assert other.calls == model.calls
+    assert cache.stats()['hits'] == {} and cache.stats()['entries'] == 2 * n
+
+
+def test_disabled_cache_writes_nothing(journal, tmp_path):
+    path = tmp_path / 'ai_cache.sqlite3'
+    model = StubModel(latency=0)
+    analyze(journal, model, AICache(path=str(path), enabled=False))
+    analyze(journal, model, AICache(path=str(path), enabled=False))
+    assert not path.exists()
+    assert AICache(path=str(path), enabled=True).stats()['entries'] == 0
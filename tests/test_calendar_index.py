@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend import calendar_index
+from backend.analyzer import prepare_memo, run_rules
+from backend.calendar_index import calendar_version, holiday_mask, register_calendar
+
+
+@pytest.fixture(autouse=True)
+def no_extra_calendars(monkeypatch):
+    # 등록한 달력이 다른 테스트에 남지 않도록 빈 저장소로 바꿔 둔다
+    monkeypatch.setattr(calendar_index, 'EXTRA_CALENDARS', {})
+
+
+def dates(*days):
+    return pd.Series(pd.to_datetime(list(days)))
+
+
+def test_kr_holidays_include_substitute_days():
+    days = dates('2023-01-24', '2023-05-29', '2024-02-12', '2024-05-06',   # 대체공휴일
+                 '2024-05-05', '2024-05-07', '2024-03-04', None)
+    assert holiday_mask(days).tolist() == [True, True, True, True, True, False, False, False]
+
+
+def test_registered_calendar_applies_only_when_named():
+    register_calendar('회사휴무', ['2024-03-04', '2024-12-31', '날짜 아님'])
+    days = dates('2024-03-04', '2024-12-31', '2024-03-05', '2025-01-01')
+    assert holiday_mask(days).tolist() == [False, False, False, True]
+    assert holiday_mask(days, ('회사휴무',)).tolist() == [True, True, False, True]
+    # 등록되지 않은 이름은 무시한다
+    assert holiday_mask(days, ('없는달력', '회사휴무')).tolist() == [True, True, False, True]
+
+
+def test_re_registering_a_calendar_invalidates_cached_tables():
+    days = dates('2024-03-04', '2024-03-05')
+    register_calendar('결산', ['2024-03-04'])
+    version = calendar_version()
+    assert holiday_mask(days, ('결산',)).tolist() == [True, False]
+    register_calendar('결산', ['2024-03-05'])
+    assert calendar_version() != version
+    assert holiday_mask(days, ('결산',)).tolist() == [False, True]
+
+
+def test_dataset_memo_drops_condition_masks_when_calendars_change():
+    df = pd.DataFrame({'전표일자': ['20240304', '20240305'], '전표번호': ['1', '2'], '계정과목': ['현금', '현금'],
+                       '차변금액': [1.0, 1.0], '대변금액': [1.0, 1.0]})
+    tree = {'type': 'group', 'op': 'AND', 'items': [{'type': 'cond', 'rule': 'weekend_txn', 'calendars': ['결산']}]}
+    memo = prepare_memo()
+    register_calendar('결산', ['2024-03-04'])
+    assert run_rules(df, [], {}, 'AND', tree, workers=1, memo=memo)[1].tolist() == [True, False]
+    register_calendar('결산', ['2024-03-05'])
+    final = run_rules(df, [], {}, 'AND', tree, workers=1, memo=memo)[1]
+    assert np.array_equal(final, [False, True])
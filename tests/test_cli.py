@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from backend import cli
+
+
+def write_rules(tmp_path, spec):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps(spec, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+def test_load_rules_accepts_flat_and_tree_files(tmp_path):
+    flat = cli.load_rules(write_rules(tmp_path, {'active_rules': ['weekend_txn'], 'values': {}}))
+    assert flat['active_rules'] == ['weekend_txn'] and flat['logic_tree'] == {}
+    tree = {'type': 'group', 'op': 'OR', 'items': [
+        {'type': 'cond', 'rule': 'weekend_txn'},
+        {'type': 'group', 'op': 'AND', 'items': [{'type': 'cond', 'rule': 'benford'}, {}]},
+    ]}
+    assert cli.load_rules(write_rules(tmp_path, tree))['logic_tree'] == tree
+
+
+@pytest.mark.parametrize('spec, message', [
+    ([{'type': 'cond', 'rule': 'weekend_txn'}], '최상위는 JSON 객체'),
+    ('weekend_txn', '최상위는 JSON 객체'),
+    ({'active_rules': ['weekend_txn', 'no_such_rule']}, 'no_such_rule'),
+    ({'active_rules': 'weekend_txn'}, 'active_rules'),
+    ({'active_rules': ['weekend_txn'], 'values': [1]}, 'values'),
+    ({'type': 'group', 'op': 'OR', 'items': [
+        {'type': 'cond', 'rule': 'weekend_txn'},
+        {'type': 'group', 'op': 'AND', 'items': [{'type': 'cond', 'rule': 'benfrod'}]},
+    ]}, 'benfrod'),
+    ({'logic_tree': {'type': 'group', 'items': [{'type': 'cond', 'value': 1}]}}, 'rule'),
+    ({'logic_tree': {'type': 'group', 'items': ['weekend_txn']}}, 'JSON 객체'),
+    ({'logic_tree': {'type': 'group', 'items': {'type': 'cond', 'rule': 'weekend_txn'}}}, 'items'),
+    ({'active_rules': []}, '조건이 없습니다'),
+])
+def test_load_rules_rejects_malformed_files(tmp_path, spec, message):
+    with pytest.raises(ValueError, match=message):
+        cli.load_rules(write_rules(tmp_path, spec))
+
+
+def test_main_reports_bad_rules_file(tmp_path, capsys):
+    rules = write_rules(tmp_path, {'type': 'group', 'items': [{'type': 'cond', 'rule': 'benfrod'}]})
+    journal = tmp_path / 'j.csv'
+    journal.write_text('전표일자,전표번호,차변금액,대변금액\n20240105,1,1,1\n', encoding='utf-8')
+    assert cli.main([str(journal), '--rules', rules, '--no-store', '--out', str(tmp_path / 'out')]) == 2
+    assert 'benfrod' in capsys.readouterr().err
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+from backend.analyzer import analyze_journal, run_rules, memo_nbytes
+from backend.dataset_cache import DatasetCache
+from backend.results import get_page, make_result
+
+TREE = {'type': 'group', 'op': 'AND', 'items': [
+    {'type': 'cond', 'rule': 'amount_over', 'op': '>', 'value': 1000, 'target': 'debit'},
+]}
+
+
+def journal(n=6):
+    return pd.DataFrame({
+        '전표일자': ['20240105'] * n,
+        '전표번호': [str(i // 2) for i in range(n)],
+        '계정과목': ['현금', '매출'] * (n // 2),
+        '거래처코드': ['A'] * n,
+        '적요': [''] * n,
+        '차변금액': [100.0] * n,
+        '대변금액': [0.0] * n,
+    })
+
+
+def test_analyze_journal_sees_in_place_edit():
+    df = journal()
+    assert analyze_journal(df, [], {}, 'AND', TREE)['flagged_indices'] == []
+    df.loc[0, '차변금액'] = 5000.0
+    assert analyze_journal(df, [], {}, 'AND', TREE)['flagged_indices'] == [0]
+
+
+def test_memo_reuse_matches_fresh_run():
+    df = journal(200)
+    df['차변금액'] = np.arange(200) * 10.0
+    memo = {}
+    for thr in (0, 500, 1000, 1500, 1990):
+        tree = {'type': 'group', 'op': 'AND', 'items': [
+            {'type': 'cond', 'rule': 'amount_over', 'op': '>=', 'value': thr, 'target': 'debit'},
+            {'type': 'cond', 'rule': 'unbalanced_set'}]}
+        _, f1, b1 = run_rules(df, [], {}, 'AND', tree, workers=1, memo=memo)
+        _, f2, b2 = run_rules(df, [], {}, 'AND', tree, workers=1)
+        assert np.array_equal(f1, f2) and np.array_equal(b1, b2)
+    assert len(memo['leaf']) > 1
+
+
+def test_cache_owns_memo_and_counts_it_in_budget():
+    cache = DatasetCache(max_entries=8, ttl=3600, memory_budget_mb=1024)
+    df = journal(1000)
+    dataset_id = cache.put(df)
+    memo = cache.memo(dataset_id)
+    before = cache.stats()['nbytes']
+    run_rules(df, [], {}, 'AND', TREE, workers=1, memo=memo)
+    cache.update_memo_nbytes(dataset_id, memo_nbytes(memo))
+    assert memo_nbytes(memo) > 0
+    assert cache.stats()['nbytes'] == before + memo_nbytes(memo)
+
+    # 메모까지 합쳐 예산을 넘으면 오래된 데이터셋부터 제거되고 메모도 함께 사라진다
+    cache.memory_budget = cache.stats()['nbytes'] + 1
+    other = cache.put(journal(1000))
+    assert cache.memo(dataset_id) is None and cache.get(dataset_id) is None
+    assert cache.memo(other) == {}
+    cache.discard(other)
+    assert cache.stats()['nbytes'] == 0
+
+
+def test_voucher_ids_follow_edited_voucher_numbers():
+    df = journal(4)
+    df['차변금액'] = [100.0, 0.0, 100.0, 0.0]
+    df['대변금액'] = [0.0, 100.0, 0.0, 100.0]
+    tree = {'type': 'group', 'op': 'AND', 'items': [{'type': 'cond', 'rule': 'unbalanced_set'}]}
+    assert analyze_journal(df, [], {}, 'AND', tree)['flagged_indices'] == []
+    # 같은 객체·같은 행 수에서 전표번호만 바꾸면 전표세트가 다시 나뉘어야 한다
+    df['전표번호'] = ['0', '1', '1', '2']
+    assert analyze_journal(df, [], {}, 'AND', tree)['flagged_indices'] == [0, 3]
+
+
+def test_new_dataset_never_sees_another_datasets_voucher_ids():
+    cache = DatasetCache(max_entries=8, ttl=3600, memory_budget_mb=1024)
+    tree = {'type': 'group', 'op': 'AND', 'items': [{'type': 'cond', 'rule': 'unbalanced_set'}]}
+    results = []
+    for numbers in (['0', '0', '1', '1'], ['0', '1', '2', '3']):
+        df = journal(4)
+        df['전표번호'] = numbers
+        df['차변금액'] = [100.0, 0.0, 100.0, 0.0]
+        df['대변금액'] = [0.0, 100.0, 0.0, 100.0]
+        dataset_id = cache.put(df)
+        _, final_mask, _ = run_rules(df, [], {}, 'AND', tree, workers=1, memo=cache.memo(dataset_id))
+        results.append(np.flatnonzero(final_mask).tolist())
+        cache.discard(dataset_id)
+        del df
+    assert results == [[], [0, 1, 2, 3]]
+
+
+def test_cached_result_is_complete_before_it_is_shared():
+    cache = DatasetCache(max_entries=8, ttl=3600, memory_budget_mb=1024)
+    df = journal(10)
+    dataset_id = cache.put(df)
+    before = cache.stats()['nbytes']
+    final = np.zeros(10, dtype=bool)
+    final[[2, 7]] = True
+    result = make_result(df, final, np.zeros((10, 1), dtype=np.uint64))
+    analysis_id = cache.put_result(dataset_id, result)
+    # 전표세트 확장 강조·강조 행 위치는 보관할 때 이미 있고, 크기도 예산에 들어간다
+    assert result['positions_expanded'].tolist() == [2, 3, 6, 7]
+    assert cache.stats()['nbytes'] == before + sum(v.nbytes for k, v in result.items() if k != 'keywords')
+
+    _, cached = cache.get_result(dataset_id, analysis_id)
+    keys = set(cached)
+    page = get_page(df, cached, limit=10, flagged_only=True, expand_sets=True)
+    assert [r['__idx'] for r in page['rows']] == [2, 3, 6, 7]
+    assert get_page(df, cached, flagged_only=True)['total'] == 2
+    assert set(cached) == keys     # 조회는 캐시된 결과를 고치지 않는다
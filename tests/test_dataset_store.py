@@ -0,0 +1,22 @@
+import logging
+
+import pandas as pd
+
+from backend.dataset_store import DatasetStore
+from backend.metrics import registry
+
+
+def test_store_hit_is_counted_not_printed(tmp_path, capsys, caplog):
+    path = tmp_path / 'journal.csv'
+    pd.DataFrame({'전표일자': ['20240105'] * 4, '전표번호': ['1', '1', '2', '2'],
+                  '차변금액': ['100', '', '100', ''], '대변금액': ['', '100', '', '100']}).to_csv(path, index=False)
+    store = DatasetStore(directory=str(tmp_path / 'store'), enabled=True)
+    first = store.read(str(path))
+    loads = registry._values.get(('entrychecker_stage_seconds', (('stage', 'store_load'),)), [0])[-1]
+    with caplog.at_level(logging.DEBUG, logger='backend.dataset_store'):
+        again = store.read(str(path))
+    pd.testing.assert_frame_equal(first, again)
+    assert capsys.readouterr().out == ''
+    assert store.stats()['hits'] == 1 and store.stats()['misses'] == 1
+    assert registry._values[('entrychecker_stage_seconds', (('stage', 'store_load'),))][-1] == loads + 1
+    assert any('데이터셋 저장소에서 읽음' in r.getMessage() for r in caplog.records)
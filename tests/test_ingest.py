@@ -0,0 +1,52 @@
+import logging
+
+import pandas as pd
+
+from backend.analyzer import RuleContext
+from backend.ingest import iter_csv_chunks, read_journal
+
+
+def write_journal(path, n=40):
+    pd.DataFrame({
+        '전표일자': ['20240105', '20240106'] * (n // 2),
+        '전표번호': [str(i // 2) for i in range(n)],
+        '계정과목': ['현금', '매출'] * (n // 2),
+        '차변금액': ['1,000', ''] * (n // 2),
+        '대변금액': ['', '1,000'] * (n // 2),
+    }).to_csv(path, index=False, encoding='utf-8-sig')
+
+
+def test_read_is_quiet_and_logs_memory_at_debug(tmp_path, capsys, caplog):
+    path = tmp_path / 'journal.csv'
+    write_journal(path)
+    with caplog.at_level(logging.DEBUG, logger='backend.ingest'):
+        read_journal(str(path))
+    assert capsys.readouterr().out == ''
+    assert any('메모리' in r.getMessage() for r in caplog.records)
+
+
+def test_voucher_date_keeps_file_strings_and_parses_once_per_dataset(tmp_path):
+    path = tmp_path / 'journal.csv'
+    write_journal(path)
+    df = read_journal(str(path))
+    # 전표일자는 파일의 문자열 그대로 category로 두고, datetime64는 데이터셋 메모에서 한 번 파싱한다
+    assert isinstance(df['전표일자'].dtype, pd.CategoricalDtype)
+    assert df['전표일자'].iloc[0] == '20240105'
+    memo = {}
+    dates = RuleContext(df, memo=memo).dates
+    assert dates.dtype == 'datetime64[ns]' and dates.iloc[1] == pd.Timestamp('2024-01-06')
+    assert RuleContext(df, memo=memo).dates is dates
+
+
+def test_header_whitespace_does_not_drop_column_types(tmp_path):
+    # 머리글에 공백이 붙어 있어도 dtype은 파일의 원래 이름으로 지정하고, 열 이름은 읽은 뒤에 다듬는다
+    path = tmp_path / 'spaced.csv'
+    path.write_text(' 전표일자 ,전표번호 , 계정과목,차변금액 , 대변금액\n'
+                    '20240105,0012,현금,"1,000",\n'
+                    '20240105,0012,매출,,1000\n', encoding='utf-8-sig')
+    df = read_journal(str(path))
+    assert list(df.columns) == ['전표일자', '전표번호', '계정과목', '차변금액', '대변금액']
+    assert df['전표번호'].tolist() == ['0012', '0012']       # 숫자로 추론되면 앞의 0이 사라진다
+    assert df['차변금액'].tolist()[0] == 1000.0 and df['대변금액'].tolist()[1] == 1000.0
+    chunks = list(iter_csv_chunks(str(path), chunksize=1))
+    assert [c['전표번호'].iloc[0] for c in chunks] == ['0012', '0012']
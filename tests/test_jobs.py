@@ -0,0 +1,19 @@
+import logging
+
+from backend.jobs import JobManager
+
+
+def test_failed_job_is_logged_with_traceback(capsys, caplog):
+    def fail(job):
+        raise ValueError('규칙 JSON 오류')
+
+    manager = JobManager(workers=1)
+    with caplog.at_level(logging.ERROR, logger='backend.jobs'):
+        job = manager.submit('rules', fail)
+        version = 0
+        while not job.finished:
+            version = job.wait(version, timeout=5)
+    assert job.status == 'failed' and job.error == '규칙 JSON 오류'
+    assert capsys.readouterr().out == ''
+    (record,) = caplog.records
+    assert job.id in record.getMessage() and record.exc_info[0] is ValueError
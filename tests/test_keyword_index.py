@@ -0,0 +1,57 @@
+import random
+import re
+
+import numpy as np
+
+from backend.keyword_index import KeywordMatcher, get_matcher, parse_keywords
+
+
+def regex_contains(keywords, text):
+    """키워드 검색이 예전에 쓰던 방식: 키워드를 이스케이프해 |로 잇고 대소문자 무시 검색."""
+    return bool(keywords) and re.search('|'.join(map(re.escape, keywords)), text, re.IGNORECASE) is not None
+
+
+def earliest_end(keywords, text):
+    """first의 기준: 가장 먼저 끝나는 키워드, 같은 위치에서 끝나면 긴 키워드, 그래도 같으면 앞 번호."""
+    found = [(text.lower().find(kw.lower()) + len(kw), -len(kw), i)
+             for i, kw in enumerate(keywords) if kw.lower() in text.lower()]
+    return min(found)[2] if found else -1
+
+
+def test_matches_agree_with_regex_on_random_lists():
+    rng = random.Random(0)
+    alphabet = 'abAB가나'      # 글자 수가 적어 겹치는 키워드와 접두·접미 관계가 자주 생긴다
+    word = lambda lo, hi: ''.join(rng.choice(alphabet) for _ in range(rng.randint(lo, hi)))
+    for _ in range(200):
+        keywords = parse_keywords(','.join(word(1, 4) for _ in range(rng.randint(1, 6))))
+        values = [word(0, 12) for _ in range(30)]
+        matcher = KeywordMatcher(keywords)
+        hits = matcher.match_values(values)
+        assert hits.dtype == np.int32
+        assert [h >= 0 for h in hits] == [regex_contains(keywords, v) for v in values]
+        assert hits.tolist() == [earliest_end(keywords, v) for v in values]
+
+
+def test_overlapping_keywords():
+    matcher = KeywordMatcher(['he', 'she', 'his', 'hers'])
+    assert matcher.first('ushers') == 1      # 'she'와 'he'가 같은 곳에서 끝나면 긴 'she'
+    assert matcher.first('ahis') == 2
+    assert matcher.first('her') == 0         # 'hers'는 끝나기 전에 'he'가 먼저 끝난다
+    # 한 키워드가 다른 키워드를 품고 있어도 먼저 끝나는 쪽
+    assert KeywordMatcher(['가지급금', '지급']).first('가지급금 정산') == 1
+    assert KeywordMatcher(['bcd', 'abc']).first('abcd') == 1
+
+
+def test_case_insensitive():
+    matcher = get_matcher('VAT, 부가세')
+    assert matcher.match_values(['vat 환급', 'Vat', '부가세대급금', 'VA T']).tolist() == [0, 0, 1, -1]
+    # 대소문자만 다른 중복 키워드는 앞 번호로 보고한다
+    assert KeywordMatcher(['Cash', 'CASH']).first('petty cash') == 0
+
+
+def test_empty_keyword_list_matches_nothing():
+    for matcher in (KeywordMatcher([]), get_matcher(' , ,')):
+        assert matcher.keywords == []
+        assert matcher.first('아무 적요') == -1
+        assert matcher.match_values(['a', '', 'nan']).tolist() == [-1, -1, -1]
+        assert not regex_contains(matcher.keywords, 'a')
@@ -0,0 +1,97 @@
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from backend import parallel
+from backend.analyzer import (RuleContext, build_rule_tree, evaluate_plan, prepare_memo, run_rules,
+                              to_numeric_amounts, voucher_ids)
+from backend.ingest import normalize_journal
+from backend.rule_plan import compile_plan, iter_leaves
+from benchmarks.synthetic import make_journal
+
+TREE = {'type': 'group', 'op': 'OR', 'items': [
+    {'type': 'cond', 'rule': 'unbalanced_set'},
+    {'type': 'group', 'op': 'AND', 'items': [
+        {'type': 'cond', 'rule': 'weekend_txn'},
+        {'type': 'cond', 'rule': 'amount_over', 'op': '>=', 'value': 1_000_000, 'target': 'debit'},
+    ]},
+    {'type': 'cond', 'rule': 'party_freq', 'op': '<=', 'value': 2},
+    {'type': 'cond', 'rule': 'amount_outlier', 'method': 'iqr', 'value': 3},
+]}
+
+
+@pytest.fixture(params=['forkserver', 'fork'])
+def start_method(request, monkeypatch):
+    monkeypatch.setattr(parallel, 'MIN_ROWS', 1)
+    monkeypatch.setattr(parallel, 'START_METHOD', request.param)
+    return request.param
+
+
+def test_parallel_matches_serial(start_method):
+    df = make_journal(20_000, seed=1)
+    _, f1, b1 = run_rules(df, [], {}, 'AND', TREE, workers=1)
+    _, f2, b2 = run_rules(df, [], {}, 'AND', TREE, workers=3)
+    assert np.array_equal(f1, f2) and np.array_equal(b1, b2)
+
+
+def test_concurrent_parallel_analyses(start_method):
+    # 크기가 다른 데이터셋을 여러 스레드에서 동시에 병렬 평가해도 서로의 입력이 섞이지 않아야 한다
+    frames = [to_numeric_amounts(make_journal(n, seed=s)) for n, s in ((30_000, 2), (20_000, 3), (10_000, 4))]
+    plan = compile_plan(build_rule_tree([], {}, 'AND', TREE))
+    vids = [voucher_ids(df) for df in frames]
+    expected = [evaluate_plan(plan, RuleContext(df, vid)) for df, vid in zip(frames, vids)]
+
+    def run_round():
+        results, errors = [None] * len(frames), []
+        barrier = threading.Barrier(len(frames))
+
+        def work(k):
+            try:
+                barrier.wait(timeout=60)     # 모든 분석이 같은 순간에 프로세스 풀을 만들도록
+                results[k] = parallel.evaluate_parallel(frames[k], plan, vids[k], 2)
+            except Exception as e:     # 스레드 안의 예외는 밖으로 전해지지 않으므로 모아서 확인한다
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(k,)) for k in range(len(frames))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=120)
+        assert not errors
+        for (f1, h1), (f2, h2) in zip(expected, results):
+            assert np.array_equal(f1, f2)
+            assert h1.keys() == h2.keys() and all(np.array_equal(h1[no], h2[no]) for no in h1)
+
+    # 스레드를 자주 바꿔 가며 돌려야 입력을 전역으로 공유하던 구현의 경쟁 상태가 드러난다
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for _ in range(5):
+            run_round()
+    finally:
+        sys.setswitchinterval(interval)
+
+
+def test_pool_is_reused_and_memo_skips_recomputation(start_method, monkeypatch):
+    # category 열(코드 공유)과 문자열 열(분할별 직렬화)이 섞인 데이터셋
+    df = to_numeric_amounts(normalize_journal(make_journal(20_000, seed=5)))
+    plan = compile_plan(build_rule_tree([], {}, 'AND', TREE))
+    vid = voucher_ids(df)
+    expected = evaluate_plan(plan, RuleContext(df, vid))
+    memo = prepare_memo()
+
+    final_mask, hits = parallel.evaluate_parallel(df, plan, vid, 2, memo=memo)
+    pool = parallel._POOLS[(start_method, 2)]
+    assert np.array_equal(final_mask, expected[0])
+    assert all(np.array_equal(hits[no], expected[1][no]) for no in expected[1])
+    assert {leaf['key'] for leaf in iter_leaves(plan)} <= set(memo['leaf'])
+
+    parallel.evaluate_parallel(df, plan, vid, 2)
+    assert parallel._POOLS[(start_method, 2)] is pool
+
+    # 모든 조건이 메모에 있으면 결합만 하고 프로세스 풀을 쓰지 않는다
+    monkeypatch.setattr(parallel, '_pool', lambda workers: pytest.fail('메모가 있는데 풀을 썼다'))
+    again = parallel.evaluate_parallel(df, plan, vid, 2, memo=memo)
+    assert np.array_equal(again[0], expected[0])
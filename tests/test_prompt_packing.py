@@ -0,0 +1,80 @@
+import json
+import random
+
+import pandas as pd
+
+from backend.ai_cache import AICache
+from backend.ai_voucher_analyzer import analyze_voucher_sets_with_ai, create_prompt_for_batch
+from backend.analyzer import to_numeric_amounts
+from backend.prompt_packing import pack_batches, payload_tokens, voucher_payload, summarize_entries
+from benchmarks.stub_model import StubModel
+from benchmarks.synthetic import make_journal
+
+BUDGET = 600
+
+
+def voucher(no, n_entries, n_accounts=3):
+    entries = [{"전표일자": "20240105", "전표번호": no, "계정과목": f"계정{i % n_accounts}",
+                "차변금액": 1000.0 * (i + 1), "대변금액": float('nan'), "적요": f"적요 {i}"} for i in range(n_entries)]
+    return {"date": "20240105", "voucherNo": no, "entries": entries, "is_balanced": False}
+
+
+def listing(prompt):
+    return json.loads(prompt.split('[분석 대상 전표 목록]')[1].split('[응답 형식]')[0])
+
+
+def test_every_position_packed_exactly_once_in_order():
+    rng = random.Random(0)
+    costs = [rng.choice([5, 50, 200, 599, 600, 2500]) for _ in range(500)]
+    batches = pack_batches(costs, BUDGET, max_items=20)
+    assert [i for b in batches for i in b] == list(range(len(costs)))
+    assert all(b for b in batches) and all(len(b) <= 20 for b in batches)
+    assert all(sum(costs[i] for i in b) <= BUDGET for b in batches if len(b) > 1)
+    # 혼자서 예산을 넘는 전표는 자기 배치에 혼자 들어간다
+    assert all(b == [i] for b in batches for i in b if costs[i] > BUDGET)
+
+
+def test_oversized_voucher_is_summarized_within_budget():
+    big = voucher('L1', 400)
+    payload = voucher_payload(big, BUDGET)
+    assert 'entries' not in payload and payload['entryCount'] == 400
+    assert payload_tokens(payload) <= BUDGET
+    assert payload['debitTotal'] == sum(1000 * (i + 1) for i in range(400))
+    assert sum(row['건수'] for row in payload['summary']) == 400
+
+    # 계정이 너무 많으면 금액이 큰 계정만 남기고 빠진 계정 수를 적는다
+    wide = voucher('L2', 400, n_accounts=400)
+    payload = voucher_payload(wide, BUDGET)
+    assert payload_tokens(payload) <= BUDGET
+    assert payload['omittedAccounts'] == 400 - len(payload['summary'])
+    assert payload['summary'][0]['계정과목'] == '계정399'
+    assert summarize_entries(wide['entries'], BUDGET) == summarize_entries(wide['entries'], BUDGET)
+
+
+def test_prompt_ids_map_back_to_batch_vouchers():
+    vouchers = [voucher(str(i), 1 + i % 4) for i in range(30)] + [voucher('L1', 400)]
+    costs = [payload_tokens(voucher_payload(v, BUDGET)) for v in vouchers]
+    for batch in pack_batches(costs, BUDGET, max_items=20):
+        items = listing(create_prompt_for_batch([vouchers[i] for i in batch]))
+        assert [v['id'] for v in items] == list(range(1, len(batch) + 1))
+        assert [v['voucherNo'] for v in items] == [vouchers[i]['voucherNo'] for i in batch]
+
+
+def test_each_voucher_analyzed_once_with_its_own_answer(monkeypatch):
+    monkeypatch.setattr('backend.ai_voucher_analyzer.TOKEN_BUDGET', BUDGET)
+    df = make_journal(300, lines_per_voucher=3, unbalanced_ratio=1.0)
+    # 분개 400줄짜리 대차 불일치 전표 하나 (요약 경로)
+    large = df.sample(400, replace=True, random_state=1).reset_index(drop=True)
+    large['전표일자'], large['전표번호'] = '20241231', 'L1'
+    large.loc[0, '차변금액'] += 1
+    df = to_numeric_amounts(pd.concat([df, large], ignore_index=True))
+
+    model = StubModel(latency=0)
+    results = analyze_voucher_sets_with_ai(df, model=model, cache=AICache(enabled=False),
+                                           rate_per_sec=1000, burst=100, backoff=0)
+    numbers = [r['voucherNo'] for r in results]
+    assert len(numbers) == len(set(numbers)) and 'L1' in numbers
+    assert len(results) == df.groupby(['전표일자', '전표번호']).ngroups
+    # 스텁은 받은 전표번호를 cause에 적으므로, 결과가 제 전표에 붙었는지 확인할 수 있다
+    assert all(r['analysis']['cause'] == f"스텁 {r['voucherNo']}" for r in results)
+    assert model.calls > 1
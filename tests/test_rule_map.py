@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from backend.analyzer import decode_rule_map, encode_rule_map, rule_bits
+
+
+def random_hits(rule_nos, n_rows, density, seed=0):
+    rng = np.random.default_rng(seed)
+    return {no: rng.random(n_rows) < density for no in rule_nos}
+
+
+def expected_map(hits, n_rows):
+    out = {}
+    for r in range(n_rows):
+        nos = sorted(no for no, m in hits.items() if m[r])
+        if nos:
+            out[r] = nos
+    return out
+
+
+@pytest.mark.parametrize('rule_nos, width, words', [
+    ([0, 3, 7], 8, 1),            # 가장 큰 번호 7 → 8비트
+    ([1, 8], 16, 1),              # 8 → 16비트
+    ([2, 16], 32, 1),             # 16 → 32비트
+    ([0, 31], 32, 1),             # 31은 32비트 한 칸의 마지막 비트
+    ([5, 32], 32, 2),             # 32부터 32비트 두 칸
+    ([0, 40, 63, 64, 100], 32, 4),  # uint64 칸을 넘는 번호 (64 이상)
+])
+@pytest.mark.parametrize('density, dense', [(0.02, False), (0.5, True)])
+def test_round_trip(rule_nos, width, words, density, dense):
+    n_rows = 500
+    hits = random_hits(rule_nos, n_rows, density)
+    payload = encode_rule_map(rule_bits(hits, n_rows))
+    assert (payload['width'], payload['words']) == (width, words)
+    # 일치한 행이 1/4을 넘으면 rows 없이 모든 행을 싣는다
+    assert (payload['rows'] is None) == dense
+    assert decode_rule_map(payload) == expected_map(hits, n_rows)
+
+
+def test_sparse_dense_boundary():
+    n_rows = 400
+    for n_hit, dense in ((100, False), (101, True)):     # 정확히 1/4까지는 rows를 쓴다
+        m = np.zeros(n_rows, dtype=bool)
+        m[:n_hit] = True
+        payload = encode_rule_map(rule_bits({0: m, 33: m}, n_rows))
+        assert (payload['rows'] is None) == dense
+        assert decode_rule_map(payload) == {r: [0, 33] for r in range(n_hit)}
+
+
+def test_no_hits():
+    payload = encode_rule_map(rule_bits({}, 10))
+    assert payload['width'] == 8 and payload['rows'] is not None
+    assert decode_rule_map(payload) == {}
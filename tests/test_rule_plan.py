@@ -0,0 +1,82 @@
+import random
+
+import numpy as np
+import pytest
+
+from backend.rule_plan import compile_plan, execute_plan, leaf_key
+
+N_ROWS = 64
+
+
+def cond(value, no):
+    return {'type': 'cond', 'rule': 'amount_over', 'value': value, '_no': no}
+
+
+def random_tree(rng, numbers, depth=0):
+    if depth >= 3 or rng.random() < 0.3:
+        return cond(rng.randrange(6), next(numbers))     # 값이 6가지뿐이라 같은 조건이 자주 반복된다
+    return {'type': 'group', 'op': rng.choice(['AND', 'OR']),
+            'items': [random_tree(rng, numbers, depth + 1) for _ in range(rng.randint(0, 4))]}
+
+
+def reference(tree, masks):
+    """트리를 그대로 재귀 평가한 결과 (빈 그룹은 False)."""
+    if tree.get('type') == 'cond':
+        return masks[tree['value']]
+    items = [reference(it, masks) for it in tree['items']]
+    if not items:
+        return np.zeros(N_ROWS, dtype=bool)
+    return np.logical_or.reduce(items) if tree['op'] == 'OR' else np.logical_and.reduce(items)
+
+
+class Leaves:
+    """조건 값별로 고정된 mask를 돌려주고, 호출을 기록한다."""
+
+    def __init__(self, seed):
+        rng = np.random.default_rng(seed)
+        self.masks = {v: rng.random(N_ROWS) < 0.5 for v in range(6)}
+        self.calls = []
+
+    def __call__(self, node, pos):
+        self.calls.append((leaf_key(node), pos))
+        m = self.masks[node['value']]
+        return m if pos is None else m[pos]
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_short_circuit_gives_the_same_final_mask(seed):
+    rng = random.Random(seed)
+    tree = random_tree(rng, iter(range(1000)))
+    plan = compile_plan(tree)
+    leaves = Leaves(seed)
+    full = execute_plan(plan, N_ROWS, leaves)
+    short = execute_plan(plan, N_ROWS, Leaves(seed), short_circuit=True)
+    assert np.array_equal(full, reference(tree, leaves.masks))
+    assert np.array_equal(short, full)
+
+
+def test_duplicated_leaf_is_evaluated_once():
+    tree = {'type': 'group', 'op': 'OR', 'items': [
+        cond(1, 0),
+        {'type': 'group', 'op': 'AND', 'items': [cond(2, 1), cond(1, 2)]},
+        cond(1, 3),
+    ]}
+    recorded = {}
+    for short_circuit in (False, True):
+        leaves = Leaves(0)
+        execute_plan(compile_plan(tree), N_ROWS, leaves, lambda node, m: recorded.__setitem__(node['_no'], m),
+                     short_circuit=short_circuit)
+        # value=1 조건은 세 번 나오지만 전체 행 mask는 한 번만 계산하고 나머지는 그것을 다시 쓴다
+        assert [pos for key, pos in leaves.calls if key == leaf_key(cond(1, 0))] == [None]
+        # rule_map용 기록은 조건 노드마다 자기 번호로 남는다
+        assert sorted(recorded) == [0, 1, 2, 3]
+    assert leaf_key(cond(1, 0)) == leaf_key({**cond(1, 7), 'id': 'ui-3'})
+
+
+def test_short_circuit_skips_rows_already_decided():
+    tree = {'type': 'group', 'op': 'AND', 'items': [cond(0, 0), cond(3, 1)]}
+    leaves = Leaves(1)
+    final = execute_plan(compile_plan(tree), N_ROWS, leaves, short_circuit=True)
+    (_, first), (_, second) = leaves.calls
+    assert first is None and np.array_equal(second, np.flatnonzero(leaves.masks[0]))
+    assert np.array_equal(final, leaves.masks[0] & leaves.masks[3])
@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+from backend.app import json_response
+from backend.serialize import iter_json
+
+ROWS = [{'__idx': i, '차변금액': f'{i:,}', '적요': None} for i in range(25)]
+
+
+def test_chunked_body_is_the_same_json():
+    obj = {'headers': ['a'], 'rows': ROWS, 'total': 25, 'empty': [], 'nan': float('nan')}
+    body = b''.join(iter_json(obj, chunk_items=4))
+    assert json.loads(body) == {**obj, 'nan': None}
+
+
+@pytest.mark.parametrize('obj', [
+    {'rows': ROWS, 'meta': object()},                        # 행 목록 밖의 값
+    {'meta': 1, 'rows': [{'x': object()}] + ROWS},           # 긴 목록의 첫 조각
+])
+def test_encoding_error_surfaces_before_the_first_byte(obj):
+    pieces = iter_json(obj, chunk_items=4)
+    with pytest.raises(TypeError):
+        next(pieces)
+    # 라우트는 try 안에서 json_response를 부르므로 200 응답을 시작하기 전에 오류로 바꿀 수 있다
+    with pytest.raises(TypeError):
+        json_response(obj)
+
+
+def test_json_response_streams_rows():
+    response = json_response({'total': len(ROWS), 'rows': ROWS})
+    assert response.is_streamed and response.status_code == 200
+    assert json.loads(b''.join(response.response)) == {'total': len(ROWS), 'rows': ROWS}
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.analyzer import BENFORD_P, flag_amount_outlier, flag_benford, flag_duplicate_entry
+
+
+def amounts_frame(accounts, amounts):
+    return pd.DataFrame({'계정과목': accounts, '차변금액': np.asarray(amounts, dtype=np.float64),
+                         '대변금액': np.zeros(len(amounts))})
+
+
+def test_benford_flags_only_the_over_represented_digit():
+    # A: 첫자리 9가 150건(기대 4.6%), 1이 50건(기대보다 적음) → 9로 시작하는 행만
+    # B: 9만 50건이지만 min_count(100) 미만 → 보지 않는다
+    # C: 첫자리 분포가 벤포드 비율 그대로 → 적합
+    conforming = [d * 100 + 7 for d in range(1, 10) for _ in range(int(round(BENFORD_P[d - 1] * 1000)))]
+    df = pd.concat([
+        amounts_frame(['A'] * 200, [950] * 150 + [120] * 50),
+        amounts_frame(['B'] * 50, [970] * 50),
+        amounts_frame(['C'] * len(conforming), conforming),
+    ], ignore_index=True)
+    mask = flag_benford(df, min_count=100).to_numpy()
+    assert mask[:150].all() and not mask[150:200].any()
+    assert not mask[200:].any()
+    # 최소 건수를 낮추면 B도 검사 대상이 된다
+    assert flag_benford(df, min_count=10).to_numpy()[200:250].all()
+
+
+def test_benford_ignores_amounts_below_ten():
+    df = amounts_frame(['A'] * 200, [5] * 200)
+    assert not flag_benford(df, min_count=1).any()
+
+
+def duplicate_frame():
+    return pd.DataFrame({
+        '거래처코드': ['P1', 'P1', 'P1', 'P2', 'P2', '', 'P1'],
+        '전표일자': ['20240105', '20240105', '20240108', '20240105', '20240105', '20240105', '20240105'],
+        '전표번호': ['1', '2', '3', '4', '4', '5', '6'],
+        '차변금액': [100.0, 100.0, 100.0, 50.0, 50.0, 100.0, 0.0],
+        '대변금액': [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 100.0],
+    })
+
+
+@pytest.mark.parametrize('days, expected', [
+    (0, [1, 1, 0, 0, 0, 0, 0]),     # 같은 날 다른 전표의 완전 중복만
+    (2, [1, 1, 0, 0, 0, 0, 0]),     # 3일 뒤 입력은 창 밖
+    (3, [1, 1, 1, 0, 0, 0, 0]),     # 3일 창 안으로 들어온다
+])
+def test_duplicate_entry_window(days, expected):
+    # 3·4행은 같은 전표 안의 반복이라 중복이 아니고, 5행은 거래처가 비었고, 6행은 대변이라 키가 다르다
+    mask = flag_duplicate_entry(duplicate_frame(), days=days).to_numpy()
+    assert mask.tolist() == [bool(e) for e in expected]
+
+
+def test_duplicate_entry_same_voucher_rows_need_another_voucher():
+    df = duplicate_frame()
+    df.loc[1, '전표번호'] = '1'     # 0·1행이 같은 전표가 되면 서로의 짝이 아니다
+    assert flag_duplicate_entry(df, days=0).to_numpy().tolist() == [False] * 7
+    assert flag_duplicate_entry(df, days=3).to_numpy()[[0, 1, 2]].all()
+
+
+def outlier_frame():
+    rng = np.random.default_rng(7)
+    a = np.round(rng.lognormal(10, 0.4, 60))
+    a[[5, 17]] = [a.max() * 6, 3.0]
+    b = np.round(rng.normal(5000, 300, 40))
+    b[0] = 20_000
+    small = [1.0, 2.0, 1000.0]       # min_count 미만 계정
+    df = amounts_frame(['A'] * 60 + ['B'] * 40 + ['S'] * 3, np.concatenate([a, b, small]))
+    # 차변이 0인 행은 대변 금액을 쓴다
+    df.loc[60, ['차변금액', '대변금액']] = [0.0, 20_000.0]
+    return df
+
+
+def expected_fences(df, method, k, min_count):
+    amounts = np.where(df['차변금액'] != 0, df['차변금액'].abs(), df['대변금액'].abs())
+    mask = np.zeros(len(df), dtype=bool)
+    for _, pos in df.groupby('계정과목').indices.items():
+        x = amounts[pos]
+        if len(x) < min_count:
+            continue
+        if method == 'iqr':
+            q1, q3 = np.quantile(x, [0.25, 0.75])
+            mask[pos] = (x < q1 - k * (q3 - q1)) | (x > q3 + k * (q3 - q1))
+        else:
+            mask[pos] = np.abs(x - x.mean()) > k * np.std(x, ddof=1)
+    return mask
+
+
+@pytest.mark.parametrize('method, k', [('iqr', 1.5), ('iqr', 3), ('zscore', 2), ('zscore', 3)])
+def test_amount_outlier_matches_numpy_fences(method, k):
+    df = outlier_frame()
+    mask = flag_amount_outlier(df, method=method, k=k, min_count=20).to_numpy()
+    expected = expected_fences(df, method, k, 20)
+    assert expected.any() and np.array_equal(mask, expected)
+    assert mask[60] and not mask[100:].any()
+
+
+def test_amount_outlier_unknown_method_flags_nothing():
+    assert not flag_amount_outlier(outlier_frame(), method='mad').any()
@@ -0,0 +1,105 @@
+import os
+import json
+
+import pandas as pd
+import pytest
+
+from backend import cli
+from backend.analyzer import analyze_journal
+from backend.ingest import iter_csv_chunks, read_journal
+from backend.streaming import analyze_journal_chunked, collect_set_aggregates, iter_frame_chunks
+from benchmarks.synthetic import make_sample_like_journal
+
+TREE = {'type': 'group', 'op': 'OR', 'items': [
+    {'type': 'cond', 'rule': 'weekend_txn'},
+    {'type': 'cond', 'rule': 'keyword_search', 'value': '부가세,비용'},
+    {'type': 'group', 'op': 'AND', 'items': [
+        {'type': 'cond', 'rule': 'amount_over', 'op': '>=', 'value': 500_000, 'target': 'credit'},
+        {'type': 'cond', 'rule': 'uniform_account'},
+    ]},
+    {'type': 'cond', 'rule': 'unbalanced_set'},
+    {'type': 'cond', 'rule': 'party_freq', 'op': '<', 'value': 5},
+    {'type': 'cond', 'rule': 'benford', 'value': 1.96, 'min_count': 50},
+    {'type': 'cond', 'rule': 'duplicate_entry', 'value': 3},
+    {'type': 'cond', 'rule': 'amount_outlier', 'method': 'iqr', 'value': 1.5},
+]}
+
+
+@pytest.fixture(scope='module')
+def journal_csv(tmp_path_factory):
+    path = tmp_path_factory.mktemp('journal') / 'journal.csv'
+    make_sample_like_journal(5000).to_csv(path, index=False, encoding='utf-8-sig')
+    return str(path)
+
+
+def test_chunked_matches_analyze_journal_in_memory():
+    df = make_sample_like_journal(5000)
+    expected = analyze_journal(df, [], {}, 'AND', TREE, workers=1)
+    assert analyze_journal_chunked(iter_frame_chunks(df, 777), [], {}, 'AND', TREE) == expected
+
+
+def test_chunked_csv_matches_analyze_journal(journal_csv):
+    expected = analyze_journal(read_journal(journal_csv), [], {}, 'AND', TREE, workers=1)
+    result = analyze_journal_chunked(lambda: iter_csv_chunks(journal_csv, 777), [], {}, 'AND', TREE)
+    assert result['flagged_indices'] == expected['flagged_indices']
+    assert result['rule_map'] == expected['rule_map']
+    assert result['keyword_matches'] == expected['keyword_matches']
+    assert result['rows'] == expected['rows']
+
+
+def run_cli(csv_path, tree, out_dir, fmt, *extra):
+    rules = out_dir / 'rules.json'
+    rules.parent.mkdir(parents=True, exist_ok=True)
+    rules.write_text(json.dumps(tree), encoding='utf-8')
+    argv = [csv_path, '--rules', str(rules), '--format', fmt, '--workers', '1', '--no-store', '--out', str(out_dir)]
+    assert cli.main(argv + list(extra)) == 0
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return [out_dir / f'{name}.{kind}.{fmt}' for kind in ('flagged', 'rule_map')]
+
+
+def assert_same_outputs(full, chunk, fmt):
+    for f, c in zip(full, chunk):
+        if fmt == 'csv':
+            assert c.read_bytes() == f.read_bytes()
+        else:
+            a, b = pd.read_parquet(f), pd.read_parquet(c)
+            # 한 번에 읽은 결과는 category, chunk 결과는 문자열 열
+            a = a.astype({col: object for col in a.columns if isinstance(a[col].dtype, pd.CategoricalDtype)})
+            pd.testing.assert_frame_equal(a, b, check_dtype=False)
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet'])
+def test_cli_chunked_output_matches_full_read(journal_csv, tmp_path, fmt):
+    full = run_cli(journal_csv, TREE, tmp_path / 'full', fmt)
+    chunk = run_cli(journal_csv, TREE, tmp_path / 'chunk', fmt, '--chunked', '--chunksize', '777')
+    assert_same_outputs(full, chunk, fmt)
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet'])
+def test_cli_chunked_output_when_early_chunks_match_nothing(tmp_path, fmt):
+    df = make_sample_like_journal(3000)
+    df.loc[:1999, '차변금액'] = 1000.0
+    path = tmp_path / 'late.csv'
+    df.to_csv(path, index=False, encoding='utf-8-sig')
+    tree = {'type': 'group', 'op': 'AND', 'items': [
+        {'type': 'cond', 'rule': 'amount_over', 'op': '>=', 'value': 1_000_000, 'target': 'debit'}]}
+    full = run_cli(str(path), tree, tmp_path / 'full', fmt)
+    chunk = run_cli(str(path), tree, tmp_path / 'chunk', fmt, '--chunked', '--chunksize', '777')
+    assert len(pd.read_csv(full[0]) if fmt == 'csv' else pd.read_parquet(full[0])) > 0
+    assert_same_outputs(full, chunk, fmt)
+
+
+def test_set_aggregates_merge_vouchers_split_across_chunks():
+    df = pd.DataFrame({
+        '전표일자': ['20240105'] * 6,
+        '전표번호': ['1', '1', '1', '2', '2', '3'],
+        '계정과목': ['현금', '현금', '매출', '현금', '현금', '현금'],
+        '거래처코드': ['P1', 'P1', 'P2', 'P1', None, 'P1'],
+        '차변금액': [100.0, 0.0, 0.0, 50.0, 0.0, 10.0],
+        '대변금액': [0.0, 0.0, 100.0, 0.0, 40.0, 0.0],
+    })
+    # 전표 1·2가 chunk 경계에 걸치도록 두 줄씩 나눈다
+    agg = collect_set_aggregates(iter_frame_chunks(df, 2), {'unbalanced_set', 'uniform_account', 'party_freq'})
+    assert sorted(agg['unbalanced_set'].get_level_values(1)) == ['2', '3']
+    assert sorted(agg['uniform_account'].get_level_values(1)) == ['2', '3']
+    assert agg['party_freq'].to_dict() == {'P1': 3, 'P2': 1}